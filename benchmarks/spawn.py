@@ -0,0 +1,57 @@
+'''
+Compares spawning and despawning a wave of entities one at a time against the bulk APIs.
+
+Run with `python benchmarks/spawn.py [count]`.
+'''
+import sys
+import time
+from pathlib import Path
+# lets the script run from a checkout without installing the package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ecs_engine import EcsAdmin, Component
+
+class PositionComponent(Component):
+    def __init__(self, x=0, y=0):
+        self.x = x
+        self.y = y
+
+class VelocityComponent(Component):
+    def __init__(self, x=0, y=0):
+        self.x = x
+        self.y = y
+
+class HealthComponent(Component):
+    def __init__(self, health=100):
+        self.health = health
+
+COMPONENT_TYPES = [PositionComponent, VelocityComponent, HealthComponent]
+
+def spawn_one_at_a_time(admin: EcsAdmin, count: int):
+    entities = [admin.create_entity([component_type() for component_type in COMPONENT_TYPES]) for _ in range(count)]
+    for entity in entities:
+        admin.destroy_entity(entity)
+
+def spawn_in_bulk(admin: EcsAdmin, count: int):
+    entities = admin.create_entities(count, COMPONENT_TYPES)
+    admin.destroy_entities(entities)
+
+def measure(spawn, count: int, repeats: int = 5) -> float:
+    admin = EcsAdmin(max_entities=count)
+    admin.get_query(COMPONENT_TYPES)
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        spawn(admin, count)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    single = measure(spawn_one_at_a_time, count)
+    bulk = measure(spawn_in_bulk, count)
+    print(f'spawn + despawn {count} entities')
+    print(f'  one at a time: {single * 1000:8.1f} ms')
+    print(f'  bulk:          {bulk * 1000:8.1f} ms ({single / bulk:.1f}x)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+'''
+Runs the standard benchmark scenarios and optionally compares them against a stored baseline.
+
+Every scenario is measured at one or more sizes. The reported time is the best of `--repeats` runs after a
+warm-up run, divided by the number of operations the scenario performs, and peak memory is measured with
+tracemalloc in a separate run so it doesn't skew the timings. Scenarios that change the world end every run
+with a tick, like a frame would, so the admin's bookkeeping stays bounded instead of growing with the repeats.
+
+Run with `python benchmarks/suite.py [--output results.json] [--baseline baseline.json] [--threshold 0.1]`.
+The process exits with status 1 when a result is slower than its baseline by more than the threshold.
+'''
+from __future__ import annotations
+import argparse
+import fnmatch
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+# lets the script run from a checkout without installing the package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ecs_engine import EcsAdmin, Component, EventBus, System
+
+# a scenario builds its world for a size and returns a run function that reports the number of operations it performed
+ScenarioFactory = Callable[[int], Callable[[], int]]
+
+SCENARIOS: dict[str, tuple[ScenarioFactory, list[int]]] = {}
+
+def scenario(name: str, sizes: list[int]) -> Callable[[ScenarioFactory], ScenarioFactory]:
+    def register(factory: ScenarioFactory) -> ScenarioFactory:
+        SCENARIOS[name] = (factory, sizes)
+        return factory
+    return register
+
+class PositionComponent(Component):
+    def __init__(self, x=0.0, y=0.0):
+        self.x = x
+        self.y = y
+
+class VelocityComponent(Component):
+    def __init__(self, x=0.0, y=0.0):
+        self.x = x
+        self.y = y
+
+class MassComponent(Component):
+    def __init__(self, mass=1.0):
+        self.mass = mass
+
+class HealthComponent(Component):
+    def __init__(self, health=100):
+        self.health = health
+
+QUERY_COMPONENT_TYPES: list[type[Component]] = [
+    type(f'QueryComponent{index}', (Component,), {'__init__': lambda self: None}) for index in range(8)
+]
+
+class MovementSystem(System):
+    required_components = [PositionComponent, VelocityComponent]
+    reads = [VelocityComponent]
+    writes = [PositionComponent]
+
+    def run(self, dt: float):
+        for entity in self.get_required_entities():
+            position = entity.get_component(PositionComponent)
+            velocity = entity.get_component(VelocityComponent)
+            position.x += velocity.x * dt
+            position.y += velocity.y * dt
+
+class GravitySystem(System):
+    required_components = [PositionComponent, VelocityComponent, MassComponent]
+    writes = [VelocityComponent]
+
+    def run(self, dt: float):
+        # pulls every body towards the centre of mass, an O(n) stand-in for the all-pairs force
+        entities = self.get_required_entities()
+        total_mass = sum(entity.get_component(MassComponent).mass for entity in entities) or 1.0
+        centre_x = sum(entity.get_component(PositionComponent).x * entity.get_component(MassComponent).mass for entity in entities) / total_mass
+        centre_y = sum(entity.get_component(PositionComponent).y * entity.get_component(MassComponent).mass for entity in entities) / total_mass
+        for entity in entities:
+            position = entity.get_component(PositionComponent)
+            velocity = entity.get_component(VelocityComponent)
+            velocity.x += (centre_x - position.x) * dt
+            velocity.y += (centre_y - position.y) * dt
+
+class NBodyWorld(EcsAdmin):
+    systems = [GravitySystem, MovementSystem]
+
+@scenario('nbody', sizes=[1_000, 10_000])
+def nbody(size: int) -> Callable[[], int]:
+    world = NBodyWorld(size)
+    world.create_entities(size, [
+        lambda: PositionComponent(1.0, 2.0), lambda: VelocityComponent(0.5, -0.5), MassComponent,
+    ])
+
+    def run() -> int:
+        world.tick(1 / 60)
+        return size
+    return run
+
+@scenario('spawn_wave', sizes=[1_000, 20_000])
+def spawn_wave(size: int) -> Callable[[], int]:
+    world = EcsAdmin(size)
+    component_types = [PositionComponent, VelocityComponent, HealthComponent]
+    world.get_query(component_types)
+
+    def run() -> int:
+        entities = [world.create_entity([component_type() for component_type in component_types]) for _ in range(size)]
+        for entity in entities:
+            world.destroy_entity(entity)
+        world.tick(0)
+        return size
+    return run
+
+@scenario('spawn_wave_bulk', sizes=[1_000, 20_000])
+def spawn_wave_bulk(size: int) -> Callable[[], int]:
+    world = EcsAdmin(size)
+    component_types = [PositionComponent, VelocityComponent, HealthComponent]
+    world.get_query(component_types)
+
+    def run() -> int:
+        world.destroy_entities(world.create_entities(size, component_types))
+        world.tick(0)
+        return size
+    return run
+
+def make_query_scenario(n_components: int) -> ScenarioFactory:
+    def query(size: int) -> Callable[[], int]:
+        # every entity has the first component, entity i has component j > 0 when i % 8 >= j
+        world = EcsAdmin(size)
+        for remainder in range(8):
+            world.create_entities((size - remainder + 7) // 8, QUERY_COMPONENT_TYPES[:remainder + 1])
+        component_types = QUERY_COMPONENT_TYPES[:n_components]
+
+        def run() -> int:
+            world.get_entities_intersect(component_types)
+            return size
+        return run
+    return query
+
+for n_components in range(1, 9):
+    scenario(f'query_{n_components}', sizes=[1_000, 100_000])(make_query_scenario(n_components))
+
+@scenario('event_fan_out', sizes=[10, 1_000])
+def event_fan_out(size: int) -> Callable[[], int]:
+    event_bus = EventBus()
+    event_bus.register_event('damage')
+    received = []
+    for _ in range(size):
+        event_bus.subscribe('damage', lambda amount: received.append(amount))
+    n_publishes = max(1, 100_000 // size)
+
+    def run() -> int:
+        for _ in range(n_publishes):
+            event_bus.publish('damage', amount=1)
+        received.clear()
+        return n_publishes * size
+    return run
+
+@scenario('component_pool', sizes=[1_000, 100_000])
+def component_pool(size: int) -> Callable[[], int]:
+    world = EcsAdmin(size)
+    entities = world.create_entities(size, [HealthComponent])
+    pool = world.get_component_pool(HealthComponent)
+
+    def run() -> int:
+        for entity in entities:
+            pool.remove_entity(entity)
+        for entity in entities:
+            component = pool.get_or_create_component_obj(health=50)
+            entity._add_component(component)
+            pool.add_entity(entity, world.change_tick)
+        world.tick(0)
+        return size
+    return run
+
+def measure(factory: ScenarioFactory, size: int, repeats: int) -> dict:
+    run = factory(size)
+    run()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        n_operations = run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run = factory(size)
+    run()
+    tracemalloc.reset_peak()
+    run()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    best = min(times)
+    return {
+        'size': size,
+        'operations': n_operations,
+        'best_s': best,
+        'median_s': statistics.median(times),
+        'ns_per_operation': best / n_operations * 1e9,
+        'peak_memory_bytes': peak_memory,
+    }
+
+def run_suite(patterns: list[str], sizes: list[int] | None, repeats: int) -> dict:
+    results = {}
+    for name, (factory, default_sizes) in SCENARIOS.items():
+        if not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+            continue
+        for size in sizes or default_sizes:
+            key = f'{name}@{size}'
+            results[key] = {'scenario': name, **measure(factory, size, repeats)}
+            result = results[key]
+            print(f"{key:<28} {result['ns_per_operation']:>12.1f} ns/op {result['peak_memory_bytes'] / 2**20:>10.2f} MiB peak", flush=True)
+    return {
+        'metadata': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'repeats': repeats,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'results': results,
+    }
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    '''
+    Compares every result that also appears in the baseline and prints the change in time per operation.
+
+    Returns:
+        The keys of the results that are slower than their baseline by more than the threshold.
+    '''
+    regressions = []
+    print(f"\n{'benchmark':<28} {'baseline':>12} {'current':>12} {'change':>8}")
+    for key, result in results['results'].items():
+        baseline_result = baseline['results'].get(key)
+        if baseline_result is None:
+            continue
+        ratio = result['ns_per_operation'] / baseline_result['ns_per_operation']
+        is_regression = ratio > 1 + threshold
+        if is_regression:
+            regressions.append(key)
+        print(
+            f"{key:<28} {baseline_result['ns_per_operation']:>12.1f} {result['ns_per_operation']:>12.1f} "
+            f"{(ratio - 1) * 100:>+7.1f}%{'  REGRESSION' if is_regression else ''}"
+        )
+    return regressions
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Runs the ECS benchmark scenarios.')
+    parser.add_argument('scenarios', nargs='*', default=['*'], help='glob patterns of the scenarios to run, e.g. "query_*"')
+    parser.add_argument('--sizes', type=int, nargs='+', help='overrides the sizes of every scenario, e.g. --sizes 1000 100000 1000000')
+    parser.add_argument('--repeats', type=int, default=5, help='timed runs per benchmark, the best one is reported')
+    parser.add_argument('--output', help='writes the results to this JSON file')
+    parser.add_argument('--baseline', help='a JSON file written by --output to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1, help='the allowed slowdown before a result counts as a regression')
+    parser.add_argument('--list', action='store_true', help='lists the scenarios and their default sizes')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (factory, sizes) in SCENARIOS.items():
+            print(f"{name:<20} {', '.join(map(str, sizes))}")
+        return 0
+
+    results = run_suite(args.scenarios, args.sizes, args.repeats)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
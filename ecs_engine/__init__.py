@@ -1,8 +1,11 @@
 from .entity_admin import EcsAdmin
 from .entity import Entity
 from .system import System, subscribe_to_event
-from .component import Component, SingletonComponent
+from .component import Component, SingletonComponent, ColumnarComponent
 from .component_pool import ComponentPool
 from .events import EventBus
-from .entity_builder import Builder
+from .entity_builder import Builder, Prefab
+from .query import Query, Added, Changed, Removed, AllOf, AnyOf, NoneOf, OptionalOf
+from .command_buffer import CommandBuffer
+from .scheduler import Scheduler
 
@@ -0,0 +1,226 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Type, Iterable
+
+if TYPE_CHECKING:
+    from .component import Component
+    from .entity import Entity
+
+class Archetype:
+    '''
+    A table holding every entity that shares the exact same set of component types.
+
+    Entities are stored densely and removed with a swap-remove, the same way a ComponentPool
+    stores its sparse set. Each archetype caches the archetype reached by adding or removing
+    a single component type so that structural changes don't need to rebuild the type set.
+
+    Attributes:
+        component_types (frozenset[Type[Component]]): The component types every entity in this archetype has.
+        entity_ids (list[int]): The dense list of entity ids stored in this archetype.
+        entities (list[Entity]): The dense list of entities, aligned with entity_ids.
+        rows (dict[int, int]): Maps an entity id to its row in the dense lists.
+        add_edges (dict[Type[Component], Archetype]): Cached transitions for adding a component type.
+        remove_edges (dict[Type[Component], Archetype]): Cached transitions for removing a component type.
+    '''
+    def __init__(self, component_types: frozenset[Type[Component]]) -> None:
+        self.component_types: frozenset[Type[Component]] = component_types
+        self.entity_ids: list[int] = []
+        self.entities: list[Entity] = []
+        self.rows: dict[int, int] = {}
+        self.add_edges: dict[Type[Component], Archetype] = {}
+        self.remove_edges: dict[Type[Component], Archetype] = {}
+
+    def add_entity(self, entity: Entity):
+        '''
+        Appends an entity to the end of the table.
+
+        Args:
+            entity (Entity): The entity to add.
+        '''
+        if entity.id not in self.rows:
+            self.rows[entity.id] = len(self.entity_ids)
+            self.entity_ids.append(entity.id)
+            self.entities.append(entity)
+
+    def remove_entity(self, entity: Entity):
+        '''
+        Removes an entity from the table by swapping the last row into its place.
+
+        Args:
+            entity (Entity): The entity to remove.
+        '''
+        row = self.rows.pop(entity.id, None)
+        if row is None:
+            return
+
+        last_entity_id = self.entity_ids.pop()
+        last_entity = self.entities.pop()
+        if row < len(self.entity_ids):
+            self.entity_ids[row] = last_entity_id
+            self.entities[row] = last_entity
+            self.rows[last_entity_id] = row
+
+    def contains_entity(self, entity: Entity) -> bool:
+        return entity.id in self.rows
+
+    def __len__(self) -> int:
+        return len(self.entity_ids)
+
+    def __repr__(self) -> str:
+        type_names = sorted(component_type.__name__ for component_type in self.component_types)
+        return f"{self.__class__.__name__}({', '.join(type_names)})"
+
+class ArchetypeGraph:
+    '''
+    Registry of every Archetype in a world and the transitions between them.
+
+    The graph keeps track of which archetype each entity lives in and moves entities along the
+    cached add/remove edges when a component is attached or removed. Intersection queries only
+    need to walk the archetypes whose component set is a superset of the query, so no per-entity
+    membership checks are required.
+
+    Attributes:
+        empty_archetype (Archetype): The archetype of entities with no components.
+        archetypes (dict[frozenset[Type[Component]], Archetype]): All archetypes keyed by their component set.
+        entity_archetypes (dict[int, Archetype]): Maps an entity id to the archetype it currently lives in.
+
+    Methods:
+        get_archetype: Retrieves or creates the archetype for a set of component types.
+        add_entity: Places an entity in the archetype matching its current components.
+        remove_entity: Removes an entity from the graph.
+        on_component_added: Moves an entity along the add edge of a component type.
+        on_component_removed: Moves an entity along the remove edge of a component type.
+        get_matching_archetypes: Retrieves every archetype that has all of the given component types.
+        get_entities_intersect: Retrieves every entity that has all of the given component types.
+    '''
+    def __init__(self) -> None:
+        self.empty_archetype = Archetype(frozenset())
+        self.archetypes: dict[frozenset[Type[Component]], Archetype] = {frozenset(): self.empty_archetype}
+        self.entity_archetypes: dict[int, Archetype] = {}
+        self._matching_archetypes: dict[frozenset[Type[Component]], list[Archetype]] = {}
+
+    def get_archetype(self, component_types: Iterable[Type[Component]]) -> Archetype:
+        '''
+        Retrieves the archetype for a set of component types, creating it if it doesn't exist yet.
+
+        Args:
+            component_types (Iterable[Type[Component]]): The component types of the archetype.
+
+        Returns:
+            The Archetype for the component set.
+        '''
+        component_types = frozenset(component_types)
+        archetype = self.archetypes.get(component_types)
+        if archetype is None:
+            archetype = Archetype(component_types)
+            self.archetypes[component_types] = archetype
+
+            for query_types, matching_archetypes in self._matching_archetypes.items():
+                if query_types <= component_types:
+                    matching_archetypes.append(archetype)
+        return archetype
+
+    def _get_add_transition(self, archetype: Archetype, component_type: Type[Component]) -> Archetype:
+        target = archetype.add_edges.get(component_type)
+        if target is None:
+            target = self.get_archetype(archetype.component_types | {component_type})
+            archetype.add_edges[component_type] = target
+            target.remove_edges[component_type] = archetype
+        return target
+
+    def _get_remove_transition(self, archetype: Archetype, component_type: Type[Component]) -> Archetype:
+        target = archetype.remove_edges.get(component_type)
+        if target is None:
+            target = self.get_archetype(archetype.component_types - {component_type})
+            archetype.remove_edges[component_type] = target
+            target.add_edges[component_type] = archetype
+        return target
+
+    def _move_entity(self, entity: Entity, source: Archetype, target: Archetype):
+        if source is not target:
+            source.remove_entity(entity)
+            target.add_entity(entity)
+        self.entity_archetypes[entity.id] = target
+
+    def add_entity(self, entity: Entity):
+        '''
+        Places an entity in the archetype that matches the components it currently has.
+
+        Args:
+            entity (Entity): The entity to add.
+        '''
+        archetype = self.get_archetype(entity.components.keys())
+        archetype.add_entity(entity)
+        self.entity_archetypes[entity.id] = archetype
+
+    def remove_entity(self, entity: Entity):
+        '''
+        Removes an entity from its archetype and stops tracking it.
+
+        Args:
+            entity (Entity): The entity to remove.
+        '''
+        archetype = self.entity_archetypes.pop(entity.id, None)
+        if archetype is not None:
+            archetype.remove_entity(entity)
+
+    def on_component_added(self, entity: Entity, component_type: Type[Component]):
+        '''
+        Moves an entity to the archetype reached by adding a component type.
+
+        Args:
+            entity (Entity): The entity that gained the component.
+            component_type (Type[Component]): The type of the component that was added.
+        '''
+        source = self.entity_archetypes.get(entity.id, self.empty_archetype)
+        if component_type in source.component_types:
+            return
+        self._move_entity(entity, source, self._get_add_transition(source, component_type))
+
+    def on_component_removed(self, entity: Entity, component_type: Type[Component]):
+        '''
+        Moves an entity to the archetype reached by removing a component type.
+
+        Args:
+            entity (Entity): The entity that lost the component.
+            component_type (Type[Component]): The type of the component that was removed.
+        '''
+        source = self.entity_archetypes.get(entity.id)
+        if source is None or component_type not in source.component_types:
+            return
+        self._move_entity(entity, source, self._get_remove_transition(source, component_type))
+
+    def get_matching_archetypes(self, component_types: Iterable[Type[Component]]) -> list[Archetype]:
+        '''
+        Retrieves every archetype that has all of the given component types. The result is cached
+        per component set and kept up to date as new archetypes are created.
+
+        Args:
+            component_types (Iterable[Type[Component]]): The component types to match.
+
+        Returns:
+            A list of the matching Archetype instances.
+        '''
+        query_types = frozenset(component_types)
+        matching_archetypes = self._matching_archetypes.get(query_types)
+        if matching_archetypes is None:
+            matching_archetypes = [
+                archetype for archetype_types, archetype in self.archetypes.items()
+                if query_types <= archetype_types
+            ]
+            self._matching_archetypes[query_types] = matching_archetypes
+        return matching_archetypes
+
+    def get_entities_intersect(self, component_types: Iterable[Type[Component]]) -> list[Entity]:
+        '''
+        Retrieves every entity that has all of the given component types.
+
+        Args:
+            component_types (Iterable[Type[Component]]): The component types to match.
+
+        Returns:
+            A list of the matching Entity instances.
+        '''
+        entities: list[Entity] = []
+        for archetype in self.get_matching_archetypes(component_types):
+            entities.extend(archetype.entities)
+        return entities
@@ -0,0 +1,132 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Type
+from .entity import Entity
+
+if TYPE_CHECKING:
+    from .component import Component
+    from .entity_admin import EcsAdmin
+
+# the id of an entity recorded with create_entity until its buffer is flushed
+PENDING_ENTITY_ID = -1
+
+class CommandBuffer:
+    '''
+    Records structural changes so they can be applied in bulk at a sync point instead of while
+    systems are iterating over queries.
+
+    Entities recorded with `create_entity` can be used in later commands of the same buffer, but they
+    only get their id, and join the world, when the buffer is flushed. Ids are therefore handed out in
+    flush order, which the admin keeps independent of which system thread recorded first.
+    Flushing applies the commands in phases: creations, then attachments grouped by component type,
+    then removals grouped by component type, and finally destructions. This means a destroy always wins
+    over any other command recorded for the same entity in the same frame.
+
+    Attributes:
+        ecs_admin (EcsAdmin): The admin the commands are applied to.
+        created (list[Entity]): Entities waiting to be added to the world.
+        attached (dict[Type[Component], list[tuple[Entity, Component]]]): Pending attachments per component type.
+        removed (dict[Type[Component], list[tuple[Entity, Component]]]): Pending removals per component type.
+        destroyed (list[Entity]): Entities waiting to be destroyed.
+
+    Methods:
+        create_entity: Records the creation of an entity with an optional set of components.
+        destroy_entity: Records the destruction of an entity.
+        attach_component_to_entity: Records attaching a component to an entity.
+        remove_component: Records removing a component from an entity.
+        flush: Applies every recorded command to the admin and clears the buffer.
+    '''
+    def __init__(self, ecs_admin: EcsAdmin) -> None:
+        self.ecs_admin = ecs_admin
+        self.created: list[Entity] = []
+        self.attached: dict[Type[Component], list[tuple[Entity, Component]]] = {}
+        self.removed: dict[Type[Component], list[tuple[Entity, Component]]] = {}
+        self.destroyed: list[Entity] = []
+
+    def create_entity(self, components: list[Component] | None = None) -> Entity:
+        '''
+        Records the creation of an entity. Its id stays PENDING_ENTITY_ID until the buffer is flushed,
+        when it gets its id and joins the world and its queries.
+
+        Args:
+            components (list[Component], optional): Components to attach to the new entity.
+
+        Returns:
+            The Entity that will be added on flush.
+        '''
+        entity = Entity(PENDING_ENTITY_ID, 0)
+        self.created.append(entity)
+        for component in components or ():
+            self.attach_component_to_entity(entity, component)
+        return entity
+
+    def destroy_entity(self, entity: Entity):
+        '''
+        Records the destruction of an entity.
+
+        Args:
+            entity (Entity): The entity to destroy.
+        '''
+        self.destroyed.append(entity)
+
+    def attach_component_to_entity(self, entity: Entity, component: Component):
+        '''
+        Records attaching a component to an entity.
+
+        Args:
+            entity (Entity): The entity to which the component will be attached.
+            component (Component): The component to attach.
+        '''
+        self.attached.setdefault(type(component), []).append((entity, component))
+
+    def remove_component(self, entity: Entity, component: Component):
+        '''
+        Records removing a component from an entity.
+
+        Args:
+            entity (Entity): The entity the component will be removed from.
+            component (Component): The component to remove.
+        '''
+        self.removed.setdefault(type(component), []).append((entity, component))
+
+    def is_empty(self) -> bool:
+        return not (self.created or self.attached or self.removed or self.destroyed)
+
+    def flush(self):
+        '''
+        Applies every recorded command to the admin and clears the buffer. Commands that target
+        entities which no longer exist, or that are still pending in a buffer flushed later, are skipped.
+
+        Raises:
+            ValueError: If there aren't enough free entity ids for the recorded creations. Nothing is applied
+                and the buffer keeps its commands in that case.
+        '''
+        ecs_admin = self.ecs_admin
+        entity_manager = ecs_admin.entity_manager
+        # ids are reserved before the buffer is cleared, so a failed flush keeps every command
+        entity_ids = entity_manager.reserve_ids(len(self.created)) if self.created else []
+        created, attached, removed, destroyed = self.created, self.attached, self.removed, self.destroyed
+        self.created, self.attached, self.removed, self.destroyed = [], {}, {}, []
+
+        if created:
+            generations = entity_manager.generations
+            for entity, entity_id in zip(created, entity_ids):
+                entity.id, entity.generation = entity_id, generations[entity_id]
+                ecs_admin._add_entity(entity)
+
+        for component_type, entity_components in attached.items():
+            live_entity_components = [
+                (entity, component) for entity, component in entity_components
+                if entity_manager.is_alive(entity)
+            ]
+            ecs_admin._attach_components(component_type, live_entity_components)
+
+        for component_type, entity_components in removed.items():
+            live_entities = [
+                entity for entity, component in entity_components
+                if entity_manager.is_alive(entity) and entity.get_component(component_type) is component
+            ]
+            ecs_admin._remove_components(component_type, live_entities)
+
+        live_entities = list({entity.id: entity for entity in destroyed if entity_manager.is_alive(entity)}.values())
+        if live_entities:
+            ecs_admin.destroy_entities(live_entities)
@@ -1,10 +1,29 @@
 from __future__ import annotations
 from typing import Any, Type, TYPE_CHECKING, TypeVar
 from abc import ABC, abstractmethod
+from itertools import count
+import threading
 
 if TYPE_CHECKING:
     T = TypeVar('T', bound='SingletonComponent')
 
+# hands every component class its own bit of the entity component masks
+_component_indices = count()
+_component_bit_lock = threading.Lock()
+
+class _LazyComponentBit:
+    '''
+    Stands in for `component_bit` until a component type is first used, then replaces itself on the class
+    with the next free bit, so abstract bases and unused types never take one.
+    '''
+    def __get__(self, instance: Any, owner: Type[Component]) -> int:
+        with _component_bit_lock:
+            bit = owner.__dict__.get('component_bit')
+            if not isinstance(bit, int):
+                bit = 1 << next(_component_indices)
+                owner.component_bit = bit
+        return bit
+
 class Component(ABC):
     '''
     Abstract base class for components in an Entity Component System (ECS) architecture.
@@ -14,13 +33,39 @@ class Component(ABC):
     their own distinct instances of a component, such as a HealthComponent where
     each entity has separate health values.
 
+    Attributes:
+        max_pool_size (int | None): The maximum number of inactive instances the ComponentPool keeps
+            for reuse, None for no limit.
+        component_bit (int): The bit set in `Entity.mask` while an entity has this component type.
+            Every subclass is given its own bit the first time it is read, usually when its first
+            component is attached or a query names it.
+
     Methods:
         serialize: Converts the component's state to a serializable format.
         deserialize: Reconstructs a component instance from serialized data.
+        reset: Reinitializes a recycled component with new values.
 
     Subclasses must implement serialize and deserialize methods to support
     serialization and deserialization of component state.
     '''
+    max_pool_size: int | None = None
+    component_bit: int = 0
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # set on every subclass so it never inherits the bit of a base that is already in use
+        cls.component_bit = _LazyComponentBit()
+
+    def reset(self, *args, **kwargs):
+        '''
+        Reinitializes a component that is being reused from a ComponentPool. By default this reruns
+        `__init__` with the new arguments; override it when a cheaper reset is possible.
+
+        Args:
+            *args: Variable length argument list passed to `get_or_create_component_obj`.
+            **kwargs: Arbitrary keyword arguments passed to `get_or_create_component_obj`.
+        '''
+        self.__init__(*args, **kwargs)
 
     def serialize(self) -> Any:
         raise NotImplementedError(f'{self.__class__} has not defined a serialize method.')
@@ -66,5 +111,81 @@ class SingletonComponent(Component):
             cls._instances[cls] = instance
             return instance
         return cls._instances[cls]
-    
-    
\ No newline at end of file
+
+class ColumnarComponent(Component):
+    '''
+    A component whose fields are stored column-wise in NumPy arrays inside its ComponentPool.
+
+    Subclasses declare their fields and dtypes through the `columns` class attribute. While a columnar
+    component is attached to an entity its values live in the pool's column arrays, aligned with the
+    pool's dense `entity_ids`, so systems can update every entity at once with array operations.
+    The component instance itself acts as a lightweight row proxy, so per-entity access through
+    `Entity.get_component` keeps working. Requires the optional numpy dependency.
+
+    Example:
+        class PositionComponent(ColumnarComponent):
+            columns = {'x': 'float32', 'y': 'float32'}
+
+        position = PositionComponent(x=1.0, y=2.0)
+
+    Attributes:
+        columns (dict[str, str]): Maps each field name to the NumPy dtype of its column.
+    '''
+    columns: dict[str, str] = {}
+    __slots__ = ('_values', '_pool', '_entity_id')
+
+    def __init__(self, **kwargs):
+        unknown_fields = set(kwargs) - set(self.columns)
+        if unknown_fields:
+            raise TypeError(f'{self.__class__.__name__} has no columns named {sorted(unknown_fields)}.')
+
+        values = {name: 0 for name in self.columns}
+        values.update(kwargs)
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, '_pool', None)
+        object.__setattr__(self, '_entity_id', -1)
+
+    def _bind(self, pool: Any, entity_id: int):
+        '''
+        Binds this component to a row of a pool's columns. Called by ComponentPool.
+        '''
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_entity_id', entity_id)
+
+    def _unbind(self):
+        '''
+        Copies the current row values back onto the component and detaches it from the pool.
+        Called by ComponentPool.
+        '''
+        pool = self._pool
+        if pool is not None:
+            row = pool.sparse[self._entity_id]
+            for name in self.columns:
+                self._values[name] = pool.columns[name][row].item()
+        object.__setattr__(self, '_pool', None)
+        object.__setattr__(self, '_entity_id', -1)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in type(self).columns:
+            pool = self._pool
+            if pool is None:
+                return self._values[name]
+            return pool.columns[name][pool.sparse[self._entity_id]].item()
+        raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+
+    def __setattr__(self, name: str, value: Any):
+        if name in type(self).columns:
+            pool = self._pool
+            if pool is None:
+                self._values[name] = value
+            else:
+                pool.columns[name][pool.sparse[self._entity_id]] = value
+        else:
+            object.__setattr__(self, name, value)
+
+    def serialize(self) -> Any:
+        return {name: getattr(self, name) for name in self.columns}
+
+    @classmethod
+    def deserialize(cls: Type, serialized_data: Any) -> Type:
+        return cls(**serialized_data)
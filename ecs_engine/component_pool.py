@@ -1,11 +1,89 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Type, TypeVar
+from array import array
+from typing import TYPE_CHECKING, Any, Iterator, Type, TypeVar
+from .component import ColumnarComponent
+
+try:
+    import numpy as np
+except ImportError: # numpy is only required for ColumnarComponents
+    np = None
 
 if TYPE_CHECKING:
     from .component import Component
     from .entity import Entity
     T = TypeVar('T', bound=Component)
 
+SPARSE_PAGE_BITS = 12
+SPARSE_PAGE_SIZE = 1 << SPARSE_PAGE_BITS
+_SPARSE_PAGE_MASK = SPARSE_PAGE_SIZE - 1
+_EMPTY_SPARSE_PAGE = array('i', [-1]) * SPARSE_PAGE_SIZE
+
+class SparseArray:
+    '''
+    The 'sparse' array of a sparse set, mapping every entity id to its row in the dense arrays, or -1.
+
+    Rows are stored in pages of SPARSE_PAGE_SIZE 32-bit ints. A page is only allocated once an id in its
+    range gets a row, and `release_empty_pages` frees the pages whose ids have all been reset to -1, so the
+    memory a pool uses grows with its members instead of with the admin's entity capacity.
+
+    Attributes:
+        capacity (int): The number of entity ids covered.
+
+    Methods:
+        get_page_count: Retrieves the number of allocated pages.
+        release_empty_pages: Frees the pages that no longer hold a row.
+        clear: Resets every id to -1 and frees every page.
+    '''
+    __slots__ = ('capacity', '_pages')
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._pages: list[array | None] = [None] * ((capacity + _SPARSE_PAGE_MASK) >> SPARSE_PAGE_BITS)
+
+    def get_page_count(self) -> int:
+        return len(self._pages) - self._pages.count(None)
+
+    def release_empty_pages(self):
+        pages = self._pages
+        for page_index, page in enumerate(pages):
+            if page is not None and page == _EMPTY_SPARSE_PAGE:
+                pages[page_index] = None
+
+    def clear(self):
+        self._pages = [None] * len(self._pages)
+
+    def __getitem__(self, entity_id: int) -> int:
+        page = self._pages[entity_id >> SPARSE_PAGE_BITS]
+        return -1 if page is None else page[entity_id & _SPARSE_PAGE_MASK]
+
+    def __setitem__(self, entity_id: int, row: int):
+        page = self._pages[entity_id >> SPARSE_PAGE_BITS]
+        if page is None:
+            if row == -1:
+                return
+            page = self._pages[entity_id >> SPARSE_PAGE_BITS] = array('i', _EMPTY_SPARSE_PAGE)
+        page[entity_id & _SPARSE_PAGE_MASK] = row
+
+    def __len__(self) -> int:
+        return self.capacity
+
+    def __iter__(self) -> Iterator[int]:
+        n_remaining = self.capacity
+        for page in self._pages:
+            yield from (page or _EMPTY_SPARSE_PAGE)[:min(n_remaining, SPARSE_PAGE_SIZE)]
+            n_remaining -= SPARSE_PAGE_SIZE
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SparseArray):
+            return NotImplemented
+        return self.capacity == other.capacity and all(
+            (page or _EMPTY_SPARSE_PAGE) == (other_page or _EMPTY_SPARSE_PAGE)
+            for page, other_page in zip(self._pages, other._pages)
+        )
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(capacity={self.capacity}, pages={self.get_page_count()})"
+
 class ComponentPool:
     ''' 
     Manages a pool of components and stores them in memory when out of use to reduce object init times.
@@ -14,59 +92,151 @@ class ComponentPool:
     Attributes:
         component_type (Type[Component]): The type of component this pool manages.   
         pool (list[Component]): A list of inactive component instances available for reuse.
-        active (list[Component): A list of Componens that are actively using components of this type.
-        entity_ids (list[int]): The 'dense' array part of the sparse set containing entity IDs.
-        sparse (list[int]): The 'sparse' array part of the sparse set for quick lookup.
+        active (dict[int, Component]): The components of this type that are in use, keyed by their id() for O(1) release.
+        max_pool_size (int | None): The maximum number of inactive components kept for reuse, None for no limit.
+        entity_ids (array[int]): The 'dense' array part of the sparse set containing entity IDs.
+        sparse (SparseArray): The 'sparse' array part of the sparse set for quick lookup, allocated in pages as entities are added.
         entity_capacity (int): The maximum number of entities that can be managed.
+        columns (dict[str, np.ndarray] | None): For ColumnarComponents, one NumPy array per field, aligned with
+            entity_ids. Only the first len(entity_ids) rows are in use. None for regular components.
+        added_ticks (list[int]): The change tick at which each entity's component was added, aligned with entity_ids.
+        changed_ticks (list[int]): The change tick at which each entity's component was last added or marked as
+            changed, aligned with entity_ids.
+        removed (list[tuple[int, Entity]]): The change tick and entity of every removal that hasn't been cleared yet.
+        changes (list[tuple[int, Entity]]): The change tick and entity of every addition and change that hasn't been
+            cleared yet, so change queries only visit the rows that changed.
+        change_log_horizon (int | None): The logs hold every change made after this tick. Older ticks fall back to
+            scanning changed_ticks. None while logging is off, which the EcsAdmin does when nothing reads changes.
 
     Methods:
         get_or_create_component_obj: Retrieves an inactive component from the pool or creates a new instance if the pool is empty.
+        clone_component_obj: Retrieves a shallow copy of a template component, reusing an inactive component when possible.
+        add_entities: Adds a batch of entities, extending the dense arrays in one operation.
+        remove_entities: Removes a batch of entities.
+        get_column: Retrieves a view of the in-use rows of a column for ColumnarComponents.
+        get_columns: Retrieves views of every column for ColumnarComponents.
+        mark_changed: Records that an entity's component was modified.
+        mark_all_changed: Records that every component in the pool was modified.
+        get_added_since: Retrieves the entities whose component was added after a change tick.
+        get_changed_since: Retrieves the entities whose component was added or changed after a change tick.
+        get_removed_since: Retrieves the entities whose component was removed after a change tick.
+        is_removed_since: Checks whether an entity's component was removed after a change tick.
+        set_change_logging: Turns the removal and change logs on or off.
+        clear_removed: Forgets the removals and changes recorded up to a change tick.
     '''
-    def __init__(self, component_type: Type[T],  entity_capacity: int) -> None:
+    def __init__(self, component_type: Type[T],  entity_capacity: int, max_pool_size: int | None = None) -> None:
         self.component_type: Type[T] = component_type
         self.pool: list[T] = []
-        self.active: list[Component] = []
+        self.active: dict[int, Component] = {}
+        self.max_pool_size: int | None = max_pool_size if max_pool_size is not None else component_type.max_pool_size
 
-        self.entity_ids = [] # the 'dense' array in the sparse set that hold the ids for the entities
+        self.entity_ids = array('i') # the 'dense' array in the sparse set that hold the ids for the entities
         self.entities: list[Entity] = []
-        self.sparse = [-1] * entity_capacity
+        self.sparse = self._allocate_sparse(entity_capacity)
         self.entity_capacity = entity_capacity
+        self.added_ticks: list[int] = []
+        self.changed_ticks: list[int] = []
+        self.removed: list[tuple[int, Entity]] = []
+        self.changes: list[tuple[int, Entity]] = []
+        self.change_log_horizon: int | None = 0
+        self._removed_ticks: dict[Entity, int] = {}
+
+        self.columns: dict[str, Any] | None = None
+        if issubclass(component_type, ColumnarComponent):
+            if np is None:
+                raise ImportError(f'{component_type.__name__} is a ColumnarComponent, which requires numpy to be installed.')
+            self.columns = {
+                name: self._allocate_column(name, np.dtype(dtype), 0) for name, dtype in component_type.columns.items()
+            }
 
-    def get_or_create_component_obj(self, **kwargs) -> T:
+    def get_or_create_component_obj(self, *args, **kwargs) -> T:
         '''
         Retrieves an inactive component from the pool or creates a new instance if the pool is empty.
+        Recycled components are passed the arguments through their `reset` hook.
         
         Args:
-            **kwargs: Arbitrary keyword arguments passed to the component's constructor.
+            *args: Variable length argument list passed to the component's constructor or reset.
+            **kwargs: Arbitrary keyword arguments passed to the component's constructor or reset.
 
         Returns:
             An instance of the component.
         '''
         if not self.pool:
-            new_instance = self.component_type(**kwargs)
-            self.active.append(new_instance)
-            return new_instance
+            instance = self.component_type(*args, **kwargs)
         else: 
             instance = self.pool.pop()
-            self.active.append(instance)
-            return instance
+            instance.reset(*args, **kwargs)
+        self.active[id(instance)] = instance
+        return instance
         
-    def _release_component(self, instance: Component):
+    def clone_component_obj(self, template: T) -> T:
+        '''
+        Retrieves a shallow copy of a template component, reusing an inactive component when possible.
+        The copy is made by copying the template's attributes, so neither `__init__` nor `reset` runs and
+        mutable attribute values are shared with the template.
+
+        Args:
+            template (Component): The component to copy. It must not be attached to an entity.
+
+        Returns:
+            An instance of the component with the template's values.
+        '''
+        if self.pool:
+            instance = self.pool.pop()
+        else:
+            instance = object.__new__(self.component_type)
+        if self.columns is not None:
+            object.__setattr__(instance, '_values', dict(template._values))
+            object.__setattr__(instance, '_pool', None)
+            object.__setattr__(instance, '_entity_id', -1)
+        else:
+            state = instance.__dict__
+            state.clear()
+            state.update(template.__dict__)
+        self.active[id(instance)] = instance
+        return instance
+
+    def get_or_create_component_objs(self, count: int) -> list[T]:
+        '''
+        Retrieves a batch of components created without arguments, reusing inactive components first.
+
+        Args:
+            count (int): The number of components to retrieve.
+
+        Returns:
+            A list of component instances.
+        '''
+        n_recycled = min(count, len(self.pool))
+        instances = self.pool[len(self.pool) - n_recycled:]
+        del self.pool[len(self.pool) - n_recycled:]
+        for instance in instances:
+            instance.reset()
+        component_type = self.component_type
+        instances.extend([component_type() for _ in range(count - n_recycled)])
+        self.active.update({id(instance): instance for instance in instances})
+        return instances
+
+    def _release_component(self, instance: Component | None):
         '''
-        Releases a component instance, making it available for reuse.
+        Releases a component instance, making it available for reuse. The instance is dropped
+        instead when the pool already holds max_pool_size inactive components.
         
         Args:
             instance (Component): The component instance to release.
         '''
-        if instance in self.active: self.active.remove(instance)
-        self.pool.append(instance)
+        if instance is None:
+            return
+        self.active.pop(id(instance), None)
+        if self.max_pool_size is None or len(self.pool) < self.max_pool_size:
+            self.pool.append(instance)
         
-    def add_entity(self, entity: Entity):
+    def add_entity(self, entity: Entity, tick: int = 0):
         '''
         Adds an entity to the component pool if it has the required component.
         
         Args:
             entity (Entity): The entity to add.
+            tick (int): The change tick the component is added at. Re-adding an entity marks it as changed.
             
         Raises:
             ValueError: If the entity does not have the required component.
@@ -76,12 +246,57 @@ class ComponentPool:
                 self.sparse[entity.id] = len(self.entity_ids)
                 self.entity_ids.append(entity.id)
                 self.entities.append(entity)
+                self.added_ticks.append(tick)
+                self.changed_ticks.append(tick)
+            else:
+                self.changed_ticks[self.sparse[entity.id]] = tick
+            if self.change_log_horizon is not None:
+                self.changes.append((tick, entity))
+            if self.columns is not None:
+                self._write_row(entity)
         else:
             raise ValueError(f'{entity.__class__.__name__} must have a a {self.component_type.__class__.__name__} component.')
 
+    def add_entities(self, entities: list[Entity], tick: int = 0):
+        '''
+        Adds a batch of entities to the component pool, extending the dense arrays in one operation.
+
+        Args:
+            entities (list[Entity]): The entities to add. Each must have the required component.
+            tick (int): The change tick the components are added at.
+
+        Raises:
+            ValueError: If an entity does not have the required component.
+        '''
+        new_entities: list[Entity] = []
+        sparse = self.sparse
+        component_type = self.component_type
+        row = len(self.entity_ids)
+        for entity in entities:
+            if component_type not in entity.components:
+                raise ValueError(f'{entity.__class__.__name__} must have a a {component_type.__name__} component.')
+            entity_id = entity.id
+            if sparse[entity_id] == -1:
+                sparse[entity_id] = row
+                row += 1
+                new_entities.append(entity)
+            else:
+                self.changed_ticks[sparse[entity_id]] = tick
+
+        self.entity_ids.extend([entity.id for entity in new_entities])
+        self.entities.extend(new_entities)
+        self.added_ticks.extend([tick] * len(new_entities))
+        self.changed_ticks.extend([tick] * len(new_entities))
+        if self.change_log_horizon is not None:
+            self.changes.extend([(tick, entity) for entity in entities])
+        if self.columns is not None:
+            for entity in entities:
+                self._write_row(entity)
+
     def contains_entity(self, entity: Entity) -> bool:
         '''
-        Checks if the entity is in the component pool.
+        Checks if the entity is in the component pool. A stale entity whose id has since been
+        reused by another entity is not considered to be in the pool.
 
         Args:
             entity (Entity): The entity to check.
@@ -92,29 +307,362 @@ class ComponentPool:
         if 0 <= entity.id < self.entity_capacity:
             sparse_index = self.sparse[entity.id]
             if 0 <= sparse_index < len(self.entity_ids):
-                return self.entity_ids[sparse_index] == entity.id and sparse_index != -1
+                return self.entity_ids[sparse_index] == entity.id and self.entities[sparse_index].generation == entity.generation
         return False
     
-    def remove_entity(self, entity: Entity):
+    def remove_entity(self, entity: Entity, tick: int = 0):
         '''
         Removes an entity from the component pool if it is present and releases the component back into the pool.
         
         Args:
             entity (Entity): The entity to remove.
+            tick (int): The change tick the component is removed at.
         '''
-        if self.contains_entity(entity):
+        dense_index = self.sparse[entity.id] if 0 <= entity.id < self.entity_capacity else -1
+        if dense_index != -1 and self.entities[dense_index].generation == entity.generation:
             component_instance = entity.get_component(self.component_type)
             self._release_component(component_instance)
 
-            dense_index = self.sparse[entity.id]
             last_entity_id = self.entity_ids[-1]
             last_entity = self.entities[-1]
 
+            if self.columns is not None:
+                if component_instance._pool is self and component_instance._entity_id == entity.id:
+                    component_instance._unbind()
+                last_index = len(self.entity_ids) - 1
+                for column in self.columns.values():
+                    column[dense_index] = column[last_index]
+
             self.entity_ids[dense_index] = last_entity_id
             self.entities[dense_index] = last_entity
+            self.added_ticks[dense_index] = self.added_ticks[-1]
+            self.changed_ticks[dense_index] = self.changed_ticks[-1]
 
             self.sparse[last_entity_id] = dense_index
             self.sparse[entity.id] = -1
 
             self.entity_ids.pop()
             self.entities.pop()
+            self.added_ticks.pop()
+            self.changed_ticks.pop()
+            if self.change_log_horizon is not None:
+                self.removed.append((tick, entity))
+                self._removed_ticks[entity] = tick
+            if not self.entity_ids:
+                self._release_sparse_pages()
+
+    def remove_entities(self, entities: list[Entity], tick: int = 0):
+        '''
+        Removes a batch of entities from the component pool and releases their components back into the pool.
+        Small batches are swap-removed one by one; when a large share of the pool is removed the remaining
+        rows are compacted in a single pass instead, which keeps their order.
+
+        Args:
+            entities (list[Entity]): The entities to remove. Entities that aren't in the pool are ignored.
+            tick (int): The change tick the components are removed at.
+        '''
+        if len(entities) * 4 < len(self.entity_ids):
+            for entity in entities:
+                self.remove_entity(entity, tick)
+            return
+
+        sparse, pool_entities = self.sparse, self.entities
+        removed_entities: list[Entity] = []
+        for entity in entities:
+            row = sparse[entity.id] if 0 <= entity.id < self.entity_capacity else -1
+            if row != -1 and pool_entities[row].generation == entity.generation:
+                removed_entities.append(entity)
+
+        component_type = self.component_type
+        instances = [entity.components[component_type] for entity in removed_entities]
+        if self.columns is not None:
+            for entity, instance in zip(removed_entities, instances):
+                if instance._pool is self and instance._entity_id == entity.id:
+                    instance._unbind()
+        active = self.active
+        for instance in instances:
+            active.pop(id(instance), None)
+        n_released = len(instances) if self.max_pool_size is None else max(0, min(len(instances), self.max_pool_size - len(self.pool)))
+        self.pool.extend(instances[:n_released])
+
+        for entity in removed_entities:
+            sparse[entity.id] = -1
+        if self.change_log_horizon is not None:
+            self.removed.extend([(tick, entity) for entity in removed_entities])
+            self._removed_ticks.update(dict.fromkeys(removed_entities, tick))
+
+        kept_rows = [row for row, entity_id in enumerate(self.entity_ids) if sparse[entity_id] != -1]
+        self.entity_ids[:] = array('i', [self.entity_ids[row] for row in kept_rows])
+        self.entities[:] = [self.entities[row] for row in kept_rows]
+        self.added_ticks[:] = [self.added_ticks[row] for row in kept_rows]
+        self.changed_ticks[:] = [self.changed_ticks[row] for row in kept_rows]
+        for row, kept_row in enumerate(kept_rows):
+            if row != kept_row:
+                sparse[self.entity_ids[row]] = row
+        self._release_sparse_pages()
+        if self.columns is not None:
+            kept_rows = np.asarray(kept_rows, dtype=np.int64)
+            for column in self.columns.values():
+                column[:len(kept_rows)] = column[kept_rows]
+
+    def mark_changed(self, entity: Entity, tick: int):
+        '''
+        Records that an entity's component was modified. Does nothing if the entity isn't in the pool.
+
+        Args:
+            entity (Entity): The entity whose component changed.
+            tick (int): The change tick of the modification.
+        '''
+        if self.contains_entity(entity):
+            self.changed_ticks[self.sparse[entity.id]] = tick
+            if self.change_log_horizon is not None:
+                self.changes.append((tick, entity))
+
+    def mark_rows_changed(self, rows: Any, tick: int):
+        '''
+        Records that the components in some dense rows were modified, for example after scattering values
+        into their columns.
+
+        Args:
+            rows (slice | Iterable[int]): The dense rows that changed.
+            tick (int): The change tick of the modification.
+        '''
+        if isinstance(rows, slice):
+            rows = range(*rows.indices(len(self.entity_ids)))
+        elif np is not None and isinstance(rows, np.ndarray):
+            rows = rows.tolist()
+        changed_ticks, entities = self.changed_ticks, self.entities
+        for row in rows:
+            changed_ticks[row] = tick
+        if self.change_log_horizon is not None:
+            self.changes.extend([(tick, entities[row]) for row in rows])
+
+    def mark_all_changed(self, tick: int):
+        '''
+        Records that every component in the pool was modified, for example after a whole-column update.
+
+        Args:
+            tick (int): The change tick of the modification.
+        '''
+        self.changed_ticks[:] = [tick] * len(self.changed_ticks)
+        if self.change_log_horizon is not None:
+            self.changes.extend([(tick, entity) for entity in self.entities])
+
+    def is_added_since(self, entity: Entity, tick: int) -> bool:
+        return self.contains_entity(entity) and self.added_ticks[self.sparse[entity.id]] > tick
+
+    def is_changed_since(self, entity: Entity, tick: int) -> bool:
+        return self.contains_entity(entity) and self.changed_ticks[self.sparse[entity.id]] > tick
+
+    def get_added_since(self, tick: int) -> list[Entity]:
+        '''
+        Retrieves the entities whose component was added after a change tick.
+
+        Args:
+            tick (int): The change tick to compare against, usually the tick of a system's last run.
+
+        Returns:
+            A list of the matching Entity instances.
+        '''
+        entities, added_ticks = self.entities, self.added_ticks
+        rows = self._get_logged_rows(tick)
+        if rows is None:
+            return [entities[row] for row, added_tick in enumerate(added_ticks) if added_tick > tick]
+        return [entities[row] for row in rows if added_ticks[row] > tick]
+
+    def get_changed_since(self, tick: int) -> list[Entity]:
+        '''
+        Retrieves the entities whose component was added or marked as changed after a change tick.
+
+        Args:
+            tick (int): The change tick to compare against, usually the tick of a system's last run.
+
+        Returns:
+            A list of the matching Entity instances.
+        '''
+        entities, changed_ticks = self.entities, self.changed_ticks
+        rows = self._get_logged_rows(tick)
+        if rows is None:
+            return [entities[row] for row, changed_tick in enumerate(changed_ticks) if changed_tick > tick]
+        return [entities[row] for row in rows if changed_ticks[row] > tick]
+
+    def _get_logged_rows(self, tick: int) -> list[int] | None:
+        '''
+        Retrieves the sorted dense rows of the entities added or changed after a tick from the change log,
+        None if the log doesn't reach back to the tick.
+        '''
+        horizon = self.change_log_horizon
+        if horizon is None or tick < horizon:
+            return None
+        rows: set[int] = set()
+        contains_entity, sparse = self.contains_entity, self.sparse
+        for logged_tick, entity in reversed(self.changes):
+            if logged_tick <= tick:
+                break
+            if contains_entity(entity):
+                rows.add(sparse[entity.id])
+        return sorted(rows)
+
+    def get_removed_since(self, tick: int) -> list[Entity]:
+        '''
+        Retrieves the entities whose component was removed after a change tick, including entities that
+        have been destroyed since. Every entity is returned once.
+
+        Args:
+            tick (int): The change tick to compare against, usually the tick of a system's last run.
+
+        Returns:
+            A list of the matching Entity instances.
+        '''
+        removed: dict[int, Entity] = {}
+        for removed_tick, entity in reversed(self.removed):
+            if removed_tick <= tick:
+                break
+            removed.setdefault(id(entity), entity)
+        return list(reversed(removed.values()))
+
+    def is_removed_since(self, entity: Entity, tick: int) -> bool:
+        return self._removed_ticks.get(entity, tick) > tick
+
+    def set_change_logging(self, enabled: bool, tick: int = 0):
+        '''
+        Turns the removal and change logs on or off. While they are off removals aren't recorded at all
+        and change queries scan changed_ticks.
+
+        Args:
+            enabled (bool): Whether to log.
+            tick (int): The current change tick; the logs are complete for changes made after it.
+        '''
+        if not enabled:
+            self.change_log_horizon = None
+            self.removed.clear()
+            self.changes.clear()
+            self._removed_ticks.clear()
+        elif self.change_log_horizon is None:
+            self.change_log_horizon = tick
+
+    def clear_removed(self, tick: int):
+        '''
+        Forgets the removals and changes recorded at or before a change tick.
+
+        Args:
+            tick (int): The latest change tick to forget.
+        '''
+        n_cleared = 0
+        removed_ticks = self._removed_ticks
+        for removed_tick, entity in self.removed:
+            if removed_tick > tick:
+                break
+            if removed_ticks.get(entity) == removed_tick:
+                del removed_ticks[entity]
+            n_cleared += 1
+        if n_cleared:
+            del self.removed[:n_cleared]
+
+        n_cleared = 0
+        for changed_tick, entity in self.changes:
+            if changed_tick > tick:
+                break
+            n_cleared += 1
+        if n_cleared:
+            del self.changes[:n_cleared]
+        if self.change_log_horizon is not None and tick > self.change_log_horizon:
+            self.change_log_horizon = tick
+
+    def _release_sparse_pages(self):
+        '''
+        Frees the pages of the sparse array that no longer hold a row.
+        '''
+        if isinstance(self.sparse, SparseArray):
+            if self.entity_ids:
+                self.sparse.release_empty_pages()
+            else:
+                self.sparse.clear()
+
+    def _allocate_sparse(self, entity_capacity: int) -> Any:
+        '''
+        Allocates the sparse array, reading -1 for every id. Subclasses override this to back it with other storage.
+
+        Args:
+            entity_capacity (int): The number of entity ids the array covers.
+
+        Returns:
+            A mutable sequence of length entity_capacity.
+        '''
+        return SparseArray(entity_capacity)
+
+    def _allocate_column(self, name: str, dtype: Any, capacity: int) -> Any:
+        '''
+        Allocates a zeroed column array. Subclasses override this to back columns with other storage.
+
+        Args:
+            name (str): The field name of the column.
+            dtype (np.dtype): The dtype of the column.
+            capacity (int): The number of rows to allocate.
+
+        Returns:
+            A NumPy array of length capacity.
+        '''
+        return np.zeros(capacity, dtype=dtype)
+
+    def _write_row(self, entity: Entity):
+        '''
+        Copies a ColumnarComponent's values into the entity's row and binds the component to it.
+        '''
+        component = entity.get_component(self.component_type)
+        n_rows = len(self.entity_ids)
+        for name, column in self.columns.items():
+            if len(column) < n_rows:
+                grown_column = self._allocate_column(name, column.dtype, max(n_rows, 2 * len(column), 16))
+                grown_column[:len(column)] = column
+                self.columns[name] = grown_column
+
+        if component._pool is self and component._entity_id == entity.id:
+            return
+        if component._pool is not None:
+            component._unbind()
+
+        row = self.sparse[entity.id]
+        for name, column in self.columns.items():
+            column[row] = component._values[name]
+        component._bind(self, entity.id)
+
+    def get_column(self, name: str) -> Any:
+        '''
+        Retrieves a view of the in-use rows of a column, aligned with entity_ids.
+        The view is invalidated when the pool grows, so fetch it again each tick.
+
+        Args:
+            name (str): The field name of the column.
+
+        Returns:
+            A NumPy array view of the column.
+
+        Raises:
+            TypeError: If the pool does not store a ColumnarComponent.
+        '''
+        if self.columns is None:
+            raise TypeError(f'{self.component_type.__name__} is not a ColumnarComponent.')
+        return self.columns[name][:len(self.entity_ids)]
+
+    def get_columns(self) -> ColumnView:
+        '''
+        Retrieves views of every column, aligned with entity_ids, for whole-pool updates such as
+        `pos.x += vel.x * dt`.
+
+        Returns:
+            A ColumnView with one array attribute per field.
+        '''
+        return ColumnView({name: self.get_column(name) for name in self.columns or {}})
+
+class ColumnView:
+    '''
+    Exposes the column arrays of a ColumnarComponent pool as attributes.
+
+    In-place operations on the attributes, such as `view.x += 1`, write straight through to the pool.
+    '''
+    def __init__(self, columns: dict[str, Any]) -> None:
+        self.__dict__.update(columns)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({', '.join(self.__dict__)})"
@@ -0,0 +1,331 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Type
+import pickle
+from .entity import Entity
+from .hierarchy import NO_ENTITY
+from .snapshot import get_type_name, resolve_type_name
+
+if TYPE_CHECKING:
+    from .component import Component
+    from .entity_admin import EcsAdmin
+
+DELTA_VERSION = 2
+
+class WorldDelta:
+    '''
+    The difference between two states of a world, recorded by a DeltaRecorder.
+
+    Every change stores its value before and after, so a delta can be applied forwards or reverted.
+    Lists are sorted by entity id and component types by name so the same changes always produce the
+    same delta and are applied in the same order.
+
+    Attributes:
+        created (list[tuple[int, int]]): The id and generation of every entity that exists after but not before.
+        destroyed (list[tuple[int, int]]): The id and generation of every entity that existed before but not after.
+        generations (list[tuple[int, int, int]]): The id, generation before and generation after of every recycled id.
+        next_id (tuple[int, int]): The EntityManager's next_id before and after.
+        free_ids (tuple[int, list[int], list[int]]): The length of the unchanged start of the EntityManager's
+            destroyed_entity_ids, followed by the rest of the list before and after.
+        components (dict[Type[Component], list[tuple[int, Any, Any]]]): Per component type, the entity id and the
+            serialized component before and after. None means the entity didn't have the component.
+        parents (list[tuple[int, int, int]]): The id, parent id before and parent id after of every entity whose
+            parent changed, -1 for no parent.
+
+    Methods:
+        encode: Encodes the delta into bytes.
+        decode: Decodes a delta produced by encode.
+        inverted: Retrieves the delta that undoes this one.
+        is_empty: Checks whether the delta changes anything.
+    '''
+    def __init__(
+        self,
+        created: list[tuple[int, int]],
+        destroyed: list[tuple[int, int]],
+        generations: list[tuple[int, int, int]],
+        next_id: tuple[int, int],
+        free_ids: tuple[int, list[int], list[int]],
+        components: dict[Type[Component], list[tuple[int, Any, Any]]],
+        parents: list[tuple[int, int, int]],
+    ) -> None:
+        self.created = created
+        self.destroyed = destroyed
+        self.generations = generations
+        self.next_id = next_id
+        self.free_ids = free_ids
+        self.components = components
+        self.parents = parents
+
+    def inverted(self) -> WorldDelta:
+        '''
+        Retrieves the delta that undoes this one.
+        '''
+        n_shared, before, after = self.free_ids
+        return WorldDelta(
+            self.destroyed,
+            self.created,
+            [(entity_id, after_generation, before_generation) for entity_id, before_generation, after_generation in self.generations],
+            (self.next_id[1], self.next_id[0]),
+            (n_shared, after, before),
+            {
+                component_type: [(entity_id, new, old) for entity_id, old, new in changes]
+                for component_type, changes in self.components.items()
+            },
+            [(entity_id, after, before) for entity_id, before, after in self.parents],
+        )
+
+    def is_empty(self) -> bool:
+        return not (self.created or self.destroyed or self.generations or self.components or self.parents) and \
+            self.next_id[0] == self.next_id[1] and self.free_ids[1] == self.free_ids[2]
+
+    def encode(self) -> bytes:
+        '''
+        Encodes the delta into bytes. Component types are stored by name.
+        '''
+        return pickle.dumps((
+            DELTA_VERSION, self.created, self.destroyed, self.generations, self.next_id, self.free_ids,
+            [(get_type_name(component_type), changes) for component_type, changes in self.components.items()],
+            self.parents,
+        ), protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def decode(cls, data: bytes, known_types: dict[str, Type[Component]] | None = None) -> WorldDelta:
+        '''
+        Decodes a delta produced by encode. Deltas are pickled, so only decode data you trust.
+
+        Args:
+            data (bytes): The encoded delta.
+            known_types (dict[str, Type[Component]], optional): Component types by stored name, checked before importing them.
+
+        Returns:
+            The decoded WorldDelta.
+
+        Raises:
+            ValueError: If the data was encoded by an unsupported version.
+        '''
+        version, *fields = pickle.loads(data)
+        if version != DELTA_VERSION:
+            raise ValueError(f'Delta version {version} is not supported.')
+        created, destroyed, generations, next_id, free_ids, components, parents = fields
+        return cls(
+            created, destroyed, generations, tuple(next_id), tuple(free_ids),
+            {resolve_type_name(type_name, known_types): changes for type_name, changes in components},
+            parents,
+        )
+
+    def __repr__(self) -> str:
+        n_changes = sum(len(changes) for changes in self.components.values())
+        return f"{self.__class__.__name__}(created={len(self.created)}, destroyed={len(self.destroyed)}, components={n_changes})"
+
+class DeltaRecorder:
+    '''
+    Records the changes made to a world as WorldDeltas, for rollback and replication.
+
+    The recorder keeps the serialized value of every tracked component as of its last record. Each call
+    to `record` only visits the entities the admin's entity log and the pools' change ticks report as
+    created, destroyed, added, changed or removed since then, so the cost depends on the number of changes
+    instead of the size of the world. Component modifications must be reported with `mark_changed`.
+
+    Changes of parent made through the admin are recorded too, so destroying a parent and reverting the delta
+    brings back its children attached to it. Applying a delta restores entity ids, generations, the
+    EntityManager's free ids, parent links and component values exactly. Components that are only modified are updated in place; structural changes are applied in
+    ascending entity id order, so every peer that applies the same deltas ends up with the same pool layout.
+
+    Attributes:
+        ecs_admin (EcsAdmin): The admin whose changes are recorded.
+        component_types (list[Type[Component]] | None): The tracked component types, None to track every type.
+        last_run_tick (int): The admin's change tick at the last record.
+
+    Methods:
+        record: Captures the changes since the previous record as a WorldDelta.
+        apply: Applies a delta to the world.
+        revert: Undoes a delta.
+    '''
+    def __init__(self, ecs_admin: EcsAdmin, component_types: list[Type[Component]] | None = None) -> None:
+        self.ecs_admin = ecs_admin
+        self.component_types = component_types
+        entity_manager = ecs_admin.entity_manager
+        self._alive: dict[int, int] = {entity_id: entity.generation for entity_id, entity in ecs_admin.entity_map.items()}
+        self._generations = entity_manager.generations[:]
+        self._next_id = entity_manager.next_id
+        self._free_ids = list(entity_manager.destroyed_entity_ids)
+        self._parents: dict[int, int] = {}
+        if ecs_admin.hierarchy is not None:
+            parents = ecs_admin.hierarchy.parents
+            self._parents = {
+                entity_id: parents[entity_id] for entity_id in ecs_admin.hierarchy.get_depth_sorted_ids()[0]
+                if parents[entity_id] != NO_ENTITY
+            }
+        self._values: dict[Type[Component], dict[int, Any]] = {}
+        for component_type, component_pool in ecs_admin.component_pools.items():
+            if self._is_tracked(component_type):
+                self._values[component_type] = {
+                    entity.id: entity.components[component_type].serialize() for entity in component_pool.entities
+                }
+        self.last_run_tick = ecs_admin.change_tick
+        ecs_admin.increment_change_tick()
+
+    def _is_tracked(self, component_type: Type[Component]) -> bool:
+        return self.component_types is None or component_type in self.component_types
+
+    def record(self) -> WorldDelta:
+        '''
+        Captures every change made since the recorder was created or last recorded.
+
+        Returns:
+            A WorldDelta from the previous state to the current one.
+        '''
+        ecs_admin = self.ecs_admin
+        entity_manager = ecs_admin.entity_manager
+        tick = self.last_run_tick
+
+        entity_ids: set[int] = set()
+        for logged_tick, entity in reversed(ecs_admin.entity_log):
+            if logged_tick <= tick:
+                break
+            entity_ids.add(entity.id)
+
+        created: list[tuple[int, int]] = []
+        destroyed: list[tuple[int, int]] = []
+        generations: list[tuple[int, int, int]] = []
+        parents: list[tuple[int, int, int]] = []
+        hierarchy = ecs_admin.hierarchy
+        for entity_id in sorted(entity_ids):
+            entity = ecs_admin.entity_map.get(entity_id)
+            before, after = self._alive.get(entity_id), entity.generation if entity is not None else None
+            if before != after:
+                if before is not None:
+                    destroyed.append((entity_id, before))
+                if after is not None:
+                    created.append((entity_id, after))
+            if self._generations[entity_id] != entity_manager.generations[entity_id]:
+                generations.append((entity_id, self._generations[entity_id], entity_manager.generations[entity_id]))
+            parent_before = self._parents.get(entity_id, NO_ENTITY)
+            parent_after = hierarchy.parents[entity_id] if hierarchy is not None and entity is not None else NO_ENTITY
+            if parent_before != parent_after:
+                parents.append((entity_id, parent_before, parent_after))
+
+        components: dict[Type[Component], list[tuple[int, Any, Any]]] = {}
+        for component_type, component_pool in sorted(ecs_admin.component_pools.items(), key=lambda item: get_type_name(item[0])):
+            if not self._is_tracked(component_type):
+                continue
+            changed_ids = {entity.id for entity in component_pool.get_changed_since(tick)}
+            changed_ids.update(entity.id for entity in component_pool.get_removed_since(tick))
+            values = self._values.setdefault(component_type, {})
+            changes = []
+            for entity_id in sorted(changed_ids):
+                entity = ecs_admin.entity_map.get(entity_id)
+                old = values.get(entity_id)
+                new = entity.components[component_type].serialize() if entity is not None and component_pool.contains_entity(entity) else None
+                if old != new or (new is not None and entity_id in entity_ids):
+                    changes.append((entity_id, old, new))
+            if changes:
+                components[component_type] = changes
+
+        delta = WorldDelta(
+            created, destroyed, generations, (self._next_id, entity_manager.next_id),
+            self._get_free_ids_change(self._free_ids, entity_manager.destroyed_entity_ids), components, parents,
+        )
+        self._update_state(delta)
+        return delta
+
+    @staticmethod
+    def _get_free_ids_change(before: list[int], after: list[int]) -> tuple[int, list[int], list[int]]:
+        n_shared = 0
+        for n_shared, (before_id, after_id) in enumerate(zip(before, after), start=1):
+            if before_id != after_id:
+                n_shared -= 1
+                break
+        return (n_shared, before[n_shared:], after[n_shared:])
+
+    def _update_state(self, delta: WorldDelta):
+        for entity_id, generation in delta.destroyed:
+            del self._alive[entity_id]
+        for entity_id, generation in delta.created:
+            self._alive[entity_id] = generation
+        for entity_id, before, after in delta.generations:
+            self._generations[entity_id] = after
+        self._next_id = delta.next_id[1]
+        n_shared, before, after = delta.free_ids
+        self._free_ids[n_shared:] = after
+        for entity_id, before, after in delta.parents:
+            if after == NO_ENTITY:
+                del self._parents[entity_id]
+            else:
+                self._parents[entity_id] = after
+        for component_type, changes in delta.components.items():
+            values = self._values.setdefault(component_type, {})
+            for entity_id, old, new in changes:
+                if new is None:
+                    values.pop(entity_id, None)
+                else:
+                    values[entity_id] = new
+
+        self.last_run_tick = self.ecs_admin.change_tick
+        self.ecs_admin.increment_change_tick()
+
+    def apply(self, delta: WorldDelta):
+        '''
+        Applies a delta to the world. The world must be in the state the delta was recorded from, so
+        changes made since the last record should be recorded or reverted first.
+
+        Args:
+            delta (WorldDelta): The delta to apply.
+
+        Raises:
+            ValueError: If an entity the delta destroys doesn't exist in the world.
+        '''
+        ecs_admin = self.ecs_admin
+        entity_manager = ecs_admin.entity_manager
+
+        destroyed_entities = []
+        for entity_id, generation in delta.destroyed:
+            entity = ecs_admin.entity_map.get(entity_id)
+            if entity is None or entity.generation != generation:
+                raise ValueError(f'Entity {entity_id} of generation {generation} does not exist, the delta doesn\'t apply to this world.')
+            destroyed_entities.append(entity)
+        # links are cut before destroying so only the destroyed entities go, not children that were re-parented
+        for entity_id, before, after in delta.parents:
+            entity = ecs_admin.entity_map.get(entity_id)
+            if entity is not None and before != NO_ENTITY:
+                ecs_admin.remove_parent(entity)
+        ecs_admin.destroy_entities(destroyed_entities)
+
+        # destroying bumped the generations, the delta says which ones actually changed
+        for entity in destroyed_entities:
+            entity_manager.generations[entity.id] = entity.generation
+        for entity_id, before, after in delta.generations:
+            entity_manager.generations[entity_id] = after
+        entity_manager.next_id = delta.next_id[1]
+        n_shared, before, after = delta.free_ids
+        entity_manager.destroyed_entity_ids[n_shared:] = after
+
+        for entity_id, generation in delta.created:
+            ecs_admin._add_entity(Entity(entity_id, generation))
+
+        for entity_id, before, after in delta.parents:
+            if after != NO_ENTITY:
+                ecs_admin.set_parent(ecs_admin.entity_map[entity_id], ecs_admin.entity_map[after])
+
+        for component_type, changes in delta.components.items():
+            for entity_id, old, new in changes:
+                entity = ecs_admin.entity_map.get(entity_id)
+                if entity is None:
+                    continue
+                if new is None:
+                    component = entity.components.get(component_type)
+                    if component is not None:
+                        ecs_admin.remove_component(entity, component)
+                else:
+                    ecs_admin._replace_component(entity, component_type.deserialize(new))
+
+        self._update_state(delta)
+
+    def revert(self, delta: WorldDelta):
+        '''
+        Undoes a delta. The world must be in the state the delta was recorded to, so deltas have to be
+        reverted newest first.
+
+        Args:
+            delta (WorldDelta): The delta to undo.
+        '''
+        self.apply(delta.inverted())
@@ -5,6 +5,29 @@ if TYPE_CHECKING:
     from .component import Component
     T = TypeVar('T', bound=Component)
 
+INDEX_BITS = 32
+INDEX_MASK = (1 << INDEX_BITS) - 1
+MAX_GENERATION = (1 << 32) - 1
+
+def make_handle(index: int, generation: int) -> int:
+    '''
+    Packs an entity index and generation into a single integer handle.
+
+    Args:
+        index (int): The entity's id, used as its index into the sparse sets.
+        generation (int): The generation of the id at the time the entity was created.
+
+    Returns:
+        The packed entity handle.
+    '''
+    return (generation << INDEX_BITS) | index
+
+def get_handle_index(handle: int) -> int:
+    return handle & INDEX_MASK
+
+def get_handle_generation(handle: int) -> int:
+    return handle >> INDEX_BITS
+
 class Entity:
     '''
     Represents an individual entity in the Entity Component System (ECS).
@@ -15,9 +38,12 @@ class Entity:
     functionality and data.
 
     Attributes:
-        next_id (int): Class variable to track the next available entity ID.
-        max_entities (int): Class variable to limit the total number of entities.
-        destroyed_entities_ids (list[int]): Class variable to recycle IDs of destroyed entities.
+        id (int): The entity's index, recycled once the entity is destroyed.
+        generation (int): How many times the id had been recycled when this entity was created.
+        handle (int): The id and generation packed together, used to detect stale references.
+        components (dict[Type[Component], Component]): The components attached to the entity.
+        mask (int): The `component_bit` of every attached component type OR-ed together, so queries can match
+            an entity with a single integer comparison.
 
     Methods:
         create_next_id: Generates the next entity ID, recycling IDs if necessary.
@@ -28,9 +54,15 @@ class Entity:
         reset_attributes: Resets class-level entity tracking attributes.
     '''
 
-    def __init__(self, id: int):
+    def __init__(self, id: int, generation: int = 1):
         self.id: int = id
+        self.generation: int = generation
         self.components: dict[Type[Component], Component] =  {}
+        self.mask: int = 0
+
+    @property
+    def handle(self) -> int:
+        return make_handle(self.id, self.generation)
 
     def _add_component(self, component: Component):
         '''
@@ -39,7 +71,9 @@ class Entity:
         Args:
             component (Component): The component instance to attach.
         '''
-        self.components[type(component)] = component
+        component_type = type(component)
+        self.components[component_type] = component
+        self.mask |= component_type.component_bit
 
     def _remove_component(self, component_type: Type[Component]):
         '''
@@ -49,6 +83,7 @@ class Entity:
             component_type (Type[Component]): The type of component to remove.
         '''
         del self.components[component_type]
+        self.mask &= ~component_type.component_bit
 
     def get_component(self, component_type: Type[T]) -> T | None:
         '''
@@ -1,10 +1,22 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Type, TypeVar
-from .entity import Entity
+from threading import Lock
+import asyncio
+from typing import TYPE_CHECKING, Callable, Type, TypeVar
+from .entity import Entity, get_handle_index
 from .events import EventBus, subscribe_to_events
 from .component_pool import ComponentPool
 from .interfaces import IEcsAdmin
 from .entity_manager import EntityManager
+from .archetype import ArchetypeGraph
+from .query import ComponentFilter, QuerySpec, QueryTerm, Removed, Query, QueryArrays, get_component_mask, get_query_key, query_pool_arrays
+from .command_buffer import CommandBuffer
+from .scheduler import Scheduler
+from .sharding import ShardRunner
+from .snapshot import save_snapshot, load_snapshot
+from .delta import DeltaRecorder
+from .spatial import SpatialIndex
+from .hierarchy import Hierarchy
+from .profiling import Profiler
 
 
 if TYPE_CHECKING:
@@ -29,6 +41,25 @@ class EcsAdmin(IEcsAdmin):
             to their respective ComponentPool instances for efficient management.
         singleton_components (dict[Type[SingletonComponent], SingletonComponent]): A dictionary holding
             instances of singleton components.
+        archetype_storage (bool): Opt-in flag that groups entities with the same component set into
+            archetype tables so intersection queries walk whole tables instead of probing every entity.
+        archetypes (ArchetypeGraph | None): The archetype graph when archetype_storage is enabled, otherwise None.
+        system_workers (int | None): Number of threads used to run the systems of a stage at the same time.
+            None runs every system on the calling thread.
+        component_pool_type (Type[ComponentPool]): The ComponentPool class used for new component pools.
+        shard_workers (int | None): Number of worker processes ShardedSystems split their work across.
+            None runs ShardedSystems in the main process.
+        queries (dict[tuple[Type[Component], ...], Query]): Persistent queries keyed by their sorted component types.
+        command_buffer (CommandBuffer): Deferred structural changes, applied by flush_commands. Every system
+            also records into its own buffer so systems running on different threads never share one.
+        scheduler (Scheduler): Orders the systems that implement `run` into stages for tick.
+        change_tick (int): The current change tick. Components attached, removed or marked as changed are stamped
+            with it, and the scheduler advances it after every stage.
+        entity_log (list[tuple[int, Entity]]): The change tick and entity of every creation, destruction and change
+            of parent that hasn't been cleared yet. Only kept while a delta recorder exists.
+        spatial_indexes (dict[Type[Component], SpatialIndex]): The spatial indexes keyed by their position component type.
+        profiler (Profiler | None): The profiler recording systems, event handlers and frames, None when profiling is off.
+        hierarchy (Hierarchy | None): The parent-child links between entities, None until set_parent is first called.
 
     Methods:
         add_singleton_component: Registers a singleton component with the ECS.
@@ -36,13 +67,43 @@ class EcsAdmin(IEcsAdmin):
         create_component_pool: Creates and registers a new component pool for a specific component type.
         get_component_pool: Retrieves a component pool for a specific component type, if it exists.
         create_entity: Creates a new entity, optionally initializing it with a set of components.
+        create_entities: Creates a batch of entities, updating every component pool in one operation.
+        destroy_entities: Destroys a batch of entities, removing them from every component pool in one operation.
         get_entity: Retrieves an entity by its ID.
+        get_query: Retrieves a persistent, incrementally maintained query for a set of component types.
+        get_entities_filtered: Retrieves the entities matching component types, query terms and change detection filters.
+        mark_changed: Records that an entity's component was modified.
+        increment_change_tick: Advances the change tick.
+        create_delta_recorder: Creates a recorder of per-tick world deltas for rollback and replication.
+        create_spatial_index: Creates a grid index over a position component for neighbour queries.
+        set_parent: Makes an entity the child of another one.
+        remove_parent: Detaches an entity from its parent.
+        get_parent: Retrieves the parent of an entity.
+        get_children: Retrieves the children of an entity, optionally filtered by component types.
+        get_depth_sorted: Retrieves every entity in the hierarchy and its parent, parents first.
+        query_arrays: Retrieves the matching entity ids and aligned gather indices as NumPy arrays.
         attach_component_to_entity: Attaches a component to an entity and registers the entity with the relevant component pool.
+        create_command_buffer: Creates a command buffer that is flushed along with the admin's own buffer.
+        flush_commands: Applies the structural changes recorded in the command buffers.
+        tick: Runs every scheduled system once.
+        flush_events: Delivers the events queued on the event bus.
+        tick_async: Runs every scheduled system once on the running event loop.
+        run_async: Drives fixed time step ticks on the running event loop until stopped.
+        stop: Stops the loop started by run_async.
+        shutdown: Shuts down the worker threads and processes used to run systems.
+        enable_profiling: Starts recording per-system, per-handler and per-frame timings.
+        disable_profiling: Stops recording and removes the instrumentation.
+        save_snapshot: Writes every entity, component pool and singleton component to a binary file.
+        load_snapshot: Replaces the world's state with the contents of a snapshot file.
     '''
     events: list[str] = []
     systems: list[Type[System]] = []
     singleton_components: list[SingletonComponent] = []
     builders: list[Type[Builder]] = []
+    archetype_storage: bool = False
+    system_workers: int | None = None
+    component_pool_type: Type[ComponentPool] = ComponentPool
+    shard_workers: int | None = None
     
     def __init__(self, max_entities: int = 1000):
         '''
@@ -57,15 +118,33 @@ class EcsAdmin(IEcsAdmin):
         self._singleton_components: dict[Type[SingletonComponent], SingletonComponent] = {}
         self._builders: dict[Type[Builder], Builder] = {}
 
+        self.entity_map: dict[int, Entity] = {}
+        self.components: list[Component] = []
+        self.component_pools: dict[Type[Component], ComponentPool] = {}
+        self.archetypes: ArchetypeGraph | None = ArchetypeGraph() if self.archetype_storage else None
+        self.queries: dict[tuple[Type[Component], ...], Query] = {}
+        self._component_queries: dict[Type[Component], list[Query]] = {}
+        self.command_buffer = CommandBuffer(self)
+        self._command_buffers: list[CommandBuffer] = [self.command_buffer]
+        self.scheduler = Scheduler(self, max_workers=self.system_workers)
+        self.shard_runner: ShardRunner | None = ShardRunner(self, self.shard_workers) if self.shard_workers else None
+        self._structure_lock = Lock()
+        self._running = False
+        self.change_tick = 1
+        self.entity_log: list[tuple[int, Entity]] = []
+        self._delta_recorders: list[DeltaRecorder] = []
+        self.spatial_indexes: dict[Type[Component], SpatialIndex] = {}
+        self.profiler: Profiler | None = None
+        self.hierarchy: Hierarchy | None = None
+        self._query_specs: dict[tuple, QuerySpec] = {}
+        self._change_logging = False
+
         self._register_events(self.events)
         self._create_systems(self.systems)
+        self._set_change_logging(bool(self.scheduler.systems))
         self._create_builders(self.builders)
         self._add_singleton_components(self.singleton_components)
 
-        self.entity_map: dict[int, Entity] = {}
-        self.components: list[Component] = []
-        self.component_pools: dict[Type[Component], ComponentPool] = {}
-
         subscribe_to_events(self)
 
     def __repr__(self) -> str:
@@ -102,10 +181,12 @@ class EcsAdmin(IEcsAdmin):
         Returns:
             A new ComponentPool instance for the specified component type.
         '''
-        new_component_pool = ComponentPool(
+        new_component_pool = self.component_pool_type(
             component_type=component_type, 
             entity_capacity=self.max_entities, 
         )
+        if not self._change_logging:
+            new_component_pool.set_change_logging(False)
         self.component_pools[component_type] = new_component_pool
         return new_component_pool
     
@@ -121,7 +202,10 @@ class EcsAdmin(IEcsAdmin):
         '''
         component_pool = self.component_pools.get(component_type)
         if not component_pool:       
-            component_pool = self.create_component_pool(component_type)
+            with self._structure_lock:
+                component_pool = self.component_pools.get(component_type)
+                if not component_pool:
+                    component_pool = self.create_component_pool(component_type)
 
         return component_pool
     
@@ -136,7 +220,7 @@ class EcsAdmin(IEcsAdmin):
             The newly created Entity instance.
         '''
         entity = self.entity_manager.create_entity()
-        self.entity_map[entity.id] = entity
+        self._add_entity(entity)
         
         if components is None:
             components = []
@@ -145,38 +229,435 @@ class EcsAdmin(IEcsAdmin):
             self.attach_component_to_entity(entity, component)
         return entity
 
+    def create_entities(self, count: int, component_factories: list[Callable[[], Component]] | None = None) -> list[Entity]:
+        '''
+        Creates a batch of entities. Their ids are reserved in one go and every component pool is extended
+        once for the whole batch instead of once per entity.
+
+        Args:
+            count (int): The number of entities to create.
+            component_factories (list[Callable[[], Component]], optional): Called once per entity to create each
+                of its components. Component classes are created through their pool so inactive instances are reused.
+
+        Returns:
+            A list of the new Entity instances.
+
+        Raises:
+            ValueError: If fewer than count entity ids are available.
+        '''
+        entities = self.entity_manager.create_entities(count)
+        entity_components: dict[Type[Component], list[Entity]] = {}
+        for component_factory in component_factories or ():
+            if isinstance(component_factory, type):
+                components = self.get_component_pool(component_factory).get_or_create_component_objs(count)
+            else:
+                components = [component_factory() for _ in range(count)]
+            for entity, component in zip(entities, components):
+                component_type = type(component)
+                entity.components[component_type] = component
+                entity.mask |= component_type.component_bit
+            component_types = {type(component) for component in components}
+            for component_type in component_types:
+                if len(component_types) == 1:
+                    entity_components[component_type] = entities
+                else:
+                    entity_components[component_type] = [entity for entity in entities if entity.has_component(component_type)]
+
+        tick = self.change_tick
+        for component_type, component_entities in entity_components.items():
+            self.get_component_pool(component_type).add_entities(component_entities, tick)
+
+        entity_map = self.entity_map
+        for entity in entities:
+            entity_map[entity.id] = entity
+        if self._delta_recorders:
+            self.entity_log.extend([(tick, entity) for entity in entities])
+        if self.archetypes is not None:
+            for entity in entities:
+                self.archetypes.add_entity(entity)
+
+        queries = {
+            id(query): query
+            for component_type in entity_components
+            for query in self._component_queries.get(component_type, ())
+        }
+        # every entity has the same components unless a factory returned mixed types
+        uniform = all(component_entities is entities for component_entities in entity_components.values())
+        for query in queries.values():
+            if not uniform:
+                for entity in entities:
+                    query.on_component_added(entity)
+            elif entities and query.matches(entities[0]):
+                query.add_entities(entities)
+        return entities
+
+    def destroy_entities(self, entities: list[Entity]):
+        '''
+        Destroys a batch of entities, batching the removals from every component pool. The descendants
+        of the entities in the hierarchy are destroyed along with them.
+
+        Args:
+            entities (list[Entity]): The entities to destroy.
+
+        Raises:
+            KeyError: If an entity has already been destroyed. No entity is destroyed in that case.
+        '''
+        entity_manager = self.entity_manager
+        entities = list({entity.id: entity for entity in entities}.values())
+        for entity in entities:
+            if not entity_manager.is_alive(entity):
+                raise KeyError(f'{entity} has already been destroyed.')
+        if self.hierarchy is not None:
+            entity_ids = self.hierarchy.get_subtree_ids(entities)
+            if len(entity_ids) != len(entities):
+                entities = [self.entity_map[entity_id] for entity_id in entity_ids]
+            self.hierarchy.remove_entities(entity_ids)
+
+        entities_by_type: dict[Type[Component], list[Entity]] = {}
+        for entity in entities:
+            for component_type in entity.components:
+                entities_by_type.setdefault(component_type, []).append(entity)
+
+        tick = self.change_tick
+        for component_type, component_entities in entities_by_type.items():
+            self.component_pools[component_type].remove_entities(component_entities, tick)
+            for query in self._component_queries.get(component_type, ()):
+                query.remove_entities(component_entities)
+
+        entity_map = self.entity_map
+        for entity in entities:
+            if self.archetypes is not None:
+                self.archetypes.remove_entity(entity)
+            del entity_map[entity.id]
+        if self._delta_recorders:
+            self.entity_log.extend([(tick, entity) for entity in entities])
+        entity_manager.add_destroyed_entity_ids([entity.id for entity in entities])
+
+    def _add_entity(self, entity: Entity):
+        self.entity_map[entity.id] = entity
+        if self._delta_recorders:
+            self.entity_log.append((self.change_tick, entity))
+        if self.archetypes is not None:
+            self.archetypes.add_entity(entity)
+
     def get_entity(self, entity_id: int) -> Entity:
         '''
-        Retrieves an entity by its ID.
+        Retrieves an entity by its ID or generational handle.
 
         Args:
-            entity_id (int): The ID of the entity to retrieve.
+            entity_id (int): The ID or the handle of the entity to retrieve. Handles are checked
+                against the id's current generation, so a handle to a destroyed entity is never
+                resolved to the entity that later reused its id.
 
         Returns:
             The Entity instance with the specified ID.
+
+        Raises:
+            KeyError: If no entity exists with the ID or the handle is stale.
         '''
-        return self.entity_map[entity_id]
+        if not self.entity_manager.is_alive(entity_id):
+            raise KeyError(f'{entity_id} is a stale entity handle.')
+        if isinstance(entity_id, Entity):
+            return self.entity_map[entity_id.id]
+        return self.entity_map[get_handle_index(entity_id)]
     
     def get_entities_intersect(self, component_types: list[Type[Component]]) -> list[Entity]:
+        if self.archetypes is not None:
+            if not component_types:
+                return []
+            return self.archetypes.get_entities_intersect(component_types)
+
         component_pools = self._get_component_pools(component_types)
-        entities: list[Entity] = []
+        if not component_pools:
+            return []
+        mask = get_component_mask(component_types)
+        return [entity for entity in component_pools[0].entities if entity.mask & mask == mask]
+    
+    def get_query(self, component_types: list[Type[Component]]) -> Query:
+        '''
+        Retrieves the persistent query for a set of component types, creating it on first use.
+        The query is kept up to date as components are attached and removed and entities are destroyed.
 
-        if component_pools:
-            main_pool = component_pools.pop()
+        Args:
+            component_types (list[Type[Component]]): The component types an entity must have to match.
 
-            for entity in main_pool.entities:
-                add_entity = True
+        Returns:
+            The Query instance for the component types.
+        '''
+        query_key = get_query_key(component_types)
+        query = self.queries.get(query_key)
+        if query is None:
+            for component_type in query_key:
+                self.get_component_pool(component_type)
+            with self._structure_lock:
+                query = self.queries.get(query_key)
+                if query is None:
+                    query = Query(query_key, self.get_entities_intersect(list(query_key)))
+                    self.queries[query_key] = query
+                    for component_type in query_key:
+                        self._component_queries.setdefault(component_type, []).append(query)
+        return query
+
+    def get_entities_filtered(self, terms: list[Type[Component] | ComponentFilter | QueryTerm], tick: int = 0) -> list:
+        '''
+        Retrieves the entities that have every listed component type, satisfy every structural term such as
+        `AnyOf[Player, Enemy]` or `NoneOf[Frozen]`, and pass every change detection filter, such as
+        `Changed[Position]` or `Added[Health]`, relative to a change tick.
 
-                for remaining_component_pool in component_pools:
-                    if not entity.has_component(remaining_component_pool.component_type):
-                        add_entity = False
-                        break
+        Only the entities a filter's pool reports as changed are visited, so the cost depends on the
+        number of changes rather than the number of entities. Without filters the smallest pool of the
+        required component types is visited, and every candidate is checked against the terms with a
+        single comparison of its component mask. Entities matched through `Removed` may have been destroyed;
+        they are only returned alongside structural terms if they are still alive.
 
-                if add_entity:
-                    entities.append(entity)
+        Args:
+            terms (list[Type[Component] | ComponentFilter | QueryTerm]): Component types, filters and terms an
+                entity must match.
+            tick (int): The change tick to compare against, usually the tick of a system's last run.
 
+        Returns:
+            A list of the matching Entity instances. When the terms include `OptionalOf` every match is instead
+            a tuple of the entity followed by its component of each optional type, or None if it doesn't have one.
+        '''
+        query_key = tuple(terms)
+        spec = self._query_specs.get(query_key)
+        if spec is None:
+            spec = self._query_specs[query_key] = QuerySpec(query_key)
+        if spec.is_plain():
+            return self.get_entities_intersect(spec.all_types)
+
+        filters = spec.filters
+        if filters:
+            # removals are usually rare and can't be checked in O(1), so they drive the iteration when present
+            filters = sorted(filters, key=lambda component_filter: not isinstance(component_filter, Removed))
+            pools = [self.get_component_pool(component_filter.component_type) for component_filter in filters]
+            is_alive = self.entity_manager.is_alive
+            check_alive = bool(spec.all_mask or spec.any_masks or spec.none_mask)
+            entities = [
+                entity for entity in filters[0].get_candidates(pools[0], tick)
+                if spec.matches(entity.mask) and not (check_alive and not is_alive(entity))
+                and all(component_filter.matches(pool, entity, tick) for component_filter, pool in zip(filters[1:], pools[1:]))
+            ]
+        else:
+            if spec.all_types:
+                candidates = self.get_entities_intersect(spec.all_types)
+            elif spec.any_types:
+                component_pools = self._get_component_pools(list(min(spec.any_types, key=len)))
+                candidates = {entity.id: entity for pool in component_pools for entity in pool.entities}.values()
+            else:
+                candidates = self.entity_map.values()
+            matches = spec.matches
+            entities = [entity for entity in candidates if matches(entity.mask)]
+
+        if spec.optional_types:
+            optional_types = spec.optional_types
+            return [
+                (entity, *[entity.components.get(component_type) for component_type in optional_types])
+                for entity in entities
+            ]
         return entities
-    
+
+    def mark_changed(self, entity: Entity, component_type: Type[Component]):
+        '''
+        Records that an entity's component was modified so `Changed` filters pick it up.
+
+        Args:
+            entity (Entity): The entity whose component changed.
+            component_type (Type[Component]): The type of the component that changed.
+        '''
+        self.get_component_pool(component_type).mark_changed(entity, self.change_tick)
+
+    def increment_change_tick(self) -> int:
+        '''
+        Advances the change tick. Changes made afterwards are newer than anything stamped before.
+        The change logs are trimmed to what the change readers haven't seen yet.
+
+        Returns:
+            The new change tick.
+        '''
+        self.change_tick += 1
+        if self._change_logging:
+            self.clear_removed(min((reader.last_run_tick for reader in self.get_change_readers()), default=self.change_tick))
+        return self.change_tick
+
+    def _set_change_logging(self, enabled: bool):
+        '''
+        Turns the pools' removal and change logs on or off. They are only kept while something reads them,
+        so worlds without scheduled systems, delta recorders or spatial indexes don't accumulate them.
+        '''
+        self._change_logging = enabled
+        for component_pool in self.component_pools.values():
+            component_pool.set_change_logging(enabled, self.change_tick)
+
+    def clear_removed(self, tick: int):
+        '''
+        Forgets the component removals and changes recorded at or before a change tick in every pool, along
+        with the entity creations and destructions in the entity log.
+
+        Args:
+            tick (int): The latest change tick to forget.
+        '''
+        for component_pool in self.component_pools.values():
+            if component_pool.removed or component_pool.changes:
+                component_pool.clear_removed(tick)
+        n_cleared = 0
+        for logged_tick, entity in self.entity_log:
+            if logged_tick > tick:
+                break
+            n_cleared += 1
+        if n_cleared:
+            del self.entity_log[:n_cleared]
+
+    def get_change_readers(self) -> list[System | DeltaRecorder | SpatialIndex]:
+        '''
+        Retrieves everything that reads changes relative to its own `last_run_tick`: the scheduled systems,
+        the delta recorders and the spatial indexes. Change logs are only kept while there is one and are
+        cleared once all of them have seen the changes.
+        '''
+        return [*self.scheduler.systems, *self._delta_recorders, *self.spatial_indexes.values()]
+
+    def create_delta_recorder(self, component_types: list[Type[Component]] | None = None) -> DeltaRecorder:
+        '''
+        Creates a recorder that captures the world's changes since its previous call as compact deltas
+        which can be applied forwards or backwards.
+
+        Args:
+            component_types (list[Type[Component]], optional): The component types to track, defaults to every
+                component type. Tracked components must implement serialize and deserialize.
+
+        Returns:
+            A new DeltaRecorder bound to this admin.
+        '''
+        self._set_change_logging(True)
+        delta_recorder = DeltaRecorder(self, component_types)
+        self._delta_recorders.append(delta_recorder)
+        return delta_recorder
+
+    def create_spatial_index(self, component_type: Type[Component], cell_size: float, fields: tuple[str, ...] = ('x', 'y')) -> SpatialIndex:
+        '''
+        Creates a uniform grid index over the positions stored in a component type, answering radius, box and
+        nearest neighbour queries and broad-phase collision pairs. The scheduler updates it after every stage.
+
+        Args:
+            component_type (Type[Component]): The component type holding the positions.
+            cell_size (float): The edge length of a grid cell, ideally close to the typical query radius.
+            fields (tuple[str, ...]): The component attributes holding each coordinate.
+
+        Returns:
+            The new SpatialIndex, also available through `spatial_indexes[component_type]`.
+
+        Raises:
+            ValueError: If the component type already has a spatial index.
+        '''
+        if component_type in self.spatial_indexes:
+            raise ValueError(f'{component_type.__name__} already has a spatial index.')
+        self._set_change_logging(True)
+        spatial_index = SpatialIndex(self, component_type, cell_size, fields)
+        self.spatial_indexes[component_type] = spatial_index
+        return spatial_index
+
+    def set_parent(self, child: Entity, parent: Entity):
+        '''
+        Makes an entity the child of another one, detaching it from its previous parent first. Destroying the
+        parent destroys the child as well.
+
+        Args:
+            child (Entity): The entity to attach.
+            parent (Entity): Its new parent.
+
+        Raises:
+            KeyError: If either entity has been destroyed.
+            ValueError: If the parent is the child itself or one of its descendants.
+        '''
+        if self.hierarchy is None:
+            self.hierarchy = Hierarchy(self)
+        self.hierarchy.set_parent(child, parent)
+        if self._delta_recorders:
+            self.entity_log.append((self.change_tick, child))
+
+    def remove_parent(self, child: Entity):
+        '''
+        Detaches an entity from its parent, keeping its own children attached to it.
+        '''
+        if self.hierarchy is not None:
+            self.hierarchy.remove_parent(child)
+            if self._delta_recorders:
+                self.entity_log.append((self.change_tick, child))
+
+    def get_parent(self, entity: Entity) -> Entity | None:
+        '''
+        Retrieves the parent of an entity, None if it doesn't have one.
+        '''
+        if self.hierarchy is None:
+            return None
+        return self.hierarchy.get_parent(entity)
+
+    def get_children(self, entity: Entity, component_types: list[Type[Component]] | None = None) -> list[Entity]:
+        '''
+        Retrieves the children of an entity by walking its child list, so the cost depends on its number
+        of children rather than on the number of entities.
+
+        Args:
+            entity (Entity): The parent.
+            component_types (list[Type[Component]], optional): Only keeps the children that have every one of
+                these component types.
+
+        Returns:
+            A list of the children, most recently attached first.
+        '''
+        if self.hierarchy is None:
+            return []
+        return self.hierarchy.get_children(entity, component_types or ())
+
+    def get_depth_sorted(self, component_types: list[Type[Component]] | None = None) -> list[tuple[Entity, Entity | None]]:
+        '''
+        Retrieves every entity that has a parent or children together with its parent, sorted by depth, so
+        transforms can be propagated from the roots down in a single pass.
+
+        Args:
+            component_types (list[Type[Component]], optional): Only keeps the entities that have every one of
+                these component types.
+
+        Returns:
+            A list of (Entity, parent Entity) tuples, the parent being None for the roots.
+        '''
+        if self.hierarchy is None:
+            return []
+        return self.hierarchy.get_depth_sorted(component_types or ())
+
+    def _replace_component(self, entity: Entity, component: Component):
+        '''
+        Attaches a component, replacing the entity's component of the same type in place so the
+        entity keeps its row in the pool.
+        '''
+        component_type = type(component)
+        old_component = entity.components.get(component_type)
+        if old_component is None:
+            self.attach_component_to_entity(entity, component)
+            return
+
+        component_pool = self.component_pools[component_type]
+        if component_pool.columns is not None and old_component._pool is component_pool:
+            old_component._unbind()
+        entity._add_component(component)
+        component_pool._release_component(old_component)
+        component_pool.add_entity(entity, self.change_tick)
+
+    def query_arrays(self, component_types: list[Type[Component]]) -> QueryArrays:
+        '''
+        Retrieves every entity that has all of the given component types as NumPy arrays instead of
+        Entity objects. The intersection is done with NumPy set operations over the pools' dense
+        entity ids. Requires numpy to be installed.
+
+        Args:
+            component_types (list[Type[Component]]): The component types an entity must have to match.
+
+        Returns:
+            A QueryArrays with the matching entity ids and, for each component type, a gather index
+            into its pool's dense rows. Its scatter marks the written rows as changed at the current tick.
+        '''
+        return query_pool_arrays(self._get_component_pools(component_types), self.change_tick)
+
     def get_entities_union(self, component_types: list[Type[Component]]) -> list[Entity]:
         component_pools = self._get_component_pools(component_types)
         entities: set[Entity] = set()
@@ -205,22 +686,44 @@ class EcsAdmin(IEcsAdmin):
         
     def remove_component(self, entity: Entity, component: Component):
         component_pool = self.component_pools[type(component)]
+        component_pool.remove_entity(entity, self.change_tick)
         entity._remove_component(type(component))
-        component_pool.remove_entity(entity)
+        if self.archetypes is not None:
+            self.archetypes.on_component_removed(entity, type(component))
+        for query in self._component_queries.get(type(component), ()):
+            query.on_component_removed(entity)
 
     def destroy_entity(self, entity: Entity):
         '''
-        Destroys an entity and removes it from all component pools.
+        Destroys an entity and removes it from all component pools. Its descendants in the hierarchy are
+        destroyed along with it.
 
         Args:
             entity (Entity): An entity instance
+
+        Raises:
+            KeyError: If the entity has already been destroyed.
         '''
+        if not self.entity_manager.is_alive(entity):
+            raise KeyError(f'{entity} has already been destroyed.')
+        if self.hierarchy is not None:
+            if self.hierarchy.has_children(entity):
+                self.destroy_entities([entity])
+                return
+            self.hierarchy.remove_entities((entity.id,))
+
         for component_type in entity.components.keys():
             component_pool = self.component_pools[component_type]
-            component_pool.remove_entity(entity)
+            component_pool.remove_entity(entity, self.change_tick)
+            for query in self._component_queries.get(component_type, ()):
+                query.remove_entity(entity)
+        if self.archetypes is not None:
+            self.archetypes.remove_entity(entity)
 
         entity_id = entity.id
         del self.entity_map[entity_id]
+        if self._delta_recorders:
+            self.entity_log.append((self.change_tick, entity))
         self.entity_manager.add_destoryed_entity_id(entity_id)
 
     def attach_component_to_entity(self, entity: Entity, component: Component):
@@ -235,9 +738,217 @@ class EcsAdmin(IEcsAdmin):
         component_pool = self.get_component_pool(type(component))
         if component_pool is None:
             component_pool = self.create_component_pool(type(component))
-        component_pool.add_entity(entity)
+        component_pool.add_entity(entity, self.change_tick)
+        if self.archetypes is not None:
+            self.archetypes.on_component_added(entity, type(component))
+        for query in self._component_queries.get(type(component), ()):
+            query.on_component_added(entity)
+
+
+
+    def _attach_components(self, component_type: Type[Component], entity_components: list[tuple[Entity, Component]]):
+        '''
+        Attaches a batch of components of the same type, updating the component pool in one operation.
+        Like `attach_component_to_entity`, a component replaces the entity's current one of the same type,
+        so when an entity appears more than once only its last component is kept.
 
+        Args:
+            component_type (Type[Component]): The type of every component in the batch.
+            entity_components (list[tuple[Entity, Component]]): The entities and the component to attach to each.
+        '''
+        component_pool = self.get_component_pool(component_type)
+        last_components: dict[int, tuple[Entity, Component]] = {}
+        for entity, component in entity_components:
+            replaced = last_components.get(entity.id)
+            if replaced is not None and replaced[1] is not component:
+                component_pool._release_component(replaced[1])
+            last_components[entity.id] = (entity, component)
+
+        entities: list[Entity] = []
+        for entity, component in last_components.values():
+            old_component = entity.components.get(component_type)
+            if old_component is not None and old_component is not component:
+                if component_pool.columns is not None and old_component._pool is component_pool:
+                    old_component._unbind()
+                component_pool._release_component(old_component)
+            entity._add_component(component)
+            entities.append(entity)
+        component_pool.add_entities(entities, self.change_tick)
+
+        queries = self._component_queries.get(component_type, ())
+        for entity in entities:
+            if self.archetypes is not None:
+                self.archetypes.on_component_added(entity, component_type)
+            for query in queries:
+                query.on_component_added(entity)
+
+    def _remove_components(self, component_type: Type[Component], entities: list[Entity]):
+        '''
+        Removes the component of a type from a batch of entities.
 
+        Args:
+            component_type (Type[Component]): The type of the component to remove.
+            entities (list[Entity]): The entities to remove the component from.
+        '''
+        component_pool = self.component_pools[component_type]
+        queries = self._component_queries.get(component_type, ())
+        for entity in entities:
+            component_pool.remove_entity(entity, self.change_tick)
+            entity._remove_component(component_type)
+            if self.archetypes is not None:
+                self.archetypes.on_component_removed(entity, component_type)
+            for query in queries:
+                query.on_component_removed(entity)
+
+    def create_command_buffer(self) -> CommandBuffer:
+        '''
+        Creates a command buffer that is flushed by flush_commands, after every buffer created before it.
+
+        Returns:
+            A new CommandBuffer bound to this admin.
+        '''
+        command_buffer = CommandBuffer(self)
+        self._command_buffers.append(command_buffer)
+        return command_buffer
+
+    def flush_commands(self):
+        '''
+        Applies every structural change recorded in the command buffers, starting with the admin's own
+        buffer followed by the systems' buffers in the order the systems were created, so the result
+        doesn't depend on which thread recorded first. Call this at a sync point where no system is
+        iterating over a query.
+        '''
+        for command_buffer in self._command_buffers:
+            if not command_buffer.is_empty():
+                command_buffer.flush()
+
+    def tick(self, dt: float):
+        '''
+        Runs every scheduled system once, stage by stage, flushing the command buffer after each stage.
+        Events queued during the frame are delivered at the end of the tick.
+
+        Args:
+            dt (float): The time step of the frame.
+        '''
+        self.scheduler.run(dt)
+        self.flush_events()
+
+    def flush_events(self):
+        '''
+        Delivers every event queued on the event bus, then applies any structural changes the handlers recorded.
+        '''
+        self.event_bus.flush()
+        self.flush_commands()
+
+    async def tick_async(self, dt: float):
+        '''
+        Runs every scheduled system once like `tick`, awaiting systems whose `run` is asynchronous.
+
+        Args:
+            dt (float): The time step of the frame.
+        '''
+        await self.scheduler.run_async(dt)
+        self.flush_events()
+
+    async def run_async(self, tick_rate: float, max_ticks: int | None = None):
+        '''
+        Drives fixed time step ticks on the running asyncio event loop until `stop` is called, so socket
+        reads and simulation ticks can share one loop. Between ticks the loop sleeps until the next tick is
+        due. When a tick runs late the schedule restarts from the current time instead of trying to catch up.
+
+        Args:
+            tick_rate (float): The number of ticks per second.
+            max_ticks (int, optional): Stops after this many ticks.
+        '''
+        loop = asyncio.get_running_loop()
+        dt = 1 / tick_rate
+        next_tick_time = loop.time()
+        n_ticks = 0
+        self._running = True
+
+        while self._running and (max_ticks is None or n_ticks < max_ticks):
+            await self.tick_async(dt)
+            n_ticks += 1
+
+            next_tick_time += dt
+            delay = next_tick_time - loop.time()
+            if delay < 0:
+                next_tick_time = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+        self._running = False
+
+    def stop(self):
+        '''
+        Stops the loop started by `run_async` after the current tick.
+        '''
+        self._running = False
+
+    def shutdown(self):
+        '''
+        Shuts down the worker threads and processes used to run systems. They are started again when needed.
+        '''
+        self.scheduler.shutdown()
+        if self.shard_runner is not None:
+            self.shard_runner.shutdown()
+
+    def enable_profiling(self, window: int = 1000, max_trace_events: int = 100_000) -> Profiler:
+        '''
+        Starts recording the wall time, call count, entities iterated and allocations of every scheduled
+        system, event handler and tick. The systems, handlers and tick methods are wrapped while profiling
+        is on and restored by `disable_profiling`, so nothing is measured or paid for otherwise.
+
+        Args:
+            window (int): The number of recent calls per system or handler kept for the p50 and p99.
+            max_trace_events (int): The number of recent calls kept for `Profiler.export_chrome_trace`.
+
+        Returns:
+            The Profiler holding the recordings, also available as `profiler`.
+        '''
+        if self.profiler is not None:
+            self.disable_profiling()
+        profiler = Profiler(window, max_trace_events)
+        self.profiler = profiler
+        for system in self.scheduler.systems:
+            profiler.instrument_system(system)
+        self.event_bus.set_profiler(profiler)
+        self.tick = profiler.instrument(self.tick, 'frame', 'tick')
+        self.tick_async = profiler.instrument(self.tick_async, 'frame', 'tick')
+        return profiler
+
+    def disable_profiling(self):
+        '''
+        Stops recording and removes the wrappers added by `enable_profiling`. The Profiler keeps its recordings.
+        '''
+        if self.profiler is None:
+            return
+        for system in self.scheduler.systems:
+            Profiler.uninstrument_system(system)
+        self.event_bus.set_profiler(None)
+        del self.tick, self.tick_async
+        self.profiler = None
+
+    def save_snapshot(self, path: str):
+        '''
+        Writes every entity, component pool, singleton component and parent link to a compact binary file,
+        grouped by component type. Components are stored through their `serialize` method, except for
+        ColumnarComponents whose columns are written as raw arrays.
+
+        Args:
+            path (str): The file to write.
+        '''
+        save_snapshot(self, path)
+
+    def load_snapshot(self, path: str, use_mmap: bool = True):
+        '''
+        Replaces the world's entities, component pools, singleton components and hierarchy with the contents
+        of a snapshot written by save_snapshot. Systems, queries and builders are kept and see the restored entities.
+
+        Args:
+            path (str): The snapshot file.
+            use_mmap (bool): Memory-maps the file instead of reading it into memory.
+        '''
+        load_snapshot(self, path, use_mmap)
 
     def get_builder(self, builder_type: Type[B]) -> B:
         '''
@@ -284,6 +995,8 @@ class EcsAdmin(IEcsAdmin):
         for System in systems:
             system_obj = System(self, self.event_bus)
             self._systems.append(system_obj)
+            if system_obj.is_scheduled():
+                self.scheduler.add_system(system_obj)
 
     def _add_singleton_components(self, singleton_components: list[SingletonComponent]):
         for s_component in singleton_components:
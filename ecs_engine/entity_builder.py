@@ -1,20 +1,151 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Type
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Type
+from .component import SingletonComponent
 
 if TYPE_CHECKING:
     from .entity_admin import EcsAdmin
     from .component import Component
+    from .component_pool import ComponentPool
     from .entity import Entity
 
+class Prefab:
+    '''
+    A reusable entity template compiled from a list of template components.
+
+    The component pools are looked up once when the prefab is compiled. Instantiating the prefab
+    clones every template through its pool, copying the template's attributes instead of running
+    `__init__`, and ColumnarComponents are filled into their columns when they are attached.
+    Clones are shallow, so templates should only hold immutable values or values that are safe to share.
+
+    Attributes:
+        templates (tuple[Component, ...]): The template components, one per component type.
+        pools (tuple[ComponentPool, ...]): The pool of every template, aligned with templates.
+
+    Methods:
+        create_components: Clones the templates into a new set of components.
+        get_factories: Retrieves one factory per template for EcsAdmin.create_entities.
+    '''
+    def __init__(self, ecs_admin: EcsAdmin, templates: list[Component]) -> None:
+        for template in templates:
+            if isinstance(template, SingletonComponent):
+                raise TypeError(f'{template.__class__.__name__} is a SingletonComponent and can\'t be part of a prefab.')
+        self.templates: tuple[Component, ...] = tuple(templates)
+        self.pools: tuple[ComponentPool, ...] = tuple(ecs_admin.get_component_pool(type(template)) for template in templates)
+
+    def create_components(self, overrides: dict[Type[Component], dict[str, Any]] | None = None) -> list[Component]:
+        '''
+        Clones the templates into a new set of components.
+
+        Args:
+            overrides (dict[Type[Component], dict[str, Any]], optional): Attribute values to set on the
+                clones of specific component types.
+
+        Returns:
+            A list of the new components.
+        '''
+        components = [pool.clone_component_obj(template) for pool, template in zip(self.pools, self.templates)]
+        if overrides:
+            for component in components:
+                for name, value in overrides.get(type(component), {}).items():
+                    setattr(component, name, value)
+        return components
+
+    def get_factories(self, overrides: dict[Type[Component], dict[str, Any]] | None = None) -> list[Callable[[], Component]]:
+        '''
+        Retrieves one factory per template that clones it, for EcsAdmin.create_entities.
+
+        Args:
+            overrides (dict[Type[Component], dict[str, Any]], optional): Attribute values to set on the
+                clones of specific component types.
+
+        Returns:
+            A list of factories, aligned with templates.
+        '''
+        return [self._get_factory(pool, template, (overrides or {}).get(type(template))) for pool, template in zip(self.pools, self.templates)]
+
+    @staticmethod
+    def _get_factory(pool: ComponentPool, template: Component, overrides: dict[str, Any] | None) -> Callable[[], Component]:
+        if not overrides:
+            return lambda: pool.clone_component_obj(template)
+
+        def create_component() -> Component:
+            component = pool.clone_component_obj(template)
+            for name, value in overrides.items():
+                setattr(component, name, value)
+            return component
+        return create_component
+
 class Builder(ABC):
+    '''
+    Creates entities for an EcsAdmin. Subclasses add their own build methods and can declare prefabs.
+
+    Attributes:
+        prefabs (dict[Hashable, list[Component]]): Template components of every prefab, keyed by the prefab's name.
+            They are compiled into Prefab instances when the builder is created.
+        ecs_admin (EcsAdmin): The admin the entities are created in.
+
+    Methods:
+        build_entity: Creates an entity with a list of components.
+        build_entities: Creates a batch of entities from component factories.
+        create_component: Retrieves a component from its pool.
+        get_prefab: Retrieves a compiled prefab.
+        instantiate: Creates an entity from a prefab.
+        instantiate_many: Creates a batch of entities from a prefab.
+    '''
+    prefabs: dict[Hashable, list[Component]] = {}
+
     def __init__(self, ecs_admin: EcsAdmin) -> None:
         self.ecs_admin = ecs_admin
+        self._prefabs: dict[Hashable, Prefab] = {
+            name: Prefab(ecs_admin, templates) for name, templates in self.prefabs.items()
+        }
 
     def build_entity(self, components: list[Component]) -> Entity:
         return self.ecs_admin.create_entity(components)
 
+    def build_entities(self, count: int, component_factories: list[Callable[[], Component]]) -> list[Entity]:
+        return self.ecs_admin.create_entities(count, component_factories)
+
     def create_component(self, component_type: Type[Component], *args, **kwargs) -> Component:
         component_pool = self.ecs_admin.get_component_pool(component_type)
         component = component_pool.get_or_create_component_obj(*args, **kwargs)
-        return component
\ No newline at end of file
+        return component
+
+    def get_prefab(self, name: Hashable) -> Prefab:
+        return self._prefabs[name]
+
+    def instantiate(self, name: Hashable, overrides: dict[Type[Component], dict[str, Any]] | None = None) -> Entity:
+        '''
+        Creates an entity from a prefab.
+
+        Args:
+            name (Hashable): The name of the prefab.
+            overrides (dict[Type[Component], dict[str, Any]], optional): Attribute values that replace the
+                template's values for specific component types, e.g. `{PositionComponent: {'x': 10}}`.
+
+        Returns:
+            The new Entity instance.
+
+        Raises:
+            KeyError: If no prefab has that name.
+        '''
+        return self.ecs_admin.create_entity(self._prefabs[name].create_components(overrides))
+
+    def instantiate_many(self, name: Hashable, count: int, overrides: dict[Type[Component], dict[str, Any]] | None = None) -> list[Entity]:
+        '''
+        Creates a batch of entities from a prefab through EcsAdmin.create_entities.
+
+        Args:
+            name (Hashable): The name of the prefab.
+            count (int): The number of entities to create.
+            overrides (dict[Type[Component], dict[str, Any]], optional): Attribute values shared by every new
+                entity that replace the template's values for specific component types.
+
+        Returns:
+            A list of the new Entity instances.
+
+        Raises:
+            KeyError: If no prefab has that name.
+        '''
+        return self.ecs_admin.create_entities(count, self._prefabs[name].get_factories(overrides))
@@ -1,23 +1,121 @@
+from __future__ import annotations
+from array import array
+from threading import Lock
 from typing import TYPE_CHECKING
-from .entity import Entity
+from .entity import Entity, MAX_GENERATION, get_handle_index, get_handle_generation
 
 if TYPE_CHECKING:
     from .component import Component
 
 class EntityManager:
+    '''
+    Hands out entity ids and tracks the generation of every id so stale references can be detected.
+
+    Attributes:
+        next_id (int): The next id that has never been used.
+        max_entities (int): The maximum number of entities that can exist at once.
+        destroyed_entity_ids (list[int]): Ids of destroyed entities that are available for reuse.
+        generations (array[int]): The current generation of every id, bumped each time the id is destroyed.
+    '''
     def __init__(self, max_entities: int) -> None:
         self.next_id = 0
         self.max_entities = max_entities
         self.destroyed_entity_ids = []
+        self.generations = array('I', [1]) * max_entities
+        self._lock = Lock()
 
     def create_entity(self) -> Entity:
-        entity = Entity(self.next_id)
-        self.move_to_next_id()
-        return entity        
-    
+        entity_id = self.reserve_id()
+        return Entity(entity_id, self.generations[entity_id])
+
+    def reserve_id(self) -> int:
+        '''
+        Reserves an id for a new entity. Unused ids are handed out first, after that the ids of
+        destroyed entities are recycled. Safe to call from systems running on worker threads.
+
+        Returns:
+            The reserved entity id.
+
+        Raises:
+            ValueError: If every id is in use.
+        '''
+        with self._lock:
+            if self.next_id < self.max_entities:
+                entity_id = self.next_id
+                self.move_to_next_id()
+                return entity_id
+            if not self.destroyed_entity_ids:
+                raise ValueError("No available IDs: 'destroyed_entities_ids' is empty.")
+            return self.destroyed_entity_ids.pop()
+
+    def create_entities(self, count: int) -> list[Entity]:
+        generations = self.generations
+        return [Entity(entity_id, generations[entity_id]) for entity_id in self.reserve_ids(count)]
+
+    def reserve_ids(self, count: int) -> list[int]:
+        '''
+        Reserves ids for a batch of new entities under a single lock. Unused ids are handed out first
+        as one contiguous range, after that the ids of destroyed entities are recycled.
+
+        Args:
+            count (int): The number of ids to reserve.
+
+        Returns:
+            A list of the reserved entity ids.
+
+        Raises:
+            ValueError: If fewer than count ids are available. No id is reserved in that case.
+        '''
+        with self._lock:
+            n_fresh = min(count, self.max_entities - self.next_id)
+            n_recycled = count - n_fresh
+            if n_recycled > len(self.destroyed_entity_ids):
+                raise ValueError(f'No available IDs: {count} ids were requested but only {n_fresh + len(self.destroyed_entity_ids)} are free.')
+
+            entity_ids = list(range(self.next_id, self.next_id + n_fresh))
+            self.next_id += n_fresh
+            if n_recycled:
+                entity_ids.extend(reversed(self.destroyed_entity_ids[-n_recycled:]))
+                del self.destroyed_entity_ids[-n_recycled:]
+            return entity_ids
+
     def add_destoryed_entity_id(self, id: int):
+        generation = self.generations[id]
+        self.generations[id] = generation + 1 if generation < MAX_GENERATION else 1
         self.destroyed_entity_ids.append(id)
 
+    def add_destroyed_entity_ids(self, ids: list[int]):
+        '''
+        Bumps the generation of a batch of destroyed ids and makes them available for reuse.
+
+        Args:
+            ids (list[int]): The ids of the destroyed entities.
+        '''
+        generations = self.generations
+        for id in ids:
+            generation = generations[id]
+            generations[id] = generation + 1 if generation < MAX_GENERATION else 1
+        self.destroyed_entity_ids.extend(ids)
+
+    def is_alive(self, entity: Entity | int) -> bool:
+        '''
+        Checks in O(1) whether an entity or handle still refers to the current occupant of its id.
+        Plain ids without a generation can't be checked and are only validated against max_entities.
+
+        Args:
+            entity (Entity | int): An Entity instance or a packed entity handle.
+
+        Returns:
+            True if the reference is not stale, False otherwise.
+        '''
+        if isinstance(entity, Entity):
+            index, generation = entity.id, entity.generation
+        else:
+            index, generation = get_handle_index(entity), get_handle_generation(entity)
+            if generation == 0:
+                return 0 <= index < self.max_entities
+        return 0 <= index < self.max_entities and self.generations[index] == generation
+
     def move_to_next_id(self):
         '''
         Updates `next_id` for the next entity creation. Recycles old IDs from `destroyed_entities_ids`
@@ -1,12 +1,21 @@
-from typing import Callable
+from __future__ import annotations
+from inspect import iscoroutinefunction
+from typing import TYPE_CHECKING, Any, Callable, Hashable
+import asyncio
 from .interfaces import IEventBus
 
-def subscribe_to_event(event_name):
+if TYPE_CHECKING:
+    from .profiling import Profiler
+
+def subscribe_to_event(event_name, priority: int = 0, batched: bool = False):
     '''
     Decorator to mark a System method for subscription to a specific event.
     
     Args:
-        event_name (str): The name of the event to subscribe to.
+        event_name (str | type): The name or payload type of the event to subscribe to.
+        priority (int): Handlers with a higher priority are called first. Defaults to 0.
+        batched (bool): Subscribes the method to queued events instead, called once per flush with the
+            list of every payload queued since the last flush. Defaults to False.
         
     Returns:
         The decorated function with an added '_event_subscriptions' attribute.
@@ -14,7 +23,9 @@ def subscribe_to_event(event_name):
     def decorator(func):
         if not hasattr(func, '_event_subscriptions'):
             func._event_subscriptions = []
+            func._event_options = {}
         func._event_subscriptions.append(event_name)
+        func._event_options[event_name] = (priority, batched)
         return func
     return decorator
 
@@ -25,8 +36,14 @@ def subscribe_to_events(cls):
     for attr_name in dir(cls):
         attr = getattr(cls, attr_name)
         if callable(attr) and hasattr(attr, '_event_subscriptions'):
+            options = getattr(attr, '_event_options', {})
             for event_name in attr._event_subscriptions:
-                cls.event_bus.subscribe(event_name, getattr(cls, attr_name))
+                priority, batched = options.get(event_name, (0, False))
+                if batched:
+                    cls.event_bus.subscribe_batch(event_name, getattr(cls, attr_name), priority=priority)
+                else:
+                    cls.event_bus.subscribe(event_name, getattr(cls, attr_name), priority=priority)
+
 class EventBus(IEventBus):
     '''
     Implements a simple event bus for an event-driven architecture, facilitating communication
@@ -36,39 +53,198 @@ class EventBus(IEventBus):
     events are published. This decouples the event publishers from the subscribers, improving
     modularity and flexibility.
 
+    Events are identified by a name or by a payload class. Registering an event assigns it an integer id,
+    and every subscription recompiles the event's handlers into a tuple ordered by priority, so publishing
+    only has to index into a list. `emit` passes positional arguments and `dispatch` passes a single payload
+    object, so neither builds a kwargs dict per call.
+
+    Besides the synchronous paths, payloads can be queued with `queue`. Queued payloads are buffered per
+    event and delivered by `flush`: batch subscribers are called once with the whole list and regular
+    subscribers once per payload. Payloads queued by handlers during a flush are delivered in a following
+    pass of the same flush, up to `max_flush_passes`, after which they wait for the next flush. This keeps
+    handlers that raise events from recursing into each other.
+
+    Handlers can be `async def` functions. `publish_async` calls the synchronous handlers in order and
+    then awaits the asynchronous ones together. The synchronous publish paths schedule asynchronous
+    handlers as tasks on the running event loop instead, so they must be called from within that loop.
+
+    Setting a Profiler with `set_profiler` recompiles the handler tuples with recording wrappers, and
+    removing it compiles the plain callbacks again, so publishing costs nothing extra while profiling is off.
+
     Attributes:
-        events (dict[str, list[Callable]]): A dictionary mapping event names to lists of callback functions
-        (subscribers) that should be invoked when the event is published.
+        events (dict[str | type, tuple[Callable, ...]]): A dictionary mapping event names to the callback functions
+        (subscribers) that should be invoked when the event is published, ordered by priority.
+        event_ids (dict[str | type, int]): Maps every registered event to its integer id.
+        max_flush_passes (int): The maximum number of delivery passes per flush.
+        profiler (Profiler | None): The profiler recording every handler call, None when profiling is off.
+
+    Methods:
+        register_event: Registers a new event and assigns it an id.
+        get_event_id: Retrieves the integer id of a registered event.
+        subscribe: Subscribes a callback to an event with an optional priority.
+        publish: Invokes every handler of an event with keyword arguments.
+        emit: Invokes every handler of an event with positional arguments.
+        dispatch: Invokes every handler registered for the type of a payload object.
+        subscribe_batch: Subscribes a callback to receive the queued payloads of an event as a list.
+        queue: Buffers a payload to be delivered on the next flush.
+        flush: Delivers every queued payload.
+        publish_async: Invokes every handler of an event, awaiting the asynchronous ones.
+        set_profiler: Starts or stops recording the handler calls.
     '''
+    max_flush_passes: int = 16
+
     def __init__(self):
-        self.events: dict[str, list[Callable]] = {} # event_names : listeners
+        self.events: dict[Hashable, tuple[Callable, ...]] = {} # event_names : listeners
+        self.event_ids: dict[Hashable, int] = {}
+        self._handlers: list[tuple[Callable, ...]] = []
+        self._subscriptions: list[list[tuple[int, int, Callable]]] = []
+        self._batch_handlers: list[tuple[Callable, ...]] = []
+        self._batch_subscriptions: list[list[tuple[int, int, Callable]]] = []
+        self._n_subscriptions = 0
+        self._queued: dict[int, list[Any]] = {}
+        self._async_handlers: list[tuple[tuple[Callable, bool], ...]] = []
+        self._tasks: set[asyncio.Task] = set()
+        self._event_names: list[Hashable] = []
+        self.profiler: Profiler | None = None
 
-    def register_event(self, event_name: str):
+    def register_event(self, event_name: Hashable) -> int:
         '''
-        Registers a new event type in the event bus. Each event type is identified by a unique name.
+        Registers a new event type in the event bus. Each event type is identified by a unique name
+        or payload class.
 
         Args:
-            event_name (str): The unique name of the event to register.
+            event_name (str | type): The unique name or payload class of the event to register.
+
+        Returns:
+            The integer id of the event.
 
         Raises:
             KeyError: If the event_name already exists in the events dictionary.
         '''
         if event_name in self.events:
             raise KeyError(f'{event_name} already exists as an event.')
-        self.events[event_name] = []
+        event_id = len(self._handlers)
+        self.event_ids[event_name] = event_id
+        self.events[event_name] = ()
+        self._handlers.append(())
+        self._subscriptions.append([])
+        self._batch_handlers.append(())
+        self._batch_subscriptions.append([])
+        self._async_handlers.append(())
+        self._event_names.append(event_name)
+        return event_id
 
-    def subscribe(self, event_name: str, callback: Callable):
+    def get_event_id(self, event_name: Hashable) -> int:
+        '''
+        Retrieves the integer id of a registered event. Passing the id to `emit` skips the name lookup.
+
+        Args:
+            event_name (str | type): The name or payload class of the event.
+
+        Returns:
+            The integer id of the event.
+
+        Raises:
+            KeyError: If the event_name does not exist.
+        '''
+        return self.event_ids[event_name]
+
+    def subscribe(self, event_name: Hashable, callback: Callable, priority: int = 0):
         '''
         Subscribes a callback function to a specific event type. The callback will be invoked
         when the event is published.
 
         Args:
-            event_name (str): The name of the event to subscribe to.
+            event_name (str | type): The name of the event to subscribe to.
             callback (Callable): The callback function that should be invoked when the event is published.
+            priority (int): Callbacks with a higher priority are invoked first, callbacks with the same
+                priority are invoked in the order they subscribed. Defaults to 0.
+
+        Raises:
+            KeyError: If the event_name does not exist.
         '''
-        self.events[event_name].append(callback)
+        event_id = self.event_ids[event_name]
+        self.events[event_name] = self._add_subscription(self._subscriptions[event_id], callback, priority)
+        self._compile_handlers(event_id)
 
-    def publish(self, event_name: str, **kwargs):      
+    def subscribe_batch(self, event_name: Hashable, callback: Callable, priority: int = 0):
+        '''
+        Subscribes a callback to the queued payloads of an event. On every flush the callback is invoked
+        once with the list of payloads queued since the last flush, e.g. `handle_damage(events: list[DamageEvent])`.
+
+        Args:
+            event_name (str | type): The name of the event to subscribe to.
+            callback (Callable): The callback function that receives the list of payloads.
+            priority (int): Callbacks with a higher priority are invoked first. Defaults to 0.
+
+        Raises:
+            KeyError: If the event_name does not exist.
+        '''
+        event_id = self.event_ids[event_name]
+        self._add_subscription(self._batch_subscriptions[event_id], callback, priority)
+        self._compile_handlers(event_id)
+
+    def set_profiler(self, profiler: Profiler | None):
+        '''
+        Starts recording the wall time of every handler call with a profiler, or stops recording when passed None.
+
+        Args:
+            profiler (Profiler | None): The profiler to record with.
+        '''
+        self.profiler = profiler
+        for event_id in range(len(self._handlers)):
+            self._compile_handlers(event_id)
+
+    def _compile_handlers(self, event_id: int):
+        '''
+        Builds the handler tuples of an event from its subscriptions, wrapping every callback for the profiler if one is set.
+        '''
+        event_name = self._event_names[event_id]
+        callbacks = self.events[event_name]
+        batch_callbacks = [subscription[2] for subscription in self._batch_subscriptions[event_id]]
+        profiler = self.profiler
+        if profiler is None:
+            self._handlers[event_id] = tuple(self._get_sync_handler(callback) for callback in callbacks)
+            self._async_handlers[event_id] = tuple((callback, iscoroutinefunction(callback)) for callback in callbacks)
+            self._batch_handlers[event_id] = tuple(self._get_sync_handler(callback) for callback in batch_callbacks)
+            return
+
+        event_label = getattr(event_name, '__name__', str(event_name))
+        def get_span_name(callback: Callable) -> str:
+            return f"{event_label}:{getattr(callback, '__qualname__', type(callback).__name__)}"
+
+        self._handlers[event_id] = tuple(
+            profiler.instrument(self._get_sync_handler(callback), 'event', get_span_name(callback)) for callback in callbacks
+        )
+        self._async_handlers[event_id] = tuple(
+            (profiler.instrument(callback, 'event', get_span_name(callback)), iscoroutinefunction(callback)) for callback in callbacks
+        )
+        self._batch_handlers[event_id] = tuple(
+            profiler.instrument(self._get_sync_handler(callback), 'event', get_span_name(callback)) for callback in batch_callbacks
+        )
+
+    def _get_sync_handler(self, callback: Callable) -> Callable:
+        '''
+        Wraps an `async def` callback so that calling it schedules a task on the running event loop.
+        Synchronous callbacks are returned as is.
+        '''
+        if not iscoroutinefunction(callback):
+            return callback
+
+        def schedule(*args, **kwargs) -> asyncio.Task:
+            task = asyncio.get_running_loop().create_task(callback(*args, **kwargs))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return task
+        return schedule
+
+    def _add_subscription(self, subscriptions: list[tuple[int, int, Callable]], callback: Callable, priority: int) -> tuple[Callable, ...]:
+        subscriptions.append((-priority, self._n_subscriptions, callback))
+        self._n_subscriptions += 1
+        subscriptions.sort(key=lambda subscription: subscription[:2])
+        return tuple(subscription[2] for subscription in subscriptions)
+
+    def publish(self, event_name: Hashable, **kwargs):      
         '''
         Publishes an event of a specific type, invoking all subscribed callback functions.
 
@@ -79,7 +255,91 @@ class EventBus(IEventBus):
         Raises:
             KeyError: If the event_name does not exist in the events dictionary.
         '''  
-        for callback in self.events[event_name]:
+        for callback in self._handlers[self.event_ids[event_name]]:
             callback(**kwargs)
 
+    async def publish_async(self, event_name: Hashable, **kwargs):
+        '''
+        Publishes an event, calling the synchronous handlers in priority order and then awaiting the
+        asynchronous handlers concurrently.
+
+        Args:
+            event_name (str): The name of the event to publish.
+            **kwargs: Arbitrary keyword arguments that will be passed to the callback functions.
+
+        Raises:
+            KeyError: If the event_name does not exist in the events dictionary.
+        '''
+        coroutines = []
+        for callback, is_async in self._async_handlers[self.event_ids[event_name]]:
+            if is_async:
+                coroutines.append(callback(**kwargs))
+            else:
+                callback(**kwargs)
+        if coroutines:
+            await asyncio.gather(*coroutines)
+
+    def emit(self, event: Hashable | int, *args):
+        '''
+        Publishes an event with positional arguments, avoiding the kwargs dict built by `publish`.
+
+        Args:
+            event (str | type | int): The name, payload class or integer id of the event.
+            *args: Positional arguments passed to the callback functions.
+
+        Raises:
+            KeyError: If the event does not exist.
+        '''
+        event_id = event if type(event) is int else self.event_ids[event]
+        for callback in self._handlers[event_id]:
+            callback(*args)
+
+    def dispatch(self, payload: Any):
+        '''
+        Publishes a payload object to the handlers of the event registered for its type.
+
+        Args:
+            payload (Any): An instance of a registered event class, passed as the only argument to the callbacks.
+
+        Raises:
+            KeyError: If the payload's type is not a registered event.
+        '''
+        for callback in self._handlers[self.event_ids[type(payload)]]:
+            callback(payload)
 
+    def queue(self, payload: Any, event: Hashable | int | None = None):
+        '''
+        Buffers a payload to be delivered on the next flush instead of invoking the handlers right away.
+
+        Args:
+            payload (Any): The payload to deliver.
+            event (str | type | int, optional): The name, class or id of the event. Defaults to the payload's type.
+
+        Raises:
+            KeyError: If the event does not exist.
+        '''
+        if event is None:
+            event = type(payload)
+        event_id = event if type(event) is int else self.event_ids[event]
+        queued = self._queued.get(event_id)
+        if queued is None:
+            self._queued[event_id] = [payload]
+        else:
+            queued.append(payload)
+
+    def flush(self):
+        '''
+        Delivers every queued payload, in the order the events were registered. Batch subscribers receive
+        the list of payloads and regular subscribers receive each payload.
+        '''
+        for _ in range(self.max_flush_passes):
+            if not self._queued:
+                return
+            queued, self._queued = self._queued, {}
+            for event_id in sorted(queued):
+                payloads = queued[event_id]
+                for callback in self._batch_handlers[event_id]:
+                    callback(payloads)
+                for callback in self._handlers[event_id]:
+                    for payload in payloads:
+                        callback(payload)
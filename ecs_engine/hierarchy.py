@@ -0,0 +1,277 @@
+from __future__ import annotations
+from array import array
+from typing import TYPE_CHECKING, Iterable, Type
+
+if TYPE_CHECKING:
+    from .component import Component
+    from .entity import Entity
+    from .entity_admin import EcsAdmin
+
+NO_ENTITY = -1
+
+class Hierarchy:
+    '''
+    Parent-child relationships between the entities of an EcsAdmin.
+
+    The links are stored as an intrusive linked list in typed arrays indexed by entity id: every entity
+    knows its parent, its first child and its previous and next siblings. Attaching, detaching and walking
+    the children of an entity therefore never scans the world. The depth of every linked entity is kept up
+    to date as well, so `get_depth_sorted` can hand transform propagation every entity after its parent
+    in a single flat list, rebuilt only after the hierarchy changed.
+
+    The hierarchy is created by `EcsAdmin.set_parent` the first time it is used, and destroying an entity
+    through the admin also destroys all of its descendants.
+
+    Attributes:
+        ecs_admin (EcsAdmin): The admin whose entities are linked.
+        parents (array[int]): The parent id of every entity, -1 for entities without a parent.
+        first_children (array[int]): The id of the most recently attached child of every entity, -1 if it has none.
+        next_siblings (array[int]): The id of the next child of the same parent, -1 for the last child.
+        previous_siblings (array[int]): The id of the previous child of the same parent, -1 for the first child.
+        depths (array[int]): The number of ancestors of every entity.
+
+    Methods:
+        set_parent: Makes an entity the child of another one.
+        remove_parent: Detaches an entity from its parent.
+        get_parent: Retrieves the parent of an entity.
+        get_children: Retrieves the children of an entity, optionally filtered by component types.
+        get_descendants: Retrieves every descendant of an entity, parents before their children.
+        has_children: Checks whether an entity has at least one child.
+        get_depth: Retrieves the number of ancestors of an entity.
+        get_depth_sorted: Retrieves every linked entity and its parent, sorted by depth.
+        get_depth_sorted_ids: Retrieves the ids of every linked entity and of its parent, sorted by depth.
+        get_subtree_ids: Retrieves the ids of a batch of entities and of all of their descendants.
+        remove_entities: Unlinks a batch of entities that are being destroyed.
+    '''
+    def __init__(self, ecs_admin: EcsAdmin) -> None:
+        self.ecs_admin = ecs_admin
+        max_entities = ecs_admin.max_entities
+        self.parents = array('i', [NO_ENTITY]) * max_entities
+        self.first_children = array('i', [NO_ENTITY]) * max_entities
+        self.next_siblings = array('i', [NO_ENTITY]) * max_entities
+        self.previous_siblings = array('i', [NO_ENTITY]) * max_entities
+        self.depths = array('i', [0]) * max_entities
+        # entities that have children but no parent, the starting points of the depth sorted order
+        self._roots: dict[int, None] = {}
+        self._depth_sorted_ids: tuple[array, array] | None = None
+
+    def set_parent(self, child: Entity, parent: Entity):
+        '''
+        Makes an entity the child of another one, detaching it from its previous parent first.
+
+        Args:
+            child (Entity): The entity to attach.
+            parent (Entity): Its new parent.
+
+        Raises:
+            KeyError: If either entity has been destroyed.
+            ValueError: If the parent is the child itself or one of its descendants.
+        '''
+        entity_manager = self.ecs_admin.entity_manager
+        for entity in (child, parent):
+            if not entity_manager.is_alive(entity):
+                raise KeyError(f'{entity} has been destroyed.')
+        child_id, parent_id = child.id, parent.id
+        if self.parents[child_id] == parent_id:
+            return
+        ancestor_id = parent_id
+        while ancestor_id != NO_ENTITY:
+            if ancestor_id == child_id:
+                raise ValueError(f'{parent} can\'t become the parent of {child}, it is one of its descendants.')
+            ancestor_id = self.parents[ancestor_id]
+
+        self._unlink(child_id)
+        first_child_id = self.first_children[parent_id]
+        self.next_siblings[child_id] = first_child_id
+        if first_child_id != NO_ENTITY:
+            self.previous_siblings[first_child_id] = child_id
+        self.first_children[parent_id] = child_id
+        self.parents[child_id] = parent_id
+
+        self._roots.pop(child_id, None)
+        if self.parents[parent_id] == NO_ENTITY:
+            self._roots[parent_id] = None
+        self._set_depths(child_id, self.depths[parent_id] + 1)
+        self._depth_sorted_ids = None
+
+    def remove_parent(self, child: Entity):
+        '''
+        Detaches an entity from its parent. Its own children stay attached to it.
+
+        Args:
+            child (Entity): The entity to detach.
+        '''
+        self._detach(child.id)
+
+    def _detach(self, child_id: int):
+        if self.parents[child_id] == NO_ENTITY:
+            return
+        self._unlink(child_id)
+        if self.first_children[child_id] != NO_ENTITY:
+            self._roots[child_id] = None
+        self._set_depths(child_id, 0)
+        self._depth_sorted_ids = None
+
+    def _unlink(self, child_id: int):
+        parent_id = self.parents[child_id]
+        if parent_id == NO_ENTITY:
+            return
+        previous_id, next_id = self.previous_siblings[child_id], self.next_siblings[child_id]
+        if previous_id == NO_ENTITY:
+            self.first_children[parent_id] = next_id
+        else:
+            self.next_siblings[previous_id] = next_id
+        if next_id != NO_ENTITY:
+            self.previous_siblings[next_id] = previous_id
+        self.parents[child_id] = self.previous_siblings[child_id] = self.next_siblings[child_id] = NO_ENTITY
+        if self.first_children[parent_id] == NO_ENTITY:
+            self._roots.pop(parent_id, None)
+
+    def _set_depths(self, entity_id: int, depth: int):
+        depths, first_children, next_siblings = self.depths, self.first_children, self.next_siblings
+        stack = [(entity_id, depth)]
+        while stack:
+            entity_id, depth = stack.pop()
+            depths[entity_id] = depth
+            child_id = first_children[entity_id]
+            while child_id != NO_ENTITY:
+                stack.append((child_id, depth + 1))
+                child_id = next_siblings[child_id]
+
+    def _get_child_ids(self, entity_id: int) -> list[int]:
+        next_siblings = self.next_siblings
+        child_ids = []
+        child_id = self.first_children[entity_id]
+        while child_id != NO_ENTITY:
+            child_ids.append(child_id)
+            child_id = next_siblings[child_id]
+        return child_ids
+
+    def get_parent(self, entity: Entity) -> Entity | None:
+        '''
+        Retrieves the parent of an entity, None if it doesn't have one.
+        '''
+        parent_id = self.parents[entity.id]
+        return None if parent_id == NO_ENTITY else self.ecs_admin.entity_map[parent_id]
+
+    def get_children(self, entity: Entity, component_types: Iterable[Type[Component]] = ()) -> list[Entity]:
+        '''
+        Retrieves the children of an entity by walking its own child list.
+
+        Args:
+            entity (Entity): The parent.
+            component_types (Iterable[Type[Component]], optional): Only keeps the children that have every one
+                of these component types.
+
+        Returns:
+            A list of the children, most recently attached first.
+        '''
+        entity_map = self.ecs_admin.entity_map
+        children = [entity_map[child_id] for child_id in self._get_child_ids(entity.id)]
+        if component_types:
+            component_types = tuple(component_types)
+            children = [
+                child for child in children
+                if all(component_type in child.components for component_type in component_types)
+            ]
+        return children
+
+    def get_descendants(self, entity: Entity) -> list[Entity]:
+        '''
+        Retrieves every descendant of an entity, breadth first so every entity comes after its parent.
+        '''
+        entity_map = self.ecs_admin.entity_map
+        return [entity_map[entity_id] for entity_id in self._get_descendant_ids(entity.id)]
+
+    def _get_descendant_ids(self, entity_id: int) -> list[int]:
+        descendant_ids = self._get_child_ids(entity_id)
+        for descendant_id in descendant_ids:
+            descendant_ids.extend(self._get_child_ids(descendant_id))
+        return descendant_ids
+
+    def has_children(self, entity: Entity) -> bool:
+        return self.first_children[entity.id] != NO_ENTITY
+
+    def get_depth(self, entity: Entity) -> int:
+        '''
+        Retrieves the number of ancestors of an entity, 0 for entities without a parent.
+        '''
+        return self.depths[entity.id]
+
+    def get_depth_sorted_ids(self) -> tuple[array, array]:
+        '''
+        Retrieves the ids of every entity that has a parent or children, sorted by depth, together with the
+        id of each one's parent. The children of a parent are stored next to each other. The arrays are
+        cached until the hierarchy changes, so they must not be modified.
+
+        Returns:
+            A tuple of the entity ids and the aligned parent ids, -1 for the roots.
+        '''
+        if self._depth_sorted_ids is None:
+            entity_ids = array('i', self._roots)
+            for entity_id in entity_ids:
+                entity_ids.extend(self._get_child_ids(entity_id))
+            parents = self.parents
+            self._depth_sorted_ids = (entity_ids, array('i', [parents[entity_id] for entity_id in entity_ids]))
+        return self._depth_sorted_ids
+
+    def get_depth_sorted(self, component_types: Iterable[Type[Component]] = ()) -> list[tuple[Entity, Entity | None]]:
+        '''
+        Retrieves every entity that has a parent or children together with its parent, sorted by depth so a
+        single pass over the list can propagate transforms from the roots down.
+
+        Args:
+            component_types (Iterable[Type[Component]], optional): Only keeps the entities that have every one
+                of these component types. Their parents are returned either way.
+
+        Returns:
+            A list of (Entity, parent Entity) tuples, the parent being None for the roots.
+        '''
+        entity_map = self.ecs_admin.entity_map
+        entity_ids, parent_ids = self.get_depth_sorted_ids()
+        pairs = [
+            (entity_map[entity_id], None if parent_id == NO_ENTITY else entity_map[parent_id])
+            for entity_id, parent_id in zip(entity_ids, parent_ids)
+        ]
+        if component_types:
+            component_types = tuple(component_types)
+            pairs = [
+                (entity, parent) for entity, parent in pairs
+                if all(component_type in entity.components for component_type in component_types)
+            ]
+        return pairs
+
+    def get_subtree_ids(self, entities: Iterable[Entity]) -> list[int]:
+        '''
+        Retrieves the ids of a batch of entities followed by the ids of all of their descendants, without
+        duplicates.
+        '''
+        entity_ids = dict.fromkeys(entity.id for entity in entities)
+        first_children = self.first_children
+        for entity_id in list(entity_ids):
+            if first_children[entity_id] != NO_ENTITY:
+                entity_ids.update(dict.fromkeys(self._get_descendant_ids(entity_id)))
+        return list(entity_ids)
+
+    def remove_entities(self, entity_ids: Iterable[int]):
+        '''
+        Unlinks a batch of entities that are being destroyed from their parents and children, so their
+        ids can be recycled.
+        '''
+        first_children, parents = self.first_children, self.parents
+        changed = False
+        for entity_id in entity_ids:
+            if parents[entity_id] != NO_ENTITY:
+                self._unlink(entity_id)
+                changed = True
+            child_id = first_children[entity_id]
+            while child_id != NO_ENTITY:
+                self._detach(child_id)
+                child_id = first_children[entity_id]
+                changed = True
+            self.depths[entity_id] = 0
+        if changed:
+            self._depth_sorted_ids = None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(roots={len(self._roots)})"
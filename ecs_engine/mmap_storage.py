@@ -0,0 +1,303 @@
+from __future__ import annotations
+from array import array
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Type
+import json
+import os
+from .component import ColumnarComponent
+from .component_pool import ComponentPool
+from .entity import Entity
+from .snapshot import get_type_name, resolve_type_name
+
+try:
+    import numpy as np
+except ImportError: # numpy is only required for memory-mapped storage
+    np = None
+
+if TYPE_CHECKING:
+    from .component import Component
+    from .entity_admin import EcsAdmin
+
+_MIN_CAPACITY = 16
+_WORLD_FILE = 'world.json'
+
+class MappedArray:
+    '''
+    A growable array of numbers stored in a memory-mapped file, supporting the list operations
+    ComponentPool uses on its dense arrays.
+
+    Only the pages that are touched are loaded into memory. The file grows by doubling, and the number
+    of values in use is not stored in the file itself, so the owner has to persist it.
+
+    Attributes:
+        path (str): The file backing the array.
+        dtype (np.dtype): The type of the values.
+
+    Methods:
+        append: Adds a value to the end.
+        extend: Adds several values to the end.
+        pop: Removes and returns the last value.
+        view: Retrieves a NumPy view of the values in use.
+        flush: Writes the changes back to the file.
+    '''
+    def __init__(self, path: str, dtype: Any, length: int = 0) -> None:
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        if not os.path.exists(path):
+            _resize_file(path, max(length, _MIN_CAPACITY) * self.dtype.itemsize)
+        self._array = np.memmap(path, dtype=self.dtype, mode='r+')
+        self._length = length
+
+    def _reserve(self, length: int):
+        if length > len(self._array):
+            self._array.flush()
+            _resize_file(self.path, max(length, 2 * len(self._array)) * self.dtype.itemsize)
+            self._array = np.memmap(self.path, dtype=self.dtype, mode='r+')
+
+    def append(self, value: int):
+        self._reserve(self._length + 1)
+        self._array[self._length] = value
+        self._length += 1
+
+    def extend(self, values: Iterable[int]):
+        values = np.fromiter(values, dtype=self.dtype)
+        self._reserve(self._length + len(values))
+        self._array[self._length:self._length + len(values)] = values
+        self._length += len(values)
+
+    def pop(self) -> int:
+        if not self._length:
+            raise IndexError('pop from empty MappedArray')
+        self._length -= 1
+        return self._array[self._length].item()
+
+    def view(self) -> Any:
+        '''
+        Retrieves a NumPy view of the values in use. The view is invalidated when the array grows.
+        '''
+        return self._array[:self._length]
+
+    def flush(self):
+        self._array.flush()
+
+    def _get_index(self, index: int) -> int:
+        index = index.__index__()
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('MappedArray index out of range')
+        return index
+
+    def __getitem__(self, index: int | slice) -> Any:
+        if isinstance(index, slice):
+            return self.view()[index].tolist()
+        return self._array[self._get_index(index)].item()
+
+    def __setitem__(self, index: int | slice, value: Any):
+        if isinstance(index, slice):
+            if index != slice(None):
+                raise ValueError('MappedArray only supports replacing every value with a slice.')
+            self._length = 0
+            self.extend(value)
+        else:
+            self._array[self._get_index(index)] = value
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.view().tolist())
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> Any:
+        return self.view() if dtype is None else self.view().astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.path!r}, length={self._length})"
+
+def _resize_file(path: str, size: int):
+    with open(path, 'ab') as file:
+        file.truncate(size)
+
+class MemoryMappedComponentPool(ComponentPool):
+    '''
+    A ComponentPool that keeps the columns of ColumnarComponents, together with the pool's sparse set
+    and its dense entity id and change tick arrays, in memory-mapped files. Worlds larger than the available
+    memory only page in what systems touch, and a restarted process can reattach to the files with
+    `reattach_world` instead of rebuilding the world. Regular components are stored in memory as usual.
+
+    Use it by subclassing it with a `directory` and setting `component_pool_type` on an EcsAdmin. A pool
+    always opens the files already present in the directory, so a new world needs an empty directory.
+    Call `flush_world` to persist the lengths of the arrays and the EntityManager's state.
+
+    Example:
+        class WorldPool(MemoryMappedComponentPool):
+            directory = 'data/world'
+
+        class World(EcsAdmin):
+            component_pool_type = WorldPool
+
+    Attributes:
+        directory (str | None): The directory holding the files.
+
+    Methods:
+        flush: Writes the pool's arrays and metadata to disk.
+    '''
+    directory: str | None = None
+
+    def __init__(self, component_type: Type[Component], entity_capacity: int, max_pool_size: int | None = None) -> None:
+        if np is None:
+            raise ImportError('MemoryMappedComponentPool requires numpy to be installed.')
+        if self.directory is None:
+            raise ValueError(f'{self.__class__.__name__} must define a directory.')
+        os.makedirs(self.directory, exist_ok=True)
+        self._base_path = os.path.join(self.directory, get_type_name(component_type).replace(':', '.'))
+        self._metadata: dict[str, Any] = {}
+        if os.path.exists(self._base_path + '.json'):
+            with open(self._base_path + '.json') as file:
+                self._metadata = json.load(file)
+        super().__init__(component_type, entity_capacity, max_pool_size)
+        if self.columns is None:
+            return
+
+        length = self._metadata.get('length', 0)
+        self.entity_ids = MappedArray(self._base_path + '.entity_ids', np.int64, length)
+        self.added_ticks = MappedArray(self._base_path + '.added_ticks', np.int64, length)
+        self.changed_ticks = MappedArray(self._base_path + '.changed_ticks', np.int64, length)
+
+    def _allocate_sparse(self, entity_capacity: int) -> Any:
+        if not issubclass(self.component_type, ColumnarComponent):
+            return super()._allocate_sparse(entity_capacity)
+        path = self._base_path + '.sparse'
+        itemsize = np.dtype(np.int64).itemsize
+        n_existing = os.path.getsize(path) // itemsize if os.path.exists(path) else 0
+        n_rows = max(entity_capacity, n_existing, 1)
+        if n_existing < n_rows:
+            _resize_file(path, n_rows * itemsize)
+        sparse = np.memmap(path, dtype=np.int64, mode='r+')
+        sparse[n_existing:] = -1
+        return sparse
+
+    def _allocate_column(self, name: str, dtype: Any, capacity: int) -> Any:
+        path = f'{self._base_path}.{name}'
+        if self.columns is not None and name in self.columns:
+            self.columns[name].flush()
+            _resize_file(path, capacity * dtype.itemsize)
+        elif not os.path.exists(path):
+            _resize_file(path, max(capacity, _MIN_CAPACITY) * dtype.itemsize)
+        return np.memmap(path, dtype=dtype, mode='r+')
+
+    def flush(self):
+        '''
+        Writes the pool's arrays and the number of rows in use to disk.
+        '''
+        if self.columns is None:
+            return
+        for column in self.columns.values():
+            column.flush()
+        self.sparse.flush()
+        for dense_array in (self.entity_ids, self.added_ticks, self.changed_ticks):
+            dense_array.flush()
+        with open(self._base_path + '.json', 'w') as file:
+            json.dump({'type': get_type_name(self.component_type), 'length': len(self.entity_ids)}, file)
+
+def flush_world(ecs_admin: EcsAdmin):
+    '''
+    Flushes every memory-mapped pool of an admin and writes the EntityManager's state and the change tick
+    next to them, so the world can be reattached after a restart.
+
+    Args:
+        ecs_admin (EcsAdmin): An admin whose component_pool_type is a MemoryMappedComponentPool.
+    '''
+    directory = _get_directory(ecs_admin)
+    for component_pool in ecs_admin.component_pools.values():
+        component_pool.flush()
+
+    entity_manager = ecs_admin.entity_manager
+    with open(os.path.join(directory, 'generations'), 'wb') as file:
+        entity_manager.generations.tofile(file)
+    with open(os.path.join(directory, 'destroyed_entity_ids'), 'wb') as file:
+        array('q', entity_manager.destroyed_entity_ids).tofile(file)
+    with open(os.path.join(directory, 'entity_ids'), 'wb') as file:
+        array('q', ecs_admin.entity_map).tofile(file)
+    with open(os.path.join(directory, _WORLD_FILE), 'w') as file:
+        json.dump({
+            'max_entities': entity_manager.max_entities,
+            'next_id': entity_manager.next_id,
+            'change_tick': ecs_admin.change_tick,
+        }, file)
+
+def reattach_world(ecs_admin: EcsAdmin):
+    '''
+    Rebuilds the entities of a world persisted with `flush_world` from its memory-mapped pools. Column
+    values stay in the files; only the Entity objects and the row proxies of their components are created.
+    The change tick resumes after every persisted tick, so the restored components aren't reported as added
+    or changed to readers created afterwards.
+
+    Args:
+        ecs_admin (EcsAdmin): A new admin whose component_pool_type is a MemoryMappedComponentPool using the
+            directory of the persisted world.
+
+    Raises:
+        ValueError: If the admin already has entities, or the directory holds no world or a larger one.
+    '''
+    directory = _get_directory(ecs_admin)
+    if ecs_admin.entity_map:
+        raise ValueError('A world can only be reattached to an admin without entities.')
+    world_path = os.path.join(directory, _WORLD_FILE)
+    if not os.path.exists(world_path):
+        raise ValueError(f'{directory} does not hold a flushed world.')
+    with open(world_path) as file:
+        world = json.load(file)
+    entity_manager = ecs_admin.entity_manager
+    if world['max_entities'] > entity_manager.max_entities:
+        raise ValueError(f"The world holds up to {world['max_entities']} entities but the admin only supports {entity_manager.max_entities}.")
+
+    def read_array(name: str, typecode: str) -> array:
+        values = array(typecode)
+        with open(os.path.join(directory, name), 'rb') as file:
+            values.frombytes(file.read())
+        return values
+
+    generations = read_array('generations', 'I')
+    entity_manager.generations[:len(generations)] = generations
+    entity_manager.next_id = world['next_id']
+    entity_manager.destroyed_entity_ids = read_array('destroyed_entity_ids', 'q').tolist()
+    entities = {entity_id: Entity(entity_id, generations[entity_id]) for entity_id in read_array('entity_ids', 'q')}
+    ecs_admin.entity_map.update(entities)
+
+    component_pools = []
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith('.json') or file_name == _WORLD_FILE:
+            continue
+        with open(os.path.join(directory, file_name)) as file:
+            component_type = resolve_type_name(json.load(file)['type'])
+        component_pools.append(ecs_admin.get_component_pool(component_type))
+    ecs_admin.change_tick = max(
+        world.get('change_tick', 0),
+        *(max(component_pool.changed_ticks, default=0) for component_pool in component_pools),
+        *(max(component_pool.added_ticks, default=0) for component_pool in component_pools),
+    ) + 1
+
+    for component_pool in component_pools:
+        component_type = component_pool.component_type
+        template = component_type()
+        for entity_id in component_pool.entity_ids:
+            entity = entities[entity_id]
+            component = component_pool.clone_component_obj(template)
+            component._bind(component_pool, entity_id)
+            entity._add_component(component)
+            component_pool.entities.append(entity)
+        if component_pool.change_log_horizon is not None:
+            # the persisted ticks aren't in the change log, older change queries scan them instead
+            component_pool.change_log_horizon = max(component_pool.changed_ticks, default=0)
+
+    for entity in entities.values():
+        if ecs_admin.archetypes is not None:
+            ecs_admin.archetypes.add_entity(entity)
+        for query in ecs_admin.queries.values():
+            query.on_component_added(entity)
+
+def _get_directory(ecs_admin: EcsAdmin) -> str:
+    pool_type = ecs_admin.component_pool_type
+    if not issubclass(pool_type, MemoryMappedComponentPool) or pool_type.directory is None:
+        raise TypeError(f'{ecs_admin} must use a MemoryMappedComponentPool with a directory.')
+    return pool_type.directory
@@ -0,0 +1,234 @@
+from __future__ import annotations
+from collections import deque
+from functools import wraps
+from inspect import iscoroutinefunction
+from math import ceil
+from typing import TYPE_CHECKING, Any, Callable
+import json
+import os
+import sys
+import threading
+import time
+
+if TYPE_CHECKING:
+    from .system import System
+
+# the System methods whose results are counted as the entities a system iterated
+ENTITY_METHODS = ('get_required_entities', 'get_entities_intersect', 'get_entities_union', 'query_arrays')
+
+class SpanStats:
+    '''
+    The totals and the rolling window of durations recorded for one system, event handler or frame.
+
+    Attributes:
+        calls (int): The number of recorded calls.
+        total_time (float): The summed duration of every call, in seconds.
+        max_time (float): The longest call, in seconds.
+        entities (int): The number of entities iterated over every call.
+        allocations (int): The net number of memory blocks allocated over every call.
+        durations (deque[float]): The durations of the most recent calls, in seconds.
+    '''
+    __slots__ = ('calls', 'total_time', 'max_time', 'entities', 'allocations', 'durations')
+
+    def __init__(self, window: int) -> None:
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.entities = 0
+        self.allocations = 0
+        self.durations: deque[float] = deque(maxlen=window)
+
+    def get_percentile(self, percentile: float) -> float:
+        '''
+        Retrieves a percentile of the recent durations using the nearest rank, in seconds.
+        '''
+        if not self.durations:
+            return 0.0
+        durations = sorted(self.durations)
+        return durations[max(0, ceil(percentile / 100 * len(durations)) - 1)]
+
+    def to_dict(self) -> dict[str, float | int]:
+        return {
+            'calls': self.calls,
+            'total_ms': self.total_time * 1000,
+            'mean_ms': self.total_time / self.calls * 1000 if self.calls else 0.0,
+            'p50_ms': self.get_percentile(50) * 1000,
+            'p99_ms': self.get_percentile(99) * 1000,
+            'max_ms': self.max_time * 1000,
+            'entities': self.entities,
+            'allocations': self.allocations,
+        }
+
+class Profiler:
+    '''
+    Records the wall time, call count, entities iterated and allocations of every system run, event handler
+    call and frame while profiling is enabled on an EcsAdmin.
+
+    The profiler works by instrumenting: enabling it replaces the systems' `run` methods and the event bus'
+    compiled handler tuples with timing wrappers, and disabling it restores the originals, so a disabled
+    profiler costs nothing per call. Entities are counted from the results of a system's entity queries during
+    its run. Allocations are the change in `sys.getallocatedblocks()`, which covers every thread, so they are
+    only exact for systems that don't run alongside others.
+
+    Attributes:
+        window (int): The number of recent durations kept per span for the percentiles.
+        max_trace_events (int): The number of recent calls kept for the Chrome trace.
+        stats (dict[tuple[str, str], SpanStats]): The statistics keyed by category and name.
+
+    Methods:
+        record: Records one call.
+        instrument: Wraps a callable so every call is recorded.
+        instrument_system: Replaces a system's run method with a recording wrapper.
+        uninstrument_system: Restores a system's methods.
+        get_stats: Retrieves the statistics as a dictionary.
+        reset: Forgets everything recorded so far.
+        export_chrome_trace: Writes the recent calls to a Chrome trace file.
+    '''
+    def __init__(self, window: int = 1000, max_trace_events: int = 100_000) -> None:
+        self.window = window
+        self.max_trace_events = max_trace_events
+        self.stats: dict[tuple[str, str], SpanStats] = {}
+        self._trace_events: deque[tuple[str, str, float, float, int, int, int]] = deque(maxlen=max_trace_events)
+        self._start_time = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, category: str, name: str, start: float, end: float, entities: int = 0, allocations: int = 0):
+        '''
+        Records one call.
+
+        Args:
+            category (str): The kind of span, such as 'system', 'event' or 'frame'.
+            name (str): The name of the span within its category.
+            start (float): The `time.perf_counter()` value when the call started.
+            end (float): The `time.perf_counter()` value when the call ended.
+            entities (int): The number of entities the call iterated.
+            allocations (int): The net number of memory blocks the call allocated.
+        '''
+        duration = end - start
+        with self._lock:
+            span_stats = self.stats.get((category, name))
+            if span_stats is None:
+                span_stats = self.stats[(category, name)] = SpanStats(self.window)
+            span_stats.calls += 1
+            span_stats.total_time += duration
+            if duration > span_stats.max_time:
+                span_stats.max_time = duration
+            span_stats.entities += entities
+            span_stats.allocations += allocations
+            span_stats.durations.append(duration)
+            self._trace_events.append((category, name, start, duration, threading.get_ident(), entities, allocations))
+
+    def instrument(self, function: Callable, category: str, name: str, counter: list[int] | None = None) -> Callable:
+        '''
+        Wraps a callable so every call is recorded. Coroutine functions get an asynchronous wrapper that
+        records the time until the coroutine finishes.
+
+        Args:
+            function (Callable): The callable to wrap.
+            category (str): The kind of span.
+            name (str): The name of the span.
+            counter (list[int], optional): A one-item list reset before each call, whose value is recorded as the
+                number of entities iterated.
+
+        Returns:
+            The wrapper.
+        '''
+        record, perf_counter, get_allocated_blocks = self.record, time.perf_counter, sys.getallocatedblocks
+
+        if iscoroutinefunction(function):
+            @wraps(function)
+            async def instrumented_async(*args, **kwargs):
+                if counter is not None:
+                    counter[0] = 0
+                blocks = get_allocated_blocks()
+                start = perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    record(category, name, start, perf_counter(), counter[0] if counter else 0, get_allocated_blocks() - blocks)
+            return instrumented_async
+
+        @wraps(function)
+        def instrumented(*args, **kwargs):
+            if counter is not None:
+                counter[0] = 0
+            blocks = get_allocated_blocks()
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(category, name, start, perf_counter(), counter[0] if counter else 0, get_allocated_blocks() - blocks)
+        return instrumented
+
+    def instrument_system(self, system: System):
+        '''
+        Replaces a system's run method with a recording wrapper and counts the entities returned by its
+        entity queries. The wrappers are set on the instance, so `uninstrument_system` restores the class methods.
+        '''
+        counter = [0]
+        for method_name in ENTITY_METHODS:
+            method = getattr(system, method_name)
+
+            @wraps(method)
+            def counted(*args, _method=method, **kwargs):
+                result = _method(*args, **kwargs)
+                counter[0] += len(result)
+                return result
+            setattr(system, method_name, counted)
+        system.run = self.instrument(system.run, 'system', type(system).__name__, counter)
+
+    @staticmethod
+    def uninstrument_system(system: System):
+        '''
+        Restores the methods replaced by `instrument_system`.
+        '''
+        for method_name in (*ENTITY_METHODS, 'run'):
+            system.__dict__.pop(method_name, None)
+
+    def get_stats(self) -> dict[str, dict[str, dict[str, float | int]]]:
+        '''
+        Retrieves the statistics as a dictionary.
+
+        Returns:
+            A dictionary mapping each category to a dictionary mapping span names to their calls, total_ms,
+            mean_ms, p50_ms, p99_ms, max_ms, entities and allocations.
+        '''
+        with self._lock:
+            stats: dict[str, dict[str, dict[str, float | int]]] = {}
+            for (category, name), span_stats in self.stats.items():
+                stats.setdefault(category, {})[name] = span_stats.to_dict()
+            return stats
+
+    def reset(self):
+        '''
+        Forgets every recorded call.
+        '''
+        with self._lock:
+            self.stats.clear()
+            self._trace_events.clear()
+
+    def export_chrome_trace(self, path: str):
+        '''
+        Writes the recent calls to a JSON file in the Chrome trace event format, which can be opened in
+        `chrome://tracing` or Perfetto.
+
+        Args:
+            path (str): The file to write.
+        '''
+        pid = os.getpid()
+        with self._lock:
+            trace_events: list[dict[str, Any]] = [
+                {
+                    'name': name,
+                    'cat': category,
+                    'ph': 'X',
+                    'ts': (start - self._start_time) * 1e6,
+                    'dur': duration * 1e6,
+                    'pid': pid,
+                    'tid': thread_id,
+                    'args': {'entities': entities, 'allocations': allocations},
+                }
+                for category, name, start, duration, thread_id, entities, allocations in self._trace_events
+            ]
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, file)
@@ -0,0 +1,473 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Type, Iterable, Iterator
+
+try:
+    import numpy as np
+except ImportError: # numpy is only required for batch array queries
+    np = None
+
+if TYPE_CHECKING:
+    from .component import Component
+    from .component_pool import ComponentPool
+    from .entity import Entity
+
+def _component_type_sort_key(component_type: Type[Component]) -> tuple[str, str, int]:
+    return (component_type.__module__, component_type.__qualname__, id(component_type))
+
+def get_query_key(component_types: Iterable[Type[Component]]) -> tuple[Type[Component], ...]:
+    '''
+    Builds the canonical key for a set of component types so that the same query
+    requested in a different order resolves to the same Query object.
+
+    Args:
+        component_types (Iterable[Type[Component]]): The component types of the query.
+
+    Returns:
+        A sorted tuple of the unique component types.
+    '''
+    return tuple(sorted(set(component_types), key=_component_type_sort_key))
+
+def get_component_mask(component_types: Iterable[Type[Component]]) -> int:
+    '''
+    Combines the `component_bit` of every component type into a mask comparable with `Entity.mask`.
+    '''
+    mask = 0
+    for component_type in component_types:
+        mask |= component_type.component_bit
+    return mask
+
+class Query:
+    '''
+    A persistent, incrementally maintained result of an all-of component query.
+
+    Queries are created and owned by the EcsAdmin, which updates them in place whenever a component
+    is attached, removed or an entity is destroyed. Reading a query doesn't allocate; the query itself
+    is a live view over its matching entities. Because removals are done with a swap-remove, structural
+    changes made while iterating a query can cause entities to be skipped.
+
+    Attributes:
+        component_types (tuple[Type[Component], ...]): The sorted component types an entity must have to match.
+        mask (int): The combined component bits of the component types.
+        entities (list[Entity]): The dense list of matching entities.
+        rows (dict[int, int]): Maps an entity id to its position in entities.
+
+    Methods:
+        matches: Checks whether an entity has every component type of the query.
+        on_component_added: Updates the query after a component is attached to an entity.
+        on_component_removed: Updates the query after a component is removed from an entity.
+        remove_entity: Removes an entity from the query results.
+        add_entities: Adds a batch of entities that are known to match.
+        remove_entities: Removes a batch of entities from the query results.
+    '''
+    def __init__(self, component_types: tuple[Type[Component], ...], entities: Iterable[Entity] = ()) -> None:
+        self.component_types: tuple[Type[Component], ...] = component_types
+        self.mask = get_component_mask(component_types)
+        self.entities: list[Entity] = []
+        self.rows: dict[int, int] = {}
+
+        for entity in entities:
+            self._add_entity(entity)
+
+    def matches(self, entity: Entity) -> bool:
+        '''
+        Checks whether an entity has every component type of the query.
+
+        Args:
+            entity (Entity): The entity to check.
+
+        Returns:
+            True if the entity matches, False otherwise. A query without component types matches nothing.
+        '''
+        mask = self.mask
+        return mask != 0 and entity.mask & mask == mask
+
+    def _add_entity(self, entity: Entity):
+        if entity.id not in self.rows:
+            self.rows[entity.id] = len(self.entities)
+            self.entities.append(entity)
+
+    def add_entities(self, entities: list[Entity]):
+        '''
+        Adds a batch of entities that are known to match, such as entities created with the same components.
+
+        Args:
+            entities (list[Entity]): The entities to add.
+        '''
+        rows = self.rows
+        new_entities = [entity for entity in entities if entity.id not in rows]
+        n_entities = len(self.entities)
+        rows.update({entity.id: n_entities + row for row, entity in enumerate(new_entities)})
+        self.entities.extend(new_entities)
+
+    def remove_entities(self, entities: list[Entity]):
+        '''
+        Removes a batch of entities from the query results. When a large share of the results is removed
+        the remaining entities are compacted in a single pass, which keeps their order.
+
+        Args:
+            entities (list[Entity]): The entities to remove. Entities that aren't in the results are ignored.
+        '''
+        if len(entities) * 4 < len(self.entities):
+            for entity in entities:
+                self.remove_entity(entity)
+            return
+
+        rows = self.rows
+        for entity in entities:
+            rows.pop(entity.id, None)
+        self.entities[:] = [entity for entity in self.entities if entity.id in rows]
+        rows.update({entity.id: row for row, entity in enumerate(self.entities)})
+
+    def remove_entity(self, entity: Entity):
+        '''
+        Removes an entity from the query results if it is present.
+
+        Args:
+            entity (Entity): The entity to remove.
+        '''
+        row = self.rows.pop(entity.id, None)
+        if row is None:
+            return
+
+        last_entity = self.entities.pop()
+        if row < len(self.entities):
+            self.entities[row] = last_entity
+            self.rows[last_entity.id] = row
+
+    def on_component_added(self, entity: Entity):
+        '''
+        Adds the entity to the results if the newly attached component completes the query.
+
+        Args:
+            entity (Entity): The entity that gained a component.
+        '''
+        if entity.id not in self.rows and self.matches(entity):
+            self._add_entity(entity)
+
+    def on_component_removed(self, entity: Entity):
+        '''
+        Removes the entity from the results now that it lost one of the query's components.
+
+        Args:
+            entity (Entity): The entity that lost a component.
+        '''
+        self.remove_entity(entity)
+
+    def __iter__(self) -> Iterator[Entity]:
+        return iter(self.entities)
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def __getitem__(self, index: int) -> Entity:
+        return self.entities[index]
+
+    def __contains__(self, entity: Entity) -> bool:
+        return self.rows.get(entity.id) is not None and self.entities[self.rows[entity.id]] is entity
+
+    def __repr__(self) -> str:
+        type_names = ', '.join(component_type.__name__ for component_type in self.component_types)
+        return f"{self.__class__.__name__}({type_names})"
+
+class ComponentFilter:
+    '''
+    Base class of the change detection filters that can be mixed with component types and query terms
+    in `EcsAdmin.get_entities_filtered` and `System.get_entities_intersect`, for example
+    `[Position, Changed[Velocity]]`. A filter is created by indexing its class with a component type.
+
+    Filters compare the change ticks stored in the component's pool with the tick they are evaluated
+    against, which for systems is the tick of their last run.
+
+    Attributes:
+        component_type (Type[Component]): The component type the filter applies to.
+
+    Methods:
+        get_candidates: Retrieves the entities of a pool that pass the filter.
+        matches: Checks whether an entity passes the filter.
+    '''
+    def __init__(self, component_type: Type[Component]) -> None:
+        self.component_type = component_type
+
+    def __class_getitem__(cls, component_type: Type[Component]) -> ComponentFilter:
+        return cls(component_type)
+
+    def get_candidates(self, component_pool: ComponentPool, tick: int) -> list[Entity]:
+        '''
+        Retrieves the entities of the component type's pool that pass the filter.
+
+        Args:
+            component_pool (ComponentPool): The pool of the filter's component type.
+            tick (int): The change tick to compare against.
+
+        Returns:
+            A list of the matching Entity instances.
+        '''
+        raise NotImplementedError(f'{self.__class__.__name__} has not defined get_candidates.')
+
+    def matches(self, component_pool: ComponentPool, entity: Entity, tick: int) -> bool:
+        '''
+        Checks whether an entity passes the filter.
+
+        Args:
+            component_pool (ComponentPool): The pool of the filter's component type.
+            entity (Entity): The entity to check.
+            tick (int): The change tick to compare against.
+
+        Returns:
+            True if the entity passes, False otherwise.
+        '''
+        raise NotImplementedError(f'{self.__class__.__name__} has not defined matches.')
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is type(self) and other.component_type is self.component_type
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.component_type))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}[{self.component_type.__name__}]"
+
+class Added(ComponentFilter):
+    '''
+    Matches entities whose component was attached after the tick.
+    '''
+    def get_candidates(self, component_pool: ComponentPool, tick: int) -> list[Entity]:
+        return component_pool.get_added_since(tick)
+
+    def matches(self, component_pool: ComponentPool, entity: Entity, tick: int) -> bool:
+        return component_pool.is_added_since(entity, tick)
+
+class Changed(ComponentFilter):
+    '''
+    Matches entities whose component was attached or marked as changed after the tick.
+    '''
+    def get_candidates(self, component_pool: ComponentPool, tick: int) -> list[Entity]:
+        return component_pool.get_changed_since(tick)
+
+    def matches(self, component_pool: ComponentPool, entity: Entity, tick: int) -> bool:
+        return component_pool.is_changed_since(entity, tick)
+
+class Removed(ComponentFilter):
+    '''
+    Matches entities whose component was removed after the tick, including entities destroyed since.
+    '''
+    def get_candidates(self, component_pool: ComponentPool, tick: int) -> list[Entity]:
+        return component_pool.get_removed_since(tick)
+
+    def matches(self, component_pool: ComponentPool, entity: Entity, tick: int) -> bool:
+        return component_pool.is_removed_since(entity, tick)
+
+class QueryTerm:
+    '''
+    Base class of the structural terms that can be mixed with component types and change detection
+    filters in `EcsAdmin.get_entities_filtered` and `System.get_entities_intersect`, for example
+    `[Position, Velocity, NoneOf[Frozen], OptionalOf[Sprite]]`. A term is created by indexing its class
+    with one or more component types.
+
+    Terms are matched against `Entity.mask`, so checking an entity costs an integer AND and compare
+    whatever the number of component types.
+
+    Attributes:
+        component_types (tuple[Type[Component], ...]): The component types of the term.
+        mask (int): The combined component bits of the component types.
+    '''
+    def __init__(self, component_types: tuple[Type[Component], ...]) -> None:
+        self.component_types = component_types
+        self.mask = get_component_mask(component_types)
+
+    def __class_getitem__(cls, component_types: Type[Component] | tuple[Type[Component], ...]) -> QueryTerm:
+        if not isinstance(component_types, tuple):
+            component_types = (component_types,)
+        return cls(component_types)
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is type(self) and other.component_types == self.component_types
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.component_types))
+
+    def __repr__(self) -> str:
+        type_names = ', '.join(component_type.__name__ for component_type in self.component_types)
+        return f"{self.__class__.__name__}[{type_names}]"
+
+class AllOf(QueryTerm):
+    '''
+    Matches entities that have every one of the component types, the same as listing the types directly.
+    '''
+
+class AnyOf(QueryTerm):
+    '''
+    Matches entities that have at least one of the component types.
+    '''
+
+class NoneOf(QueryTerm):
+    '''
+    Matches entities that have none of the component types.
+    '''
+
+class OptionalOf(QueryTerm):
+    '''
+    Doesn't restrict the matches, but returns the entity's components of these types, or None, alongside it.
+    '''
+
+class QuerySpec:
+    '''
+    A list of query terms split by kind and reduced to masks, built once per distinct list of terms.
+
+    Attributes:
+        all_types (list[Type[Component]]): The component types every match must have.
+        all_mask (int): The combined component bits of all_types.
+        any_types (list[tuple[Type[Component], ...]]): The component types of every AnyOf term.
+        any_masks (list[int]): The mask of every AnyOf term, a match must share a bit with each one.
+        none_mask (int): The component bits no match may have.
+        optional_types (list[Type[Component]]): The component types returned alongside every match.
+        filters (list[ComponentFilter]): The change detection filters.
+
+    Methods:
+        matches: Checks whether an entity's mask satisfies the structural terms.
+        is_plain: Checks whether the terms are only component types.
+    '''
+    def __init__(self, terms: Iterable[Type[Component] | ComponentFilter | QueryTerm]) -> None:
+        self.all_types: list[Type[Component]] = []
+        self.any_types: list[tuple[Type[Component], ...]] = []
+        self.any_masks: list[int] = []
+        self.none_mask = 0
+        self.optional_types: list[Type[Component]] = []
+        self.filters: list[ComponentFilter] = []
+        for term in terms:
+            if isinstance(term, ComponentFilter):
+                self.filters.append(term)
+            elif isinstance(term, AllOf):
+                self.all_types.extend(term.component_types)
+            elif isinstance(term, AnyOf):
+                self.any_types.append(term.component_types)
+                self.any_masks.append(term.mask)
+            elif isinstance(term, NoneOf):
+                self.none_mask |= term.mask
+            elif isinstance(term, OptionalOf):
+                self.optional_types.extend(term.component_types)
+            elif isinstance(term, QueryTerm):
+                raise TypeError(f'{term!r} is not a supported query term.')
+            else:
+                self.all_types.append(term)
+        self.all_mask = get_component_mask(self.all_types)
+
+    def matches(self, mask: int) -> bool:
+        '''
+        Checks whether an entity's mask has every all-of bit, at least one bit of every AnyOf term and no none-of bit.
+        '''
+        all_mask = self.all_mask
+        if mask & all_mask != all_mask or mask & self.none_mask:
+            return False
+        for any_mask in self.any_masks:
+            if not mask & any_mask:
+                return False
+        return True
+
+    def is_plain(self) -> bool:
+        return not (self.filters or self.any_masks or self.none_mask or self.optional_types)
+
+class QueryArrays:
+    '''
+    The result of a vectorized batch query: the matching entity ids plus, for every requested
+    component type, a gather index into that component pool's dense arrays.
+
+    `indices[component_type][i]` is the dense row of `entity_ids[i]` in the component's pool, so the
+    rows of every requested pool are aligned with each other through their index arrays. Scattering
+    marks the written rows as changed at `tick`, so change queries and spatial indexes see the writes.
+
+    Attributes:
+        component_types (tuple[Type[Component], ...]): The requested component types.
+        entity_ids (np.ndarray): The ids of the entities that have every requested component.
+        indices (dict[Type[Component], np.ndarray]): Gather indices into each pool's dense rows.
+        pools (dict[Type[Component], ComponentPool]): The pools the indices refer to.
+        tick (int): The change tick scattered rows are marked as changed at.
+
+    Methods:
+        gather: Retrieves a column of a ColumnarComponent aligned with entity_ids.
+        scatter: Writes values aligned with entity_ids back into a column of a ColumnarComponent.
+    '''
+    def __init__(
+        self,
+        component_types: tuple[Type[Component], ...],
+        entity_ids: Any,
+        indices: dict[Type[Component], Any],
+        pools: dict[Type[Component], ComponentPool],
+        tick: int = 0,
+    ) -> None:
+        self.component_types = component_types
+        self.entity_ids = entity_ids
+        self.indices = indices
+        self.pools = pools
+        self.tick = tick
+
+    def gather(self, component_type: Type[Component], name: str) -> Any:
+        '''
+        Retrieves a column of a ColumnarComponent aligned with entity_ids. The result is a copy,
+        use scatter to write changes back.
+
+        Args:
+            component_type (Type[Component]): The ColumnarComponent type.
+            name (str): The field name of the column.
+
+        Returns:
+            A NumPy array with one value per matching entity.
+        '''
+        pool = self.pools[component_type]
+        return pool.get_column(name)[self.indices[component_type]]
+
+    def scatter(self, component_type: Type[Component], name: str, values: Any):
+        '''
+        Writes values aligned with entity_ids back into a column of a ColumnarComponent and marks
+        the matching components as changed.
+
+        Args:
+            component_type (Type[Component]): The ColumnarComponent type.
+            name (str): The field name of the column.
+            values: A scalar or an array with one value per matching entity.
+        '''
+        pool = self.pools[component_type]
+        rows = self.indices[component_type]
+        pool.get_column(name)[rows] = values
+        pool.mark_rows_changed(rows, self.tick)
+
+    def __len__(self) -> int:
+        return len(self.entity_ids)
+
+def query_pool_arrays(component_pools: list[ComponentPool], tick: int = 0) -> QueryArrays:
+    '''
+    Intersects the dense entity ids of a set of component pools with NumPy set operations.
+
+    Args:
+        component_pools (list[ComponentPool]): The pools to intersect, sorted from smallest to largest.
+        tick (int, optional): The change tick `QueryArrays.scatter` marks written rows with.
+
+    Returns:
+        A QueryArrays holding the matching entity ids and a gather index into every pool. When more
+        than one pool is given the entity ids are sorted in ascending order.
+
+    Raises:
+        ImportError: If numpy is not installed.
+    '''
+    if np is None:
+        raise ImportError('Batch array queries require numpy to be installed.')
+
+    component_types = tuple(pool.component_type for pool in component_pools)
+    pools = {pool.component_type: pool for pool in component_pools}
+    if not component_pools:
+        return QueryArrays(component_types, np.zeros(0, dtype=np.int64), {}, pools, tick)
+
+    main_pool = component_pools[0]
+    entity_ids = np.asarray(main_pool.entity_ids, dtype=np.int64)
+    indices = {main_pool.component_type: np.arange(len(entity_ids), dtype=np.int64)}
+
+    for component_pool in component_pools[1:]:
+        pool_entity_ids = np.asarray(component_pool.entity_ids, dtype=np.int64)
+        entity_ids, current_rows, pool_rows = np.intersect1d(
+            entity_ids, pool_entity_ids, assume_unique=True, return_indices=True
+        )
+        for component_type, index in indices.items():
+            indices[component_type] = index[current_rows]
+        indices[component_pool.component_type] = pool_rows.astype(np.int64, copy=False)
+
+    return QueryArrays(component_types, entity_ids, indices, pools, tick)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
+from inspect import iscoroutinefunction
+from typing import TYPE_CHECKING, Type
+import asyncio
+
+if TYPE_CHECKING:
+    from .component import Component
+    from .entity_admin import EcsAdmin
+    from .system import System
+
+def systems_conflict(system_a: System, system_b: System) -> bool:
+    '''
+    Checks whether two systems can't run at the same time because one of them writes a
+    component type that the other reads or writes.
+
+    Args:
+        system_a (System): The first system.
+        system_b (System): The second system.
+
+    Returns:
+        True if the systems conflict, False if they can run together.
+    '''
+    reads_a, writes_a = system_a.get_component_access()
+    reads_b, writes_b = system_b.get_component_access()
+    return bool(writes_a & (reads_b | writes_b) or writes_b & reads_a)
+
+class Scheduler:
+    '''
+    Orders the systems that run every frame into stages based on the component types they read and write.
+
+    Systems that conflict keep the order in which they were added, and a system always runs after
+    the systems listed in its `run_after`. Systems within a stage don't conflict with each other, so
+    they are free to run at the same time. The admin's command buffers are flushed after every stage.
+
+    When `max_workers` is set, the systems of a stage are submitted to a thread pool and the stage
+    acts as a barrier: the next stage only starts once every system of the current one has finished.
+    This pays off for systems whose inner loops release the GIL, such as NumPy or I/O calls, and on
+    free-threaded CPython builds. Stages with a single system run on the calling thread, and errors
+    are raised in the order the systems were added so runs stay deterministic.
+
+    After every stage each of its systems records the admin's change tick as its `last_run_tick` and the
+    change tick is advanced, so change detection filters see everything that happened since a system last ran.
+    The admin's spatial indexes are updated after the command buffers are flushed. Advancing the change tick
+    through `EcsAdmin.increment_change_tick` also trims the change, removal and entity logs down to what some
+    scheduled system, delta recorder or spatial index hasn't seen yet, so they stay bounded after every stage.
+
+    Systems can implement `run` as an `async def`. Those stages have to be run through `run_async`, which
+    runs the synchronous systems of a stage in order and then awaits the asynchronous ones together.
+
+    Attributes:
+        ecs_admin (EcsAdmin): The admin whose command buffers are flushed between stages.
+        systems (list[System]): The scheduled systems in the order they were added.
+        max_workers (int | None): The number of worker threads, None to run every system on the calling thread.
+
+    Methods:
+        add_system: Adds a system to the schedule.
+        get_stages: Retrieves the systems grouped into stages, building them if needed.
+        run: Runs every stage once.
+        run_async: Runs every stage once on the running event loop.
+        shutdown: Shuts down the worker threads.
+    '''
+    def __init__(self, ecs_admin: EcsAdmin, max_workers: int | None = None) -> None:
+        self.ecs_admin = ecs_admin
+        self.systems: list[System] = []
+        self.max_workers = max_workers
+        self._async_systems: set[System] = set()
+        self._stages: list[list[System]] | None = None
+        self._executor: Executor | None = None
+
+    def add_system(self, system: System):
+        '''
+        Adds a system to the schedule. The stages are rebuilt on the next run.
+
+        Args:
+            system (System): The system to schedule. It must implement `run(dt)`.
+        '''
+        self.systems.append(system)
+        if iscoroutinefunction(type(system).run):
+            self._async_systems.add(system)
+        self._stages = None
+
+    def get_stages(self) -> list[list[System]]:
+        '''
+        Retrieves the systems grouped into stages. Every system is placed in the stage right after the
+        latest stage holding a system it depends on, either through a conflict with an earlier system or
+        through `run_after`.
+
+        Returns:
+            A list of stages, each a list of systems that can run at the same time.
+
+        Raises:
+            ValueError: If the `run_after` dependencies form a cycle.
+        '''
+        if self._stages is None:
+            self._stages = self._build_stages()
+        return self._stages
+
+    def _build_stages(self) -> list[list[System]]:
+        systems_by_type: dict[Type[System], list[int]] = {}
+        for index, system in enumerate(self.systems):
+            systems_by_type.setdefault(type(system), []).append(index)
+
+        dependencies: list[set[int]] = [set() for _ in self.systems]
+        for index, system in enumerate(self.systems):
+            for earlier_index in range(index):
+                if systems_conflict(self.systems[earlier_index], system):
+                    dependencies[index].add(earlier_index)
+            for system_type in system.run_after:
+                dependencies[index].update(systems_by_type.get(system_type, ()))
+
+        stage_indices: list[int | None] = [None] * len(self.systems)
+        visiting: set[int] = set()
+
+        def get_stage_index(index: int) -> int:
+            if stage_indices[index] is None:
+                if index in visiting:
+                    raise ValueError(f'{self.systems[index]} is part of a run_after cycle.')
+                visiting.add(index)
+                stage_indices[index] = max((get_stage_index(dependency) + 1 for dependency in dependencies[index]), default=0)
+                visiting.discard(index)
+            return stage_indices[index]
+
+        stages: list[list[System]] = []
+        for index, system in enumerate(self.systems):
+            stage_index = get_stage_index(index)
+            while len(stages) <= stage_index:
+                stages.append([])
+            stages[stage_index].append(system)
+        return stages
+
+    def run_stage(self, stage: list[System], dt: float):
+        '''
+        Runs every system in a stage.
+
+        Args:
+            stage (list[System]): The systems to run.
+            dt (float): The time step of the frame.
+
+        Raises:
+            TypeError: If a system in the stage has an asynchronous run method.
+        '''
+        if self._async_systems and not self._async_systems.isdisjoint(stage):
+            raise TypeError('Stages with async systems have to be run with run_async.')
+        if self.max_workers is None or len(stage) == 1:
+            for system in stage:
+                system.run(dt)
+            return
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ecs-system')
+        futures = [self._executor.submit(system.run, dt) for system in stage]
+        wait(futures)
+        for future in futures:
+            future.result()
+
+    def run(self, dt: float):
+        '''
+        Runs every stage once, flushing the admin's command buffers after each stage.
+
+        Args:
+            dt (float): The time step of the frame.
+        '''
+        for stage in self.get_stages():
+            self.run_stage(stage, dt)
+            self._end_stage(stage)
+
+    async def run_async(self, dt: float):
+        '''
+        Runs every stage once, awaiting the asynchronous systems of each stage together before moving
+        on to the next stage, and flushing the admin's command buffers after each stage.
+
+        Args:
+            dt (float): The time step of the frame.
+        '''
+        for stage in self.get_stages():
+            coroutines = []
+            for system in stage:
+                if system in self._async_systems:
+                    coroutines.append(system.run(dt))
+                else:
+                    system.run(dt)
+            if coroutines:
+                await asyncio.gather(*coroutines)
+            self._end_stage(stage)
+
+    def _end_stage(self, stage: list[System]):
+        ecs_admin = self.ecs_admin
+        for system in stage:
+            system.last_run_tick = ecs_admin.change_tick
+        ecs_admin.increment_change_tick()
+        ecs_admin.flush_commands()
+        for spatial_index in ecs_admin.spatial_indexes.values():
+            spatial_index.update()
+
+    def shutdown(self):
+        '''
+        Shuts down the worker threads. A new pool is started if the scheduler runs again.
+        '''
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,282 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING, Any, Type
+import weakref
+from .component_pool import ComponentPool, ColumnView
+from .system import System
+
+try:
+    import numpy as np
+except ImportError: # numpy is only required for ColumnarComponents
+    np = None
+
+if TYPE_CHECKING:
+    from .component import Component
+    from .entity_admin import EcsAdmin
+    from .interfaces import IEventBus
+    from .query import QueryArrays
+
+def _release_shared_memory(shared_memory: dict[str, SharedMemory], retired_shared_memory: list[SharedMemory]):
+    for block in shared_memory.values():
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+    for block in [*shared_memory.values(), *retired_shared_memory]:
+        try:
+            block.close()
+        except BufferError: # views of the column are still alive, the mapping is freed along with them
+            pass
+    shared_memory.clear()
+    retired_shared_memory.clear()
+
+class SharedMemoryComponentPool(ComponentPool):
+    '''
+    A ComponentPool that allocates the columns of ColumnarComponents in `multiprocessing.shared_memory`
+    so worker processes can map them without copying or pickling. Regular components are stored as usual.
+
+    Use it by setting `component_pool_type = SharedMemoryComponentPool` on an EcsAdmin. Only the main
+    process makes structural changes; workers only ever see views of the columns.
+
+    Attributes:
+        shared_memory (dict[str, SharedMemory]): The shared memory block backing each column.
+
+    Methods:
+        get_column_descriptors: Describes the columns so a worker process can attach to them.
+        close: Releases every shared memory block.
+    '''
+    def __init__(self, component_type: Type[Component], entity_capacity: int, max_pool_size: int | None = None) -> None:
+        self.shared_memory: dict[str, SharedMemory] = {}
+        self._retired_shared_memory: list[SharedMemory] = []
+        self._finalizer = weakref.finalize(self, _release_shared_memory, self.shared_memory, self._retired_shared_memory)
+        super().__init__(component_type, entity_capacity, max_pool_size)
+
+    def _allocate_column(self, name: str, dtype: Any, capacity: int) -> Any:
+        shared_memory = SharedMemory(create=True, size=max(capacity * dtype.itemsize, 1))
+        column = np.ndarray(capacity, dtype=dtype, buffer=shared_memory.buf)
+        column[:] = 0
+
+        old_shared_memory = self.shared_memory.get(name)
+        if old_shared_memory is not None:
+            # the old column is still mapped until it has been copied, only its name is released here
+            old_shared_memory.unlink()
+            self._retired_shared_memory.append(old_shared_memory)
+        self.shared_memory[name] = shared_memory
+        return column
+
+    def get_column_descriptors(self) -> dict[str, tuple[str, str, int]]:
+        '''
+        Describes the columns so a worker process can attach to them.
+
+        Returns:
+            A dictionary mapping each field name to its shared memory name, dtype and capacity.
+        '''
+        return {
+            name: (self.shared_memory[name].name, column.dtype.str, len(column))
+            for name, column in self.columns.items()
+        }
+
+    def close(self):
+        '''
+        Releases every shared memory block. The pool's columns can't be used afterwards.
+        '''
+        self._finalizer()
+
+_attached_shared_memory: dict[str, SharedMemory] = {}
+
+def _attach_column(descriptor: tuple[str, str, int]) -> Any:
+    name, dtype, capacity = descriptor
+    shared_memory = _attached_shared_memory.get(name)
+    if shared_memory is None:
+        shared_memory = SharedMemory(name=name)
+        _attached_shared_memory[name] = shared_memory
+    return np.ndarray(capacity, dtype=np.dtype(dtype), buffer=shared_memory.buf)
+
+def _release_stale_attachments(descriptors: dict[Any, dict[str, tuple[str, str, int]]]):
+    in_use = {descriptor[0] for columns in descriptors.values() for descriptor in columns.values()}
+    for name in list(_attached_shared_memory):
+        if name not in in_use:
+            try:
+                _attached_shared_memory.pop(name).close()
+            except BufferError: # a view is still alive, the mapping is freed along with it
+                pass
+
+def run_shard(
+    system_type: Type[ShardedSystem],
+    descriptors: dict[Type[Component], dict[str, tuple[str, str, int]]],
+    rows: dict[Type[Component], Any],
+    dt: float,
+):
+    '''
+    Runs one shard of a ShardedSystem in a worker process.
+
+    Args:
+        system_type (Type[ShardedSystem]): The system whose `run_chunk` is called.
+        descriptors (dict[Type[Component], dict[str, tuple[str, str, int]]]): The shared columns of every component type.
+        rows (dict[Type[Component], slice | np.ndarray]): The dense rows of the shard in each pool. A slice gives
+            zero-copy views; an index array is gathered and, for written components, scattered back.
+        dt (float): The time step of the frame.
+    '''
+    _release_stale_attachments(descriptors)
+    columns = {
+        component_type: {name: _attach_column(descriptor) for name, descriptor in component_columns.items()}
+        for component_type, component_columns in descriptors.items()
+    }
+    _run_chunk_views(system_type, columns, rows, dt)
+
+def _run_chunk_views(
+    system_type: Type[ShardedSystem],
+    columns: dict[Type[Component], dict[str, Any]],
+    rows: dict[Type[Component], Any],
+    dt: float,
+):
+    '''
+    Builds the ColumnViews of a chunk, runs the system's `run_chunk` on them and writes gathered columns back.
+    '''
+    views = {
+        component_type: ColumnView({name: column[rows[component_type]] for name, column in component_columns.items()})
+        for component_type, component_columns in columns.items()
+    }
+    system_type.run_chunk(views, dt)
+
+    for component_type in system_type.writes:
+        component_rows = rows.get(component_type)
+        if component_rows is None or isinstance(component_rows, slice):
+            continue
+        view = views[component_type]
+        for name, column in columns[component_type].items():
+            column[component_rows] = getattr(view, name)
+
+def _get_shard_rows(indices: Any, start: int, stop: int) -> Any:
+    shard_indices = indices[start:stop]
+    if len(shard_indices) and shard_indices[-1] - shard_indices[0] == len(shard_indices) - 1 and (
+        len(shard_indices) == 1 or bool(np.all(np.diff(shard_indices) == 1))
+    ):
+        return slice(int(shard_indices[0]), int(shard_indices[-1]) + 1)
+    return shard_indices
+
+def _mark_written(system: ShardedSystem, query: QueryArrays):
+    for component_type in system.writes:
+        query.pools[component_type].mark_rows_changed(query.indices[component_type], query.tick)
+
+class ShardedSystem(System):
+    '''
+    A System whose work is split into chunks over the dense rows of ColumnarComponent pools, so it
+    can run on several worker processes at once.
+
+    Subclasses implement `run_chunk` as a staticmethod. It receives a ColumnView per required component
+    holding the chunk's values and must not touch entities or the admin. The system and component
+    classes must be importable by the worker processes. When the admin has no shard workers the
+    chunks run in the main process, in order.
+
+    Only required components get a view, so every component listed in `writes` must also be required.
+    After the chunks have run, every row of the written pools that matched the query is marked as changed.
+
+    Attributes:
+        n_shards (int | None): The number of chunks per run, defaults to the number of shard workers.
+    '''
+    n_shards: int | None = None
+
+    def __init__(self, ecs_admin: EcsAdmin, event_bus: IEventBus):
+        '''
+        Raises:
+            ValueError: If the system writes a component type it doesn't require.
+        '''
+        unrequired_writes = [component_type for component_type in self.writes if component_type not in self.required_components]
+        if unrequired_writes:
+            names = ', '.join(component_type.__name__ for component_type in unrequired_writes)
+            raise ValueError(f'{self.__class__.__name__} writes {names} without requiring it, sharded systems only see their required components.')
+        super().__init__(ecs_admin, event_bus)
+
+    @staticmethod
+    def run_chunk(views: dict[Type[Component], ColumnView], dt: float):
+        '''
+        Processes one chunk of entities.
+
+        Args:
+            views (dict[Type[Component], ColumnView]): The chunk's columns for every required component.
+                In-place changes to components listed in `writes` are written back to the pools.
+            dt (float): The time step of the frame.
+        '''
+        raise NotImplementedError('run_chunk has not been defined.')
+
+    def run(self, dt: float):
+        shard_runner = self.ecs_admin.shard_runner
+        if shard_runner is None:
+            query = self.query_arrays(self.required_components)
+            columns = {component_type: pool.columns for component_type, pool in query.pools.items()}
+            rows = {component_type: _get_shard_rows(indices, 0, len(indices)) for component_type, indices in query.indices.items()}
+            if len(query):
+                _run_chunk_views(type(self), columns, rows, dt)
+                _mark_written(self, query)
+        else:
+            shard_runner.run_system(self, dt)
+
+class ShardRunner:
+    '''
+    Runs ShardedSystems on a process pool over shared memory component columns.
+
+    The main process computes which dense rows of every pool match the system's query, splits them
+    into shards and sends each worker only the shared memory names and its row range. Workers map the
+    columns without copying and never receive Entity objects.
+
+    Attributes:
+        ecs_admin (EcsAdmin): The admin whose pools are shared with the workers.
+        max_workers (int): The number of worker processes.
+
+    Methods:
+        run_system: Runs every shard of a system and waits for them to finish.
+        shutdown: Shuts down the worker processes.
+    '''
+    def __init__(self, ecs_admin: EcsAdmin, max_workers: int, mp_context: Any = None) -> None:
+        self.ecs_admin = ecs_admin
+        self.max_workers = max_workers
+        self._mp_context = mp_context
+        self._executor: ProcessPoolExecutor | None = None
+
+    def run_system(self, system: ShardedSystem, dt: float):
+        '''
+        Runs every shard of a system and waits for them to finish.
+
+        Args:
+            system (ShardedSystem): The system to run.
+            dt (float): The time step of the frame.
+
+        Raises:
+            TypeError: If a required component pool is not a SharedMemoryComponentPool.
+        '''
+        query = self.ecs_admin.query_arrays(system.required_components)
+        if not len(query):
+            return
+
+        descriptors = {}
+        for component_type, pool in query.pools.items():
+            if not isinstance(pool, SharedMemoryComponentPool) or pool.columns is None:
+                raise TypeError(f'{component_type.__name__} must be a ColumnarComponent stored in a SharedMemoryComponentPool.')
+            descriptors[component_type] = pool.get_column_descriptors()
+
+        n_shards = min(system.n_shards or self.max_workers, len(query))
+        bounds = [len(query) * shard // n_shards for shard in range(n_shards + 1)]
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._mp_context)
+        futures = [
+            self._executor.submit(
+                run_shard, type(system), descriptors,
+                {component_type: _get_shard_rows(indices, start, stop) for component_type, indices in query.indices.items()},
+                dt,
+            )
+            for start, stop in zip(bounds, bounds[1:])
+        ]
+        for future in futures:
+            future.result()
+        _mark_written(system, query)
+
+    def shutdown(self):
+        '''
+        Shuts down the worker processes. A new pool is started if a system runs again.
+        '''
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,253 @@
+from __future__ import annotations
+from array import array
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Type
+import json
+import mmap
+import pickle
+import struct
+from .entity import Entity
+from .hierarchy import NO_ENTITY
+
+try:
+    import numpy as np
+except ImportError: # numpy is only required for ColumnarComponents
+    np = None
+
+if TYPE_CHECKING:
+    from .component import Component
+    from .entity_admin import EcsAdmin
+
+SNAPSHOT_MAGIC = b'ECSS'
+SNAPSHOT_VERSION = 1
+_PREAMBLE = struct.Struct('<4sHQ') # magic, version, header size
+_ALIGNMENT = 8
+
+def get_type_name(component_type: Type[Component]) -> str:
+    '''
+    Builds the name a component type is stored under in a snapshot.
+
+    Args:
+        component_type (Type[Component]): The component type.
+
+    Returns:
+        The type's module and qualified name, separated by a colon.
+    '''
+    return f'{component_type.__module__}:{component_type.__qualname__}'
+
+def resolve_type_name(type_name: str, known_types: dict[str, Type[Component]] | None = None) -> Type[Component]:
+    '''
+    Resolves a name built by get_type_name back to its component type.
+
+    Args:
+        type_name (str): The stored type name.
+        known_types (dict[str, Type[Component]], optional): Types to check before importing the module.
+
+    Returns:
+        The component type.
+
+    Raises:
+        ValueError: If the type can't be imported.
+    '''
+    if known_types and type_name in known_types:
+        return known_types[type_name]
+    module_name, _, qualname = type_name.partition(':')
+    try:
+        resolved: Any = import_module(module_name)
+        for attribute in qualname.split('.'):
+            resolved = getattr(resolved, attribute)
+    except (ImportError, AttributeError) as error:
+        raise ValueError(f'The component type {type_name} can\'t be imported.') from error
+    return resolved
+
+class _BlockWriter:
+    '''
+    Lays out the binary blocks of a snapshot, aligning each one so it can be viewed in place once mapped.
+    '''
+    def __init__(self) -> None:
+        self.blocks: list[Any] = []
+        self.size = 0
+
+    def add(self, buffer: Any) -> list[int]:
+        buffer = memoryview(buffer).cast('B')
+        padding = -self.size % _ALIGNMENT
+        if padding:
+            self.blocks.append(bytes(padding))
+            self.size += padding
+        offset = self.size
+        self.blocks.append(buffer)
+        self.size += len(buffer)
+        return [offset, len(buffer)]
+
+def save_snapshot(ecs_admin: EcsAdmin, path: str):
+    '''
+    Writes the state of every entity, component pool, singleton component and parent link to a binary file.
+
+    The file starts with a small JSON header describing where each block lives, followed by the blocks:
+    the EntityManager's generations and recycled ids, the alive entity ids, the ids of every entity with a
+    parent and of that parent in depth order and, per component type, the pool's dense entity ids and either
+    its column arrays (ColumnarComponents, written straight from the NumPy buffers) or one pickle of every
+    component's `serialize()` result.
+
+    Args:
+        ecs_admin (EcsAdmin): The admin to snapshot.
+        path (str): The file to write.
+
+    Raises:
+        NotImplementedError: If a component or singleton component doesn't implement serialize.
+    '''
+    entity_manager = ecs_admin.entity_manager
+    writer = _BlockWriter()
+    header: dict[str, Any] = {
+        'max_entities': entity_manager.max_entities,
+        'next_id': entity_manager.next_id,
+        'generations': writer.add(entity_manager.generations),
+        'destroyed_entity_ids': writer.add(array('q', entity_manager.destroyed_entity_ids)),
+        'entity_ids': writer.add(array('q', ecs_admin.entity_map)),
+        'components': [],
+        'singleton_components': [],
+    }
+    if ecs_admin.hierarchy is not None:
+        entity_ids, parent_ids = ecs_admin.hierarchy.get_depth_sorted_ids()
+        links = [(entity_id, parent_id) for entity_id, parent_id in zip(entity_ids, parent_ids) if parent_id != NO_ENTITY]
+        header['children'] = writer.add(array('q', [entity_id for entity_id, parent_id in links]))
+        header['parents'] = writer.add(array('q', [parent_id for entity_id, parent_id in links]))
+
+    for component_type, component_pool in ecs_admin.component_pools.items():
+        if not component_pool.entity_ids:
+            continue
+        section: dict[str, Any] = {
+            'type': get_type_name(component_type),
+            'entity_ids': writer.add(array('q', component_pool.entity_ids)),
+        }
+        if component_pool.columns is not None:
+            section['columns'] = {
+                name: [column.dtype.str, *writer.add(np.ascontiguousarray(component_pool.get_column(name)))]
+                for name, column in component_pool.columns.items()
+            }
+        else:
+            values = [entity.components[component_type].serialize() for entity in component_pool.entities]
+            section['values'] = writer.add(pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL))
+        header['components'].append(section)
+
+    for component_type, component in ecs_admin._singleton_components.items():
+        header['singleton_components'].append({
+            'type': get_type_name(component_type),
+            'value': writer.add(pickle.dumps(component.serialize(), protocol=pickle.HIGHEST_PROTOCOL)),
+        })
+
+    encoded_header = json.dumps(header, separators=(',', ':')).encode()
+    preamble_size = _PREAMBLE.size + len(encoded_header)
+    with open(path, 'wb') as file:
+        file.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(encoded_header)))
+        file.write(encoded_header)
+        file.write(bytes(-preamble_size % _ALIGNMENT))
+        for block in writer.blocks:
+            file.write(block)
+
+def load_snapshot(ecs_admin: EcsAdmin, path: str, use_mmap: bool = True):
+    '''
+    Replaces the admin's entities, component pools, singleton components and hierarchy with the contents of
+    a snapshot written by save_snapshot. Every pool's dense arrays are restored in the saved order, so the
+    sparse sets end up identical, and children keep the order of their siblings. Every component is decoded
+    before the admin's current entities are destroyed, so a snapshot that fails to decode leaves the world
+    untouched. Snapshots may contain pickled data, so only load files you trust.
+
+    Args:
+        ecs_admin (EcsAdmin): The admin to restore into. Its systems, queries and builders are kept.
+        path (str): The snapshot file.
+        use_mmap (bool): Memory-maps the file instead of reading it, so column blocks are copied
+            straight from the page cache into the pools.
+
+    Raises:
+        ValueError: If the file isn't a snapshot, has an unsupported version or holds more entities than the admin can.
+        NotImplementedError: If a stored component type doesn't implement deserialize.
+    '''
+    with open(path, 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if use_mmap else file.read()
+    view = memoryview(buffer)
+    try:
+        _restore(ecs_admin, view)
+    finally:
+        view.release()
+        if use_mmap:
+            try:
+                buffer.close()
+            except BufferError: # an array still views the mapping, it is freed along with it
+                pass
+
+def _restore(ecs_admin: EcsAdmin, view: memoryview):
+    if len(view) < _PREAMBLE.size:
+        raise ValueError('The file is not an ECS snapshot.')
+    magic, version, header_size = _PREAMBLE.unpack_from(view)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError('The file is not an ECS snapshot.')
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f'Snapshot version {version} is not supported.')
+    header = json.loads(bytes(view[_PREAMBLE.size:_PREAMBLE.size + header_size]))
+    preamble_size = _PREAMBLE.size + header_size
+    data = view[preamble_size + -preamble_size % _ALIGNMENT:]
+
+    entity_manager = ecs_admin.entity_manager
+    if header['max_entities'] > entity_manager.max_entities:
+        raise ValueError(f"The snapshot holds up to {header['max_entities']} entities but the admin only supports {entity_manager.max_entities}.")
+
+    def read_array(typecode: str, block: list[int]) -> array:
+        values = array(typecode)
+        values.frombytes(data[block[0]:block[0] + block[1]])
+        return values
+
+    known_types = {get_type_name(component_type): component_type for component_type in ecs_admin.component_pools}
+    known_types.update({get_type_name(component_type): component_type for component_type in ecs_admin._singleton_components})
+    for section in header['components'] + header['singleton_components']:
+        section['type'] = resolve_type_name(section['type'], known_types)
+
+    # everything that can fail is decoded before the live world is touched
+    component_sections = []
+    for section in header['components']:
+        component_type = section['type']
+        entity_ids = read_array('q', section['entity_ids'])
+        if 'columns' in section:
+            component_pool = ecs_admin.get_component_pool(component_type)
+            template = component_type()
+            components = [component_pool.clone_component_obj(template) for _ in entity_ids]
+        else:
+            offset, size = section['values']
+            components = [component_type.deserialize(value) for value in pickle.loads(data[offset:offset + size])]
+        component_sections.append((component_type, entity_ids, components, section.get('columns', {})))
+    singleton_components = []
+    for section in header['singleton_components']:
+        offset, size = section['value']
+        singleton_components.append(section['type'].deserialize(pickle.loads(data[offset:offset + size])))
+    links = []
+    if 'children' in header:
+        links = list(zip(read_array('q', header['children']), read_array('q', header['parents'])))
+
+    ecs_admin.destroy_entities(list(ecs_admin.entity_map.values()))
+    generations = read_array('I', header['generations'])
+    entity_manager.generations[:len(generations)] = generations
+    entity_manager.next_id = header['next_id']
+    entity_manager.destroyed_entity_ids = read_array('q', header['destroyed_entity_ids']).tolist()
+
+    entities: dict[int, Entity] = {}
+    for entity_id in read_array('q', header['entity_ids']):
+        entity = Entity(entity_id, entity_manager.generations[entity_id])
+        entities[entity_id] = entity
+        ecs_admin._add_entity(entity)
+
+    for component_type, entity_ids, components, columns in component_sections:
+        component_entities = [entities[entity_id] for entity_id in entity_ids]
+        ecs_admin._attach_components(component_type, list(zip(component_entities, components)))
+
+        component_pool = ecs_admin.get_component_pool(component_type)
+        for name, (dtype, offset, size) in columns.items():
+            column = np.frombuffer(data, dtype=np.dtype(dtype), count=len(component_entities), offset=offset)
+            component_pool.get_column(name)[:] = column
+            del column
+
+    for component in singleton_components:
+        ecs_admin.add_singleton_component(component)
+
+    # children are attached in front of their siblings, so the reversed order rebuilds the saved one
+    for entity_id, parent_id in reversed(links):
+        ecs_admin.set_parent(entities[entity_id], entities[parent_id])
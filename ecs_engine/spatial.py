@@ -0,0 +1,278 @@
+from __future__ import annotations
+from heapq import nsmallest
+from itertools import product
+from math import ceil, dist, floor
+from typing import TYPE_CHECKING, Iterable, Sequence, Type
+
+if TYPE_CHECKING:
+    from .component import Component
+    from .entity import Entity
+    from .entity_admin import EcsAdmin
+
+class SpatialIndex:
+    '''
+    A uniform grid over the positions stored in one component type, so neighbour queries only visit the
+    cells around the query instead of every entity.
+
+    Positions are read from the component's `fields`, x and y by default; pass three fields for 3D. Like a
+    system, the index follows the pool's change ticks: `update` re-files the entities whose component was
+    added or marked as changed and drops the ones whose component was removed, including destroyed entities,
+    since the previous update. Writes through `mark_changed`, `QueryArrays.scatter` and the `writes` of a
+    ShardedSystem are marked as changes; columns modified any other way, for example through
+    `ComponentPool.get_column`, have to be reported with `mark_rows_changed` or `mark_all_changed`. The
+    scheduler updates every index after each stage, so code that moves entities outside of scheduled
+    systems has to call `update` itself. Results are checked against the pool, so an entity destroyed since
+    the last update is never returned.
+
+    Queries cost O(1) per visited cell plus the entities stored in it, so the cell size should be close to
+    the typical query radius.
+
+    Attributes:
+        ecs_admin (EcsAdmin): The admin whose entities are indexed.
+        component_type (Type[Component]): The component type holding the positions.
+        cell_size (float): The edge length of a grid cell.
+        fields (tuple[str, ...]): The component attributes holding each coordinate.
+        last_run_tick (int): The admin's change tick at the last update.
+
+    Methods:
+        update: Applies the changes made to the component's pool since the previous update.
+        get_position: Retrieves the position an entity is indexed at.
+        query_radius: Retrieves the entities within a distance of a point.
+        query_aabb: Retrieves the entities inside an axis-aligned box.
+        query_nearest: Retrieves the entities closest to a point.
+        get_candidate_pairs: Retrieves the pairs of entities close enough to collide, for broad-phase collision.
+    '''
+    def __init__(
+        self,
+        ecs_admin: EcsAdmin,
+        component_type: Type[Component],
+        cell_size: float,
+        fields: Sequence[str] = ('x', 'y'),
+    ) -> None:
+        if cell_size <= 0:
+            raise ValueError('The cell size of a spatial index must be positive.')
+        if not fields:
+            raise ValueError('A spatial index needs at least one position field.')
+        self.ecs_admin = ecs_admin
+        self.component_type = component_type
+        self.cell_size = cell_size
+        self.fields = tuple(fields)
+        self._pool = ecs_admin.get_component_pool(component_type)
+        self._cells: dict[tuple[int, ...], dict[int, Entity]] = {}
+        self._entities: dict[int, Entity] = {}
+        self._positions: dict[int, tuple[float, ...]] = {}
+        self._entity_cells: dict[int, tuple[int, ...]] = {}
+        self._min_cell: list[int] | None = None
+        self._max_cell: list[int] | None = None
+
+        for entity in self._pool.entities:
+            self._insert(entity)
+        self.last_run_tick = ecs_admin.change_tick
+        ecs_admin.increment_change_tick()
+
+    def _get_cell(self, position: Iterable[float]) -> tuple[int, ...]:
+        cell_size = self.cell_size
+        return tuple(floor(value / cell_size) for value in position)
+
+    def _insert(self, entity: Entity):
+        component = entity.components[self.component_type]
+        position = tuple(getattr(component, field) for field in self.fields)
+        cell = self._get_cell(position)
+        entity_id = entity.id
+        old_cell = self._entity_cells.get(entity_id)
+        if old_cell != cell:
+            if old_cell is not None:
+                self._remove_from_cell(entity_id, old_cell)
+            self._cells.setdefault(cell, {})[entity_id] = entity
+            self._entity_cells[entity_id] = cell
+            if self._min_cell is None:
+                self._min_cell, self._max_cell = list(cell), list(cell)
+            else:
+                for axis, value in enumerate(cell):
+                    if value < self._min_cell[axis]:
+                        self._min_cell[axis] = value
+                    elif value > self._max_cell[axis]:
+                        self._max_cell[axis] = value
+        else:
+            self._cells[cell][entity_id] = entity
+        self._entities[entity_id] = entity
+        self._positions[entity_id] = position
+
+    def _remove(self, entity_id: int):
+        self._remove_from_cell(entity_id, self._entity_cells.pop(entity_id))
+        del self._entities[entity_id]
+        del self._positions[entity_id]
+
+    def _remove_from_cell(self, entity_id: int, cell: tuple[int, ...]):
+        cell_entities = self._cells[cell]
+        del cell_entities[entity_id]
+        if not cell_entities:
+            del self._cells[cell]
+
+    def update(self):
+        '''
+        Applies the changes made to the component's pool since the previous update: entities whose component
+        was added or marked as changed are re-filed, and entities whose component was removed are dropped.
+        '''
+        tick = self.last_run_tick
+        for entity in self._pool.get_removed_since(tick):
+            if self._entities.get(entity.id) is entity:
+                self._remove(entity.id)
+        for entity in self._pool.get_changed_since(tick):
+            self._insert(entity)
+        self.last_run_tick = self.ecs_admin.change_tick
+        self.ecs_admin.increment_change_tick()
+
+    def get_position(self, entity: Entity) -> tuple[float, ...] | None:
+        '''
+        Retrieves the position an entity is indexed at, None if it isn't indexed.
+        '''
+        if self._entities.get(entity.id) is not entity:
+            return None
+        return self._positions[entity.id]
+
+    def _iter_cells(self, low: Sequence[int], high: Sequence[int]) -> Iterable[dict[int, Entity]]:
+        n_cells = 1
+        for low_value, high_value in zip(low, high):
+            n_cells *= high_value - low_value + 1
+        cells = self._cells
+        if n_cells > len(cells):
+            return [
+                cell_entities for cell, cell_entities in cells.items()
+                if all(low_value <= value <= high_value for value, low_value, high_value in zip(cell, low, high))
+            ]
+        return [cells[cell] for cell in product(*(range(low_value, high_value + 1) for low_value, high_value in zip(low, high))) if cell in cells]
+
+    def query_radius(self, center: Sequence[float], radius: float) -> list[Entity]:
+        '''
+        Retrieves the entities whose indexed position lies within a distance of a point.
+
+        Args:
+            center (Sequence[float]): The point, with one coordinate per field.
+            radius (float): The maximum distance, inclusive.
+
+        Returns:
+            A list of the matching Entity instances.
+        '''
+        low = self._get_cell(value - radius for value in center)
+        high = self._get_cell(value + radius for value in center)
+        positions, contains_entity = self._positions, self._pool.contains_entity
+        return [
+            entity
+            for cell_entities in self._iter_cells(low, high)
+            for entity_id, entity in cell_entities.items()
+            if dist(positions[entity_id], center) <= radius and contains_entity(entity)
+        ]
+
+    def query_aabb(self, min_corner: Sequence[float], max_corner: Sequence[float]) -> list[Entity]:
+        '''
+        Retrieves the entities whose indexed position lies inside an axis-aligned box.
+
+        Args:
+            min_corner (Sequence[float]): The lowest coordinate of the box on every axis, inclusive.
+            max_corner (Sequence[float]): The highest coordinate of the box on every axis, inclusive.
+
+        Returns:
+            A list of the matching Entity instances.
+        '''
+        positions, contains_entity = self._positions, self._pool.contains_entity
+        return [
+            entity
+            for cell_entities in self._iter_cells(self._get_cell(min_corner), self._get_cell(max_corner))
+            for entity_id, entity in cell_entities.items()
+            if all(low <= value <= high for value, low, high in zip(positions[entity_id], min_corner, max_corner))
+            and contains_entity(entity)
+        ]
+
+    def query_nearest(self, center: Sequence[float], k: int, max_distance: float | None = None) -> list[Entity]:
+        '''
+        Retrieves the entities closest to a point. Cells are visited in rings of growing size around the
+        point's cell, stopping as soon as no unvisited cell can hold a closer entity.
+
+        Args:
+            center (Sequence[float]): The point, with one coordinate per field.
+            k (int): The maximum number of entities to retrieve.
+            max_distance (float, optional): Ignores entities further away than this.
+
+        Returns:
+            Up to k Entity instances, closest first. Ties are ordered by entity id.
+        '''
+        if k <= 0 or self._min_cell is None:
+            return []
+        center_cell = self._get_cell(center)
+        max_ring = max(
+            max(value - low, high - value) for value, low, high in zip(center_cell, self._min_cell, self._max_cell)
+        )
+        cells, positions, contains_entity = self._cells, self._positions, self._pool.contains_entity
+        candidates: list[tuple[float, int, Entity]] = []
+
+        def add_candidates(cell_entities: dict[int, Entity]):
+            for entity_id, entity in cell_entities.items():
+                distance = dist(positions[entity_id], center)
+                if (max_distance is None or distance <= max_distance) and contains_entity(entity):
+                    candidates.append((distance, entity_id, entity))
+
+        for ring in range(max_ring + 1):
+            if (2 * ring + 1) ** len(center_cell) > len(cells):
+                # the ring covers more cells than are occupied, finish with the remaining cells directly
+                for cell, cell_entities in cells.items():
+                    if max(abs(value - center_value) for value, center_value in zip(cell, center_cell)) >= ring:
+                        add_candidates(cell_entities)
+                break
+            for offset in product(range(-ring, ring + 1), repeat=len(center_cell)):
+                if max(map(abs, offset)) == ring:
+                    cell_entities = cells.get(tuple(value + delta for value, delta in zip(center_cell, offset)))
+                    if cell_entities:
+                        add_candidates(cell_entities)
+            reach = ring * self.cell_size
+            if max_distance is not None and reach > max_distance:
+                break
+            if len(candidates) >= k and nsmallest(k, candidates, key=lambda candidate: candidate[:2])[-1][0] <= reach:
+                break
+        return [entity for _, _, entity in nsmallest(k, candidates, key=lambda candidate: candidate[:2])]
+
+    def get_candidate_pairs(self, distance: float | None = None) -> list[tuple[Entity, Entity]]:
+        '''
+        Retrieves the pairs of entities that are close enough to collide, visiting every pair of neighbouring
+        cells once.
+
+        Args:
+            distance (float, optional): Only keeps the pairs whose indexed positions are within this distance.
+                By default every pair of entities in the same or adjacent cells is returned.
+
+        Returns:
+            A list of (Entity, Entity) tuples with the lower entity id first.
+        '''
+        reach = 1 if distance is None else max(1, ceil(distance / self.cell_size))
+        n_dimensions = len(self.fields)
+        forward_offsets = [
+            offset for offset in product(range(-reach, reach + 1), repeat=n_dimensions) if offset > (0,) * n_dimensions
+        ]
+        contains_entity, positions = self._pool.contains_entity, self._positions
+        live_cells = {
+            cell: [(entity_id, entity) for entity_id, entity in cell_entities.items() if contains_entity(entity)]
+            for cell, cell_entities in self._cells.items()
+        }
+
+        pairs: list[tuple[Entity, Entity]] = []
+        def add_pair(entity_id_a: int, entity_a: Entity, entity_id_b: int, entity_b: Entity):
+            if distance is None or dist(positions[entity_id_a], positions[entity_id_b]) <= distance:
+                pairs.append((entity_a, entity_b) if entity_id_a < entity_id_b else (entity_b, entity_a))
+
+        for cell, cell_entities in live_cells.items():
+            for index, (entity_id_a, entity_a) in enumerate(cell_entities):
+                for entity_id_b, entity_b in cell_entities[index + 1:]:
+                    add_pair(entity_id_a, entity_a, entity_id_b, entity_b)
+            for offset in forward_offsets:
+                neighbour_entities = live_cells.get(tuple(value + delta for value, delta in zip(cell, offset)))
+                if neighbour_entities:
+                    for entity_id_a, entity_a in cell_entities:
+                        for entity_id_b, entity_b in neighbour_entities:
+                            add_pair(entity_id_a, entity_a, entity_id_b, entity_b)
+        return pairs
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.component_type.__name__}, cell_size={self.cell_size}, entities={len(self._entities)})"
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from abc import abstractmethod, ABC
-from typing import TYPE_CHECKING, Type, Callable, TypeVar
+from typing import TYPE_CHECKING, Any, Type, Callable, TypeVar
 from functools import wraps
 from .events import subscribe_to_event, subscribe_to_events
 
@@ -11,6 +11,8 @@ if TYPE_CHECKING:
     from .interfaces import IEventBus
     from .entity_builder import Builder
     from .entity_admin import EcsAdmin
+    from .query import ComponentFilter, Query, QueryArrays, QueryTerm
+    from .command_buffer import CommandBuffer
 
     T = TypeVar('T', bound=SingletonComponent)
     B = TypeVar('B', bound=Builder)
@@ -22,12 +24,27 @@ class System(ABC):
     This class provides mechanisms to subscribe to events, publish events, and access entities and
     components relevant to the system's functionality.
     
+    Systems that override `run` are added to the admin's Scheduler and run once per `EcsAdmin.tick`.
+    Their component access is declared through `reads` and `writes`; required components that aren't
+    written are treated as reads.
+
     Attributes:
+        required_components (list[Type[Component]]): Component types an entity must have to be processed by the system.
+        reads (list[Type[Component]]): Additional component types the system reads.
+        writes (list[Type[Component]]): Component types the system writes.
+        run_after (list[Type[System]]): System types that must run before this system each frame.
         _required_components (list[Type[Component]]): A list of component types required by the system.
         ecs_admin (IEcsAdmin): The central ECS administration interface, providing access to entities and components.
         event_bus (IEventBus): The event bus for subscribing to and publishing events.
+        commands (CommandBuffer): The system's own command buffer, used to defer structural changes while iterating.
+            It is flushed by the admin at every sync point.
+        last_run_tick (int): The admin's change tick when the system last ran, 0 if it hasn't run yet.
+            Change detection filters only match changes made after it.
     '''
     required_components = []
+    reads: list[Type[Component]] = []
+    writes: list[Type[Component]] = []
+    run_after: list[Type[System]] = []
 
     def __init__(self, ecs_admin: EcsAdmin, event_bus: IEventBus):
         '''
@@ -38,10 +55,42 @@ class System(ABC):
         self._required_components: list[Type[Component]] = self.required_components
         self.ecs_admin: EcsAdmin= ecs_admin
         self.event_bus: IEventBus = event_bus
+        self.commands: CommandBuffer = ecs_admin.create_command_buffer()
+        self._required_query: Query | None = None
+        self._component_access: tuple[frozenset[Type[Component]], frozenset[Type[Component]]] | None = None
+        self.last_run_tick = 0
         subscribe_to_events(self)
             
         super().__init__()
     
+    def run(self, dt: float):
+        '''
+        Runs the system for one frame. Override this to have the system scheduled by `EcsAdmin.tick`.
+
+        Args:
+            dt (float): The time step of the frame.
+        '''
+        raise NotImplementedError(f'{self.__class__.__name__} has not defined a run method.')
+
+    def is_scheduled(self) -> bool:
+        '''
+        Checks whether the system overrides `run` and should be added to the scheduler.
+        '''
+        return type(self).run is not System.run
+
+    def get_component_access(self) -> tuple[frozenset[Type[Component]], frozenset[Type[Component]]]:
+        '''
+        Retrieves the component types the system reads and writes.
+
+        Returns:
+            A tuple of the read component types and the written component types.
+        '''
+        if self._component_access is None:
+            writes = frozenset(self.writes)
+            reads = frozenset(self.reads) | frozenset(self.required_components)
+            self._component_access = (reads - writes, writes)
+        return self._component_access
+
     def publish_event(self, event_name: str, **kwargs):
         '''
         Publishes an event through the event bus.
@@ -52,6 +101,16 @@ class System(ABC):
         '''
         self.event_bus.publish(event_name, **kwargs)
             
+    def queue_event(self, payload: Any, event_name: str | None = None):
+        '''
+        Queues an event payload through the event bus, delivered when the admin flushes its events.
+
+        Args:
+            payload (Any): The payload to deliver.
+            event_name (str, optional): The event name, defaults to the payload's type.
+        '''
+        self.event_bus.queue(payload, event_name)
+
     def get_singleton_component(self, component: Type[T]) -> T:
         '''
         Retrieves a singleton component instance.
@@ -91,21 +150,44 @@ class System(ABC):
     def destroy_entity(self, entity: Entity):
         self.ecs_admin.destroy_entity(entity)
         
-    def get_required_entities(self) -> list[Entity]:
+    def get_required_entities(self) -> Query:
         '''
         Retrieves all entities that possess all of the system's required components.
+        The query is resolved once and then kept up to date by the EcsAdmin, so this is O(1).
         
         Returns:
-            A list of Entity instances that meet the system's component requirements.
+            A live Query view of the Entity instances that meet the system's component requirements.
         '''
-        return self.ecs_admin.get_entities_intersect(self.required_components)
+        if self._required_query is None:
+            self._required_query = self.ecs_admin.get_query(self._required_components)
+        return self._required_query
     
-    def get_entities_intersect(self, component_types:list[Type[Component]]) -> list[Entity]:
-        return self.ecs_admin.get_entities_intersect(component_types)
+    def get_entities_intersect(self, component_types: list[Type[Component] | ComponentFilter | QueryTerm]) -> list:
+        '''
+        Retrieves all entities that have every component type. Change detection filters such as
+        `Changed[Position]` or `Added[Health]` can be mixed in to only match entities whose components
+        changed since the system last ran, and query terms such as `NoneOf[Frozen]`, `AnyOf[Player, Enemy]`
+        or `OptionalOf[Sprite]` to refine the match.
+
+        Args:
+            component_types (list[Type[Component] | ComponentFilter | QueryTerm]): The component types, filters
+                and terms to match.
+
+        Returns:
+            A list of the matching Entity instances, or of (Entity, *optional components) tuples when the
+            terms include `OptionalOf`.
+        '''
+        return self.ecs_admin.get_entities_filtered(component_types, self.last_run_tick)
+
+    def mark_changed(self, entity: Entity, component_type: Type[Component]):
+        self.ecs_admin.mark_changed(entity, component_type)
     
     def get_entities_union(self, component_types:list[Type[Component]]) -> list[Entity]:
         return self.ecs_admin.get_entities_union(component_types)
 
+    def query_arrays(self, component_types: list[Type[Component]]) -> QueryArrays:
+        return self.ecs_admin.query_arrays(component_types)
+
     
     def __str__(self) -> str:
         return f"{self.__class__.__name__}"
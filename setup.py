@@ -8,6 +8,9 @@ setup(
     version='0.5.4',
     packages=find_packages(),
     install_requires=[],
+    extras_require={
+        'numpy': ['numpy'],
+    },
     
     #
     author='Jacob Simerly',
@@ -1,13 +1,35 @@
 from typing import Any
+import asyncio
+import json
+import math
+import os
+import random
+import tempfile
+import threading
 import unittest
 from unittest.mock import MagicMock, patch
-from ecs_engine.component import Component, SingletonComponent
-from ecs_engine.entity import Entity
-from ecs_engine.component_pool import ComponentPool
+from ecs_engine.component import Component, SingletonComponent, ColumnarComponent
+from ecs_engine.entity import Entity, get_handle_index, get_handle_generation
+from ecs_engine.component_pool import ComponentPool, SparseArray, SPARSE_PAGE_SIZE
 from ecs_engine.entity_admin import EcsAdmin
 from ecs_engine.system import System, subscribe_to_event
 from ecs_engine.entity_manager import EntityManager
-from ecs_engine.entity_builder import Builder
+from ecs_engine.entity_builder import Builder, Prefab
+from ecs_engine.archetype import ArchetypeGraph
+from ecs_engine.query import Query, Added, Changed, Removed, AllOf, AnyOf, NoneOf, OptionalOf
+from ecs_engine.command_buffer import CommandBuffer, PENDING_ENTITY_ID
+from ecs_engine.scheduler import Scheduler, systems_conflict
+from ecs_engine.sharding import ShardedSystem, SharedMemoryComponentPool
+from ecs_engine.mmap_storage import MappedArray, MemoryMappedComponentPool, flush_world, reattach_world
+from ecs_engine.events import EventBus
+from ecs_engine.delta import WorldDelta
+from ecs_engine.spatial import SpatialIndex
+from ecs_engine.hierarchy import Hierarchy
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class HealthComponent(Component):
     def __init__(self, health):
@@ -94,11 +116,31 @@ class TestEntity(unittest.TestCase):
         pos_component = PositionComponent(0,0)
         self.entity._add_component(health_component)
         self.entity._add_component(pos_component)
+        self.assertEqual(self.entity.mask, HealthComponent.component_bit | PositionComponent.component_bit)
         self.entity._remove_component(HealthComponent)
     
         expected_components = {PositionComponent: pos_component}
         self.assertEqual(expected_components, self.entity.components)
+        self.assertEqual(self.entity.mask, PositionComponent.component_bit)
     
+    def test_component_bits_are_lazy(self):
+        class BaseComponent(Component):
+            pass
+
+        class UsedComponent(BaseComponent):
+            pass
+
+        self.entity._add_component(UsedComponent())
+        self.assertNotIsInstance(BaseComponent.__dict__['component_bit'], int)
+        self.assertEqual(self.entity.mask, UsedComponent.__dict__['component_bit'])
+
+        class DerivedComponent(UsedComponent):
+            pass
+
+        self.assertNotIsInstance(DerivedComponent.__dict__['component_bit'], int)
+        self.assertNotEqual(DerivedComponent.component_bit, UsedComponent.component_bit)
+        self.assertEqual(DerivedComponent.component_bit, DerivedComponent().component_bit)
+
     def test_get_component(self):
         pos_component = PositionComponent(0,0)
         self.entity._add_component(pos_component)
@@ -138,6 +180,15 @@ class TestEntityManager(unittest.TestCase):
         self.entity_manager.move_to_next_id()
         self.assertEqual(self.entity_manager.next_id, 42)
 
+    def test_reserve_ids(self):
+        entity_manager = EntityManager(4)
+        self.assertEqual(entity_manager.reserve_ids(3), [0, 1, 2])
+        entity_manager.add_destroyed_entity_ids([0, 2])
+        self.assertEqual(entity_manager.generations[2], 2)
+        with self.assertRaises(ValueError):
+            entity_manager.reserve_ids(4)
+        self.assertEqual(entity_manager.reserve_ids(3), [3, 2, 0])
+
     def test_raise_over_entity_limit(self):
         self.entity_manager.max_entities = 1000
         self.entity_manager.next_id = 1000
@@ -225,6 +276,56 @@ class TestComponentPool(unittest.TestCase):
 
         expected_entity = self.component_pool.entities[0]
         self.assertEqual(expected_entity, entity_1)
+
+    def test_recycled_component_reset(self):
+        comp_1 = self.component_pool.get_or_create_component_obj(health=100)
+        comp_1.health = 10
+        self.component_pool._release_component(comp_1)
+
+        comp_2 = self.component_pool.get_or_create_component_obj(health=50)
+        self.assertIs(comp_2, comp_1)
+        self.assertEqual(comp_2.health, 50)
+        self.assertEqual(comp_2.max_health, 50)
+        self.assertIn(id(comp_2), self.component_pool.active)
+
+    def test_max_pool_size(self):
+        component_pool = ComponentPool(HealthComponent, entity_capacity=1000, max_pool_size=2)
+        components = [component_pool.get_or_create_component_obj(health=100) for _ in range(5)]
+        for component in components:
+            component_pool._release_component(component)
+
+        self.assertEqual(len(component_pool.pool), 2)
+        self.assertEqual(len(component_pool.active), 0)
+
+    def test_sparse_pages(self):
+        component_pool = ComponentPool(HealthComponent, entity_capacity=1_000_000)
+        self.assertIsInstance(component_pool.sparse, SparseArray)
+        self.assertEqual(component_pool.sparse.get_page_count(), 0)
+
+        entities = [Entity(entity_id) for entity_id in (3, 5, 3 * SPARSE_PAGE_SIZE + 1)]
+        for entity in entities:
+            entity._add_component(HealthComponent(100))
+        component_pool.add_entities(entities)
+        self.assertEqual(component_pool.sparse.get_page_count(), 2)
+        self.assertEqual([component_pool.sparse[entity.id] for entity in entities], [0, 1, 2])
+        self.assertEqual(component_pool.sparse[4], -1)
+        self.assertEqual(component_pool.sparse[999_999], -1)
+
+        component_pool.remove_entities([entities[2]])
+        self.assertEqual(component_pool.sparse.get_page_count(), 1)
+        self.assertEqual(list(component_pool.entity_ids), [3, 5])
+        self.assertEqual(len(list(component_pool.sparse)), 1_000_000)
+
+        for entity in entities[:2]:
+            component_pool.remove_entity(entity)
+        self.assertEqual(component_pool.sparse.get_page_count(), 0)
+
+    def test_max_pool_size_from_component(self):
+        class BoundedHealthComponent(HealthComponent):
+            max_pool_size = 1
+
+        component_pool = ComponentPool(BoundedHealthComponent, entity_capacity=1000)
+        self.assertEqual(component_pool.max_pool_size, 1)
     
 class PositionSystem(System):
     required_components = [PositionComponent]
@@ -291,6 +392,59 @@ class TestBuilder(unittest.TestCase):
         self.assertEqual(pos_comp.x, 100)
         self.assertEqual(pos_comp.y, 100)
 
+class UnitBuilder(Builder):
+    prefabs = {
+        'archer': [HealthComponent(50), PositionComponent(0, 0)],
+    }
+
+class PrefabWorld(EcsAdmin):
+    builders = [UnitBuilder]
+
+class TestPrefab(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = PrefabWorld()
+        self.builder: UnitBuilder = self.world.get_builder(UnitBuilder)
+
+    def test_instantiate(self):
+        archer = self.builder.instantiate('archer', {PositionComponent: {'x': 3}})
+        other_archer = self.builder.instantiate('archer')
+
+        self.assertEqual(archer.get_component(HealthComponent).max_health, 50)
+        self.assertEqual(archer.get_component(PositionComponent).x, 3)
+        self.assertEqual(other_archer.get_component(PositionComponent).x, 0)
+        self.assertIsNot(archer.get_component(HealthComponent), other_archer.get_component(HealthComponent))
+        self.assertIn(archer, self.world.get_entities_intersect([HealthComponent, PositionComponent]))
+
+    def test_instantiate_reuses_pooled_components(self):
+        archer = self.builder.instantiate('archer')
+        health = archer.get_component(HealthComponent)
+        health.health = 1
+        self.world.destroy_entity(archer)
+
+        new_archer = self.builder.instantiate('archer')
+        self.assertIs(new_archer.get_component(HealthComponent), health)
+        self.assertEqual(health.health, 50)
+
+    def test_instantiate_many(self):
+        archers = self.builder.instantiate_many('archer', 5, {HealthComponent: {'health': 10}})
+        self.assertEqual(len(archers), 5)
+        self.assertEqual({archer.get_component(HealthComponent).health for archer in archers}, {10})
+        self.assertEqual(self.builder.get_prefab('archer').templates[0].health, 50)
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_columnar_prefab(self):
+        class ColumnarBuilder(Builder):
+            prefabs = {'marker': [ColumnarPositionComponent(x=2.0, y=4.0)]}
+        builder = ColumnarBuilder(self.world)
+        entities = builder.instantiate_many('marker', 3, {ColumnarPositionComponent: {'y': 1.0}})
+        pool = self.world.get_component_pool(ColumnarPositionComponent)
+        np.testing.assert_array_equal(pool.get_column('x'), [2.0, 2.0, 2.0])
+        np.testing.assert_array_equal(pool.get_column('y'), [1.0, 1.0, 1.0])
+        self.assertEqual(entities[0].get_component(ColumnarPositionComponent).x, 2.0)
+
+    def test_singleton_templates_rejected(self):
+        with self.assertRaises(TypeError):
+            Prefab(self.world, [InputComponent((0, 0))])
 
 class TestSystem(unittest.TestCase):
     def setUp(self) -> None:
@@ -482,6 +636,43 @@ class TestEcsAdmin(unittest.TestCase):
         self.assertIn(entity_2, pos_entities)   
         
 
+    def test_create_entities(self):
+        query = self.world.get_query([PositionComponent, HealthComponent])
+        entities = self.world.create_entities(3, [lambda: PositionComponent(1, 2), lambda: HealthComponent(50)])
+        self.assertEqual(len(entities), 3)
+        self.assertEqual(list(query), entities)
+        self.assertEqual(self.world.get_component_pool(HealthComponent).entities, entities)
+        for entity in entities:
+            self.assertIs(self.world.get_entity(entity.id), entity)
+            self.assertEqual(entity.get_component(HealthComponent).health, 50)
+
+    def test_create_entities_recycles_pooled_components(self):
+        class Marker(Component):
+            pass
+        entities = self.world.create_entities(2, [Marker])
+        released = [entity.get_component(Marker) for entity in entities]
+        self.world.destroy_entities(entities)
+        recycled = self.world.create_entities(2, [Marker])
+        self.assertCountEqual([id(entity.get_component(Marker)) for entity in recycled], [id(component) for component in released])
+
+    def test_destroy_entities(self):
+        query = self.world.get_query([PositionComponent])
+        entities = self.world.create_entities(10, [lambda: PositionComponent(0, 0)])
+        pool = self.world.get_component_pool(PositionComponent)
+
+        self.world.destroy_entities(entities[:1])
+        self.world.destroy_entities(entities[2:8])
+        kept = [entities[1], entities[8], entities[9]]
+        self.assertCountEqual(pool.entities, kept)
+        self.assertCountEqual(list(query), kept)
+        for row, entity in enumerate(pool.entities):
+            self.assertEqual(pool.sparse[entity.id], row)
+            self.assertEqual(query.rows[entity.id], query.entities.index(entity))
+        self.assertFalse(self.world.entity_manager.is_alive(entities[0]))
+        with self.assertRaises(KeyError):
+            self.world.destroy_entities([entities[1], entities[0]])
+        self.assertTrue(self.world.entity_manager.is_alive(entities[1]))
+
     def test_get_entities_union(self):
         entity_1 = self.world.create_entity([PositionComponent(0,0)])
         entity_2 = self.world.create_entity([PositionComponent(0,0), HealthComponent(100)])
@@ -505,5 +696,1458 @@ class TestEcsAdmin(unittest.TestCase):
         self.assertNotIn(entity_1, pos_entities)
         self.assertIn(entity_2, pos_entities)   
 
+class ArchetypeWorld(World):
+    archetype_storage = True
+
+class TestArchetypeStorage(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = ArchetypeWorld()
+
+    def test_initialization(self):
+        self.assertIsInstance(self.world.archetypes, ArchetypeGraph)
+        self.assertIsNone(World().archetypes)
+
+    def test_entities_grouped_by_component_set(self):
+        entity_1 = self.world.create_entity([PositionComponent(0,0)])
+        entity_2 = self.world.create_entity([PositionComponent(0,0), HealthComponent(100)])
+        entity_3 = self.world.create_entity([HealthComponent(100), PositionComponent(0,0)])
+
+        archetypes = self.world.archetypes
+        pos_archetype = archetypes.get_archetype([PositionComponent])
+        both_archetype = archetypes.get_archetype([PositionComponent, HealthComponent])
+
+        self.assertEqual(pos_archetype.entities, [entity_1])
+        self.assertEqual(both_archetype.entities, [entity_2, entity_3])
+        self.assertIs(archetypes.entity_archetypes[entity_3.id], both_archetype)
+
+    def test_get_entities_intersect(self):
+        entity_1 = self.world.create_entity([PositionComponent(0,0)])
+        entity_2 = self.world.create_entity([PositionComponent(0,0), HealthComponent(100)])
+        pos_entities = self.world.get_entities_intersect([PositionComponent])
+        both_entities = self.world.get_entities_intersect([HealthComponent, PositionComponent])
+
+        self.assertCountEqual(pos_entities, [entity_1, entity_2])
+        self.assertEqual(both_entities, [entity_2])
+        self.assertEqual(self.world.get_entities_intersect([]), [])
+
+    def test_transitions(self):
+        entity = self.world.create_entity([PositionComponent(0,0)])
+        pos_archetype = self.world.archetypes.entity_archetypes[entity.id]
+
+        self.world.attach_component_to_entity(entity, HealthComponent(100))
+        both_archetype = self.world.archetypes.entity_archetypes[entity.id]
+        self.assertIs(pos_archetype.add_edges[HealthComponent], both_archetype)
+        self.assertIs(both_archetype.remove_edges[HealthComponent], pos_archetype)
+        self.assertFalse(pos_archetype.contains_entity(entity))
+        self.assertIn(entity, self.world.get_entities_intersect([HealthComponent]))
+
+        self.world.remove_component(entity, entity.get_component(HealthComponent))
+        self.assertIs(self.world.archetypes.entity_archetypes[entity.id], pos_archetype)
+        self.assertNotIn(entity, self.world.get_entities_intersect([HealthComponent]))
+        self.assertIn(entity, self.world.get_entities_intersect([PositionComponent]))
+
+    def test_destroy_entity(self):
+        entity_1 = self.world.create_entity([PositionComponent(0,0)])
+        entity_2 = self.world.create_entity([PositionComponent(0,0)])
+        self.world.destroy_entity(entity_1)
+
+        self.assertEqual(self.world.get_entities_intersect([PositionComponent]), [entity_2])
+        self.assertNotIn(entity_1.id, self.world.archetypes.entity_archetypes)
+
+    def test_matching_archetypes_cache_updates(self):
+        self.world.create_entity([PositionComponent(0,0)])
+        self.assertEqual(len(self.world.get_entities_intersect([PositionComponent])), 1)
+
+        self.world.create_entity([PositionComponent(0,0), HealthComponent(100)])
+        self.assertEqual(len(self.world.get_entities_intersect([PositionComponent])), 2)
+
+class TestQuery(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = World()
+        self.pos_system: PositionSystem = self.world._systems[0]
+
+    def test_get_query_cached(self):
+        query = self.world.get_query([PositionComponent, HealthComponent])
+        self.assertIsInstance(query, Query)
+        self.assertIs(query, self.world.get_query([HealthComponent, PositionComponent]))
+        self.assertIs(self.pos_system.get_required_entities(), self.pos_system.get_required_entities())
+
+    def test_query_built_from_existing_entities(self):
+        entity_1 = self.world.create_entity([PositionComponent(0,0), HealthComponent(100)])
+        self.world.create_entity([PositionComponent(0,0)])
+        query = self.world.get_query([PositionComponent, HealthComponent])
+        self.assertEqual(list(query), [entity_1])
+
+    def test_query_updates_in_place(self):
+        query = self.world.get_query([PositionComponent, HealthComponent])
+        entity_1 = self.world.create_entity([PositionComponent(0,0)])
+        self.assertEqual(len(query), 0)
+
+        self.world.attach_component_to_entity(entity_1, HealthComponent(100))
+        self.assertIn(entity_1, query)
+
+        entity_2 = self.world.create_entity([PositionComponent(0,0), HealthComponent(100)])
+        self.world.remove_component(entity_1, entity_1.get_component(HealthComponent))
+        self.assertNotIn(entity_1, query)
+        self.assertEqual(list(query), [entity_2])
+
+        self.world.destroy_entity(entity_2)
+        self.assertEqual(len(query), 0)
+
+    def test_empty_query(self):
+        self.world.create_entity([PositionComponent(0,0)])
+        query = self.world.get_query([])
+        self.assertEqual(len(query), 0)
+
+    def test_query_terms(self):
+        moving = self.world.create_entity([PositionComponent(0,0), VelocityComponent(1,1)])
+        frozen = self.world.create_entity([PositionComponent(0,0), VelocityComponent(1,1), ArmorComponent(1)])
+        wounded = self.world.create_entity([PositionComponent(0,0), HealthComponent(5)])
+        bare = self.world.create_entity([ArmorComponent(2)])
+        [other] = self.world.create_entities(1, [lambda: HealthComponent(1)])
+
+        get_entities = self.pos_system.get_entities_intersect
+        self.assertEqual(get_entities([PositionComponent, VelocityComponent, NoneOf[ArmorComponent]]), [moving])
+        self.assertEqual(get_entities([AllOf[PositionComponent, VelocityComponent]]), [moving, frozen])
+        self.assertEqual(get_entities([PositionComponent, AnyOf[HealthComponent, ArmorComponent]]), [frozen, wounded])
+        self.assertEqual(get_entities([AnyOf[VelocityComponent, ArmorComponent], NoneOf[PositionComponent]]), [bare])
+        self.assertEqual(get_entities([NoneOf[PositionComponent, ArmorComponent]]), [other])
+        self.assertEqual(
+            get_entities([PositionComponent, OptionalOf[HealthComponent, ArmorComponent]]),
+            [
+                (moving, None, None),
+                (frozen, None, frozen.get_component(ArmorComponent)),
+                (wounded, wounded.get_component(HealthComponent), None),
+            ],
+        )
+
+        self.world.remove_component(frozen, frozen.get_component(ArmorComponent))
+        self.assertEqual(get_entities([PositionComponent, VelocityComponent, NoneOf[ArmorComponent]]), [moving, frozen])
+        self.assertEqual(NoneOf[ArmorComponent], NoneOf[ArmorComponent])
+
+class ColumnarPositionComponent(ColumnarComponent):
+    columns = {'x': 'float32', 'y': 'float32'}
+
+class ColumnarVelocityComponent(ColumnarComponent):
+    columns = {'x': 'float32', 'y': 'float32'}
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestColumnarComponent(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = World()
+
+    def test_detached_component(self):
+        position = ColumnarPositionComponent(x=1.5)
+        self.assertEqual(position.x, 1.5)
+        self.assertEqual(position.y, 0)
+        self.assertEqual(position.serialize(), {'x': 1.5, 'y': 0})
+        with self.assertRaises(TypeError):
+            ColumnarPositionComponent(z=1)
+
+    def test_values_stored_in_columns(self):
+        entity_1 = self.world.create_entity([ColumnarPositionComponent(x=1, y=2)])
+        entity_2 = self.world.create_entity([ColumnarPositionComponent(x=3, y=4)])
+        pool = self.world.get_component_pool(ColumnarPositionComponent)
+
+        self.assertEqual(pool.get_column('x').tolist(), [1, 3])
+        self.assertEqual(pool.get_column('y').dtype, np.float32)
+
+        position = entity_2.get_component(ColumnarPositionComponent)
+        position.y = 10
+        self.assertEqual(pool.get_column('y').tolist(), [2, 10])
+        self.assertEqual(entity_1.get_component(ColumnarPositionComponent).x, 1)
+
+    def test_vectorized_update(self):
+        entity_1 = self.world.create_entity([ColumnarPositionComponent(x=1, y=2), ColumnarVelocityComponent(x=2, y=0)])
+        entity_2 = self.world.create_entity([ColumnarPositionComponent(x=3, y=4), ColumnarVelocityComponent(x=0, y=4)])
+
+        pos = self.world.get_component_pool(ColumnarPositionComponent).get_columns()
+        vel = self.world.get_component_pool(ColumnarVelocityComponent).get_columns()
+        pos.x += vel.x * 0.5
+        pos.y += vel.y * 0.5
+
+        self.assertEqual(entity_1.get_component(ColumnarPositionComponent).x, 2)
+        self.assertEqual(entity_2.get_component(ColumnarPositionComponent).y, 6)
+
+    def test_remove_keeps_rows_aligned(self):
+        entity_1 = self.world.create_entity([ColumnarPositionComponent(x=1)])
+        entity_2 = self.world.create_entity([ColumnarPositionComponent(x=2)])
+        entity_3 = self.world.create_entity([ColumnarPositionComponent(x=3)])
+        pool = self.world.get_component_pool(ColumnarPositionComponent)
+
+        position_1 = entity_1.get_component(ColumnarPositionComponent)
+        self.world.remove_component(entity_1, position_1)
+        self.assertEqual(list(pool.entity_ids), [entity_3.id, entity_2.id])
+        self.assertEqual(pool.get_column('x').tolist(), [3, 2])
+        self.assertEqual(entity_3.get_component(ColumnarPositionComponent).x, 3)
+        self.assertEqual(position_1.x, 1)
+
+        self.world.destroy_entity(entity_3)
+        self.assertEqual(pool.get_column('x').tolist(), [2])
+
+    def test_regular_pool_has_no_columns(self):
+        pool = self.world.get_component_pool(HealthComponent)
+        self.assertIsNone(pool.columns)
+        with self.assertRaises(TypeError):
+            pool.get_column('health')
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestQueryArrays(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = World()
+
+    def test_query_arrays(self):
+        entity_1 = self.world.create_entity([ColumnarPositionComponent(x=1), ColumnarVelocityComponent(x=10)])
+        self.world.create_entity([ColumnarPositionComponent(x=2)])
+        entity_3 = self.world.create_entity([ColumnarVelocityComponent(x=30), ColumnarPositionComponent(x=3)])
+        self.world.create_entity([ColumnarVelocityComponent(x=40)])
+        tick = self.world.change_tick
+        self.world.increment_change_tick()
+
+        result = self.world.query_arrays([ColumnarPositionComponent, ColumnarVelocityComponent])
+        self.assertEqual(result.entity_ids.tolist(), [entity_1.id, entity_3.id])
+        self.assertEqual(result.gather(ColumnarPositionComponent, 'x').tolist(), [1, 3])
+        self.assertEqual(result.gather(ColumnarVelocityComponent, 'x').tolist(), [10, 30])
+
+        pos_x = result.gather(ColumnarPositionComponent, 'x')
+        vel_x = result.gather(ColumnarVelocityComponent, 'x')
+        result.scatter(ColumnarPositionComponent, 'x', pos_x + vel_x)
+        self.assertEqual(entity_3.get_component(ColumnarPositionComponent).x, 33)
+        pool = self.world.get_component_pool(ColumnarPositionComponent)
+        self.assertEqual([entity for entity in pool.entities if pool.is_changed_since(entity, tick)], [entity_1, entity_3])
+
+    def test_query_arrays_regular_components(self):
+        entity_1 = self.world.create_entity([PositionComponent(0,0), HealthComponent(100)])
+        self.world.create_entity([PositionComponent(0,0)])
+
+        result = self.world.query_arrays([PositionComponent, HealthComponent])
+        self.assertEqual(result.entity_ids.tolist(), [entity_1.id])
+        pool = self.world.get_component_pool(PositionComponent)
+        row = result.indices[PositionComponent][0]
+        self.assertIs(pool.entities[row], entity_1)
+
+    def test_query_arrays_empty(self):
+        result = self.world.query_arrays([])
+        self.assertEqual(len(result), 0)
+
+class TestGenerationalHandles(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = World(2)
+
+    def recycle_entity(self) -> tuple[Entity, Entity]:
+        self.world.create_entity()
+        stale_entity = self.world.create_entity([HealthComponent(100)])
+        self.world.destroy_entity(stale_entity)
+        new_entity = self.world.create_entity([HealthComponent(50)])
+        return stale_entity, new_entity
+
+    def test_handle_packing(self):
+        entity = Entity(7, generation=3)
+        self.assertEqual(get_handle_index(entity.handle), 7)
+        self.assertEqual(get_handle_generation(entity.handle), 3)
+
+    def test_recycled_id_bumps_generation(self):
+        stale_entity, new_entity = self.recycle_entity()
+        self.assertEqual(stale_entity.id, new_entity.id)
+        self.assertEqual(new_entity.generation, stale_entity.generation + 1)
+
+    def test_get_entity_rejects_stale_handle(self):
+        stale_entity, new_entity = self.recycle_entity()
+        self.assertIs(self.world.get_entity(new_entity.handle), new_entity)
+        self.assertIs(self.world.get_entity(new_entity.id), new_entity)
+        with self.assertRaises(KeyError):
+            self.world.get_entity(stale_entity.handle)
+
+    def test_contains_entity_rejects_stale_entity(self):
+        stale_entity, new_entity = self.recycle_entity()
+        pool = self.world.get_component_pool(HealthComponent)
+        self.assertTrue(pool.contains_entity(new_entity))
+        self.assertFalse(pool.contains_entity(stale_entity))
+
+    def test_destroy_stale_entity(self):
+        stale_entity, new_entity = self.recycle_entity()
+        with self.assertRaises(KeyError):
+            self.world.destroy_entity(stale_entity)
+        self.assertIs(self.world.get_entity(new_entity.id), new_entity)
+
+    def test_entity_limit(self):
+        self.world.create_entity()
+        self.world.create_entity()
+        with self.assertRaises(ValueError):
+            self.world.create_entity()
+
+class TestCommandBuffer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = World()
+        self.pos_system: PositionSystem = self.world._systems[0]
+        self.commands: CommandBuffer = self.pos_system.commands
+
+    def test_system_buffers_flushed_by_admin(self):
+        self.assertIsNot(self.commands, self.world.command_buffer)
+        self.world.command_buffer.create_entity([PositionComponent(0, 0)])
+        self.commands.create_entity([PositionComponent(0, 0)])
+        self.world.flush_commands()
+        self.assertEqual(len(self.world.get_entities_intersect([PositionComponent])), 2)
+
+    def test_deferred_create(self):
+        query = self.world.get_query([PositionComponent])
+        entity = self.commands.create_entity([PositionComponent(1, 2)])
+        self.assertEqual(entity.id, PENDING_ENTITY_ID)
+        self.assertEqual(len(query), 0)
+
+        self.world.flush_commands()
+        self.assertIs(self.world.get_entity(entity.id), entity)
+        self.assertEqual(list(query), [entity])
+        self.assertTrue(self.commands.is_empty())
+
+    def test_failed_flush_keeps_commands(self):
+        world = EcsAdmin(2)
+        world.create_entity()
+        commands = world.create_command_buffer()
+        existing = world.create_entity([HealthComponent(1)])
+        commands.destroy_entity(existing)
+        for _ in range(2):
+            commands.create_entity([HealthComponent(2)])
+        with self.assertRaises(ValueError):
+            commands.flush()
+        self.assertEqual(len(commands.created), 2)
+        self.assertEqual(commands.destroyed, [existing])
+        self.assertIn(existing.id, world.entity_map)
+
+    def test_destroy_while_iterating(self):
+        entities = [self.world.create_entity([PositionComponent(0, 0)]) for _ in range(5)]
+        for entity in self.pos_system.get_required_entities():
+            self.commands.destroy_entity(entity)
+        self.commands.destroy_entity(entities[0])
+
+        self.assertEqual(len(self.pos_system.get_required_entities()), 5)
+        with patch.object(self.world, 'destroy_entities', wraps=self.world.destroy_entities) as destroy_entities:
+            self.world.flush_commands()
+        destroy_entities.assert_called_once()
+        self.assertEqual(len(self.pos_system.get_required_entities()), 0)
+        self.assertEqual(len(self.world.entity_map), 0)
+        self.assertEqual(len(self.world.entity_manager.destroyed_entity_ids), len(entities))
+
+    def test_repeated_attach_replaces(self):
+        existing = self.world.create_entity([HealthComponent(1)])
+        replaced = existing.get_component(HealthComponent)
+        created = self.commands.create_entity([HealthComponent(1)])
+        self.commands.attach_component_to_entity(created, HealthComponent(2))
+        self.commands.attach_component_to_entity(existing, HealthComponent(2))
+        self.commands.attach_component_to_entity(existing, HealthComponent(3))
+        self.world.flush_commands()
+
+        pool = self.world.get_component_pool(HealthComponent)
+        self.assertEqual(created.get_component(HealthComponent).health, 2)
+        self.assertEqual(existing.get_component(HealthComponent).health, 3)
+        self.assertEqual(pool.entities, [existing, created])
+        self.assertEqual([pool.sparse[entity.id] for entity in pool.entities], [0, 1])
+        self.assertIn(replaced, pool.pool)
+
+    def test_attach_and_remove_batched(self):
+        entity_1 = self.world.create_entity([PositionComponent(0, 0)])
+        entity_2 = self.world.create_entity([PositionComponent(0, 0)])
+        self.commands.attach_component_to_entity(entity_1, HealthComponent(100))
+        self.commands.attach_component_to_entity(entity_2, HealthComponent(100))
+        self.commands.remove_component(entity_2, entity_2.get_component(PositionComponent))
+        self.world.flush_commands()
+
+        hp_pool = self.world.get_component_pool(HealthComponent)
+        self.assertEqual(hp_pool.entities, [entity_1, entity_2])
+        self.assertFalse(entity_2.has_component(PositionComponent))
+        self.assertEqual(self.world.get_entities_intersect([PositionComponent, HealthComponent]), [entity_1])
+
+    def test_destroy_wins(self):
+        entity = self.world.create_entity([PositionComponent(0, 0)])
+        self.commands.destroy_entity(entity)
+        self.commands.destroy_entity(entity)
+        self.commands.attach_component_to_entity(entity, HealthComponent(100))
+        self.world.flush_commands()
+
+        self.assertNotIn(entity.id, self.world.entity_map)
+        self.assertEqual(len(self.world.get_component_pool(HealthComponent).entities), 0)
+        self.assertEqual(self.world.entity_manager.destroyed_entity_ids, [entity.id])
+
+class VelocityComponent(Component):
+    def __init__(self, x, y):
+        self.x: int = x
+        self.y: int = y
+
+class ScheduledSystem(System):
+    def run(self, dt: float):
+        self.ecs_admin.run_order.append(type(self))
+
+class MovementSystem(ScheduledSystem):
+    required_components = [PositionComponent, VelocityComponent]
+    writes = [PositionComponent]
+
+    def run(self, dt: float):
+        super().run(dt)
+        for entity in self.get_required_entities():
+            position = entity.get_component(PositionComponent)
+            velocity = entity.get_component(VelocityComponent)
+            position.x += velocity.x * dt
+            position.y += velocity.y * dt
+
+class RegenerationSystem(ScheduledSystem):
+    writes = [HealthComponent]
+
+class RenderSystem(ScheduledSystem):
+    reads = [PositionComponent, HealthComponent]
+
+class SpawnSystem(ScheduledSystem):
+    run_after = [RenderSystem]
+
+    def run(self, dt: float):
+        super().run(dt)
+        self.commands.create_entity([PositionComponent(0, 0), VelocityComponent(1, 1)])
+
+class ScheduledWorld(EcsAdmin):
+    systems = [SpawnSystem, MovementSystem, RegenerationSystem, RenderSystem, HealthSystem]
+    events = ['test_publish']
+
+    def __init__(self, max_entities: int = 1000):
+        self.run_order = []
+        super().__init__(max_entities)
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = ScheduledWorld()
+        self.systems = {type(system): system for system in self.world._systems}
+
+    def test_only_systems_with_run_are_scheduled(self):
+        self.assertIsInstance(self.world.scheduler, Scheduler)
+        self.assertNotIn(self.systems[HealthSystem], self.world.scheduler.systems)
+        self.assertEqual(len(self.world.scheduler.systems), 4)
+
+    def test_component_access(self):
+        reads, writes = self.systems[MovementSystem].get_component_access()
+        self.assertEqual(reads, {VelocityComponent})
+        self.assertEqual(writes, {PositionComponent})
+
+    def test_conflicts(self):
+        self.assertTrue(systems_conflict(self.systems[MovementSystem], self.systems[RenderSystem]))
+        self.assertFalse(systems_conflict(self.systems[MovementSystem], self.systems[RegenerationSystem]))
+        self.assertFalse(systems_conflict(self.systems[SpawnSystem], self.systems[RenderSystem]))
+
+    def test_stages(self):
+        stages = [[type(system) for system in stage] for stage in self.world.scheduler.get_stages()]
+        self.assertEqual(stages, [
+            [MovementSystem, RegenerationSystem],
+            [RenderSystem],
+            [SpawnSystem],
+        ])
+
+    def test_run_after_cycle(self):
+        class FirstSystem(ScheduledSystem):
+            ...
+        class SecondSystem(ScheduledSystem):
+            run_after = [FirstSystem]
+        FirstSystem.run_after = [SecondSystem]
+
+        class CycleWorld(ScheduledWorld):
+            systems = [FirstSystem, SecondSystem]
+
+        with self.assertRaises(ValueError):
+            CycleWorld().tick(1)
+
+    def test_tick(self):
+        self.world.tick(0.5)
+        self.assertEqual(self.world.run_order, [MovementSystem, RegenerationSystem, RenderSystem, SpawnSystem])
+        entities = self.world.get_entities_intersect([PositionComponent])
+        self.assertEqual(len(entities), 1)
+
+        self.world.tick(0.5)
+        position = entities[0].get_component(PositionComponent)
+        self.assertEqual((position.x, position.y), (0.5, 0.5))
+
+class SleepingSystem(System):
+    def run(self, dt: float):
+        self.ecs_admin.barrier.wait(timeout=5)
+        self.commands.create_entity([HealthComponent(type(self).health)])
+
+class FirstSleepingSystem(SleepingSystem):
+    health = 1
+
+class SecondSleepingSystem(SleepingSystem):
+    health = 2
+
+class FailingSystem(System):
+    def run(self, dt: float):
+        raise RuntimeError(type(self).__name__)
+
+class FirstFailingSystem(FailingSystem):
+    ...
+
+class SecondFailingSystem(FailingSystem):
+    ...
+
+class ThreadedWorld(EcsAdmin):
+    systems = [FirstSleepingSystem, SecondSleepingSystem]
+    system_workers = 2
+
+    def __init__(self, max_entities: int = 1000):
+        self.barrier = threading.Barrier(2)
+        super().__init__(max_entities)
+
+class TestThreadedScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = ThreadedWorld()
+
+    def tearDown(self) -> None:
+        self.world.scheduler.shutdown()
+
+    def test_stage_runs_concurrently(self):
+        self.assertEqual(len(self.world.scheduler.get_stages()), 1)
+        self.world.tick(1)
+        self.assertFalse(self.world.barrier.broken)
+
+    def test_deterministic_flush_order(self):
+        for _ in range(5):
+            self.world.tick(1)
+        hp_pool = self.world.get_component_pool(HealthComponent)
+        healths = [entity.get_component(HealthComponent).health for entity in hp_pool.entities]
+        self.assertEqual(healths, [1, 2] * 5)
+        entity_ids = [entity.id for entity in hp_pool.entities]
+        self.assertEqual(entity_ids, sorted(entity_ids))
+
+    def test_errors_raised_in_order(self):
+        class FailingWorld(EcsAdmin):
+            systems = [FirstFailingSystem, SecondFailingSystem]
+            system_workers = 2
+
+        world = FailingWorld()
+        with self.assertRaisesRegex(RuntimeError, 'FirstFailingSystem'):
+            world.tick(1)
+        world.scheduler.shutdown()
+
+class ShardedMovementSystem(ShardedSystem):
+    required_components = [ColumnarPositionComponent, ColumnarVelocityComponent]
+    writes = [ColumnarPositionComponent]
+
+    @staticmethod
+    def run_chunk(views, dt):
+        position = views[ColumnarPositionComponent]
+        velocity = views[ColumnarVelocityComponent]
+        for i in range(len(position.x)):
+            position.x[i] += velocity.x[i] * dt
+        position.y += velocity.y * dt
+
+class ShardedWorld(EcsAdmin):
+    systems = [ShardedMovementSystem]
+    component_pool_type = SharedMemoryComponentPool
+    shard_workers = 2
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestSharding(unittest.TestCase):
+    def create_entities(self, world: EcsAdmin) -> list[Entity]:
+        entities = []
+        for i in range(20):
+            components = [ColumnarPositionComponent(x=i, y=i)]
+            if i % 4:
+                components.append(ColumnarVelocityComponent(x=1, y=2))
+            entities.append(world.create_entity(components))
+        # a velocity-first entity so the pools' dense rows aren't aligned
+        entities.append(world.create_entity([ColumnarVelocityComponent(x=1, y=2), ColumnarPositionComponent(x=20, y=20)]))
+        return entities
+
+    def assert_moved(self, entities: list[Entity], dt: float):
+        for i, entity in enumerate(entities):
+            position = entity.get_component(ColumnarPositionComponent)
+            moved = entity.has_component(ColumnarVelocityComponent)
+            self.assertEqual(position.x, i + dt if moved else i)
+            self.assertEqual(position.y, i + 2 * dt if moved else i)
+
+    def test_shared_memory_pool(self):
+        pool = SharedMemoryComponentPool(ColumnarPositionComponent, entity_capacity=100)
+        entity = Entity(0)
+        entity._add_component(ColumnarPositionComponent(x=3))
+        pool.add_entity(entity)
+
+        descriptors = pool.get_column_descriptors()
+        self.assertEqual(set(descriptors), {'x', 'y'})
+        self.assertEqual(descriptors['x'][0], pool.shared_memory['x'].name)
+        self.assertEqual(pool.get_column('x').tolist(), [3])
+        pool.close()
+
+    def test_sharded_run(self):
+        world = ShardedWorld()
+        entities = self.create_entities(world)
+        try:
+            world.tick(0.5)
+        finally:
+            world.shutdown()
+        self.assert_moved(entities, 0.5)
+
+    def test_in_process_fallback(self):
+        class InProcessWorld(ShardedWorld):
+            shard_workers = None
+
+        world = InProcessWorld()
+        entities = self.create_entities(world)
+        world.tick(0.5)
+        self.assert_moved(entities, 0.5)
+
+    def test_writes_update_spatial_index(self):
+        class InProcessWorld(ShardedWorld):
+            shard_workers = None
+
+        world = InProcessWorld()
+        entities = self.create_entities(world)
+        index = world.create_spatial_index(ColumnarPositionComponent, cell_size=1)
+        world.tick(0.5)
+        self.assertEqual(index.get_position(entities[1]), (1.5, 2))
+        self.assertEqual(index.get_position(entities[4]), (4, 4))
+        self.assertEqual(index.query_radius((20.5, 21), 0.1), [entities[20]])
+
+    def test_writes_must_be_required(self):
+        class TaggingSystem(ShardedMovementSystem):
+            writes = [ColumnarPositionComponent, ColumnarVelocityComponent, HealthComponent]
+
+        class TaggingWorld(EcsAdmin):
+            systems = [TaggingSystem]
+
+        with self.assertRaisesRegex(ValueError, 'HealthComponent'):
+            TaggingWorld()
+
+    def test_requires_shared_memory_pool(self):
+        class RegularPoolWorld(ShardedWorld):
+            component_pool_type = ComponentPool
+
+        world = RegularPoolWorld()
+        self.create_entities(world)
+        with self.assertRaises(TypeError):
+            world.tick(0.5)
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestMemoryMappedStorage(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        pool_type = type('MappedPool', (MemoryMappedComponentPool,), {'directory': directory.name})
+        self.world_type = type('MappedWorld', (EcsAdmin,), {'component_pool_type': pool_type})
+
+    def test_mapped_array(self):
+        values = MappedArray(os.path.join(self.directory, 'values'), np.int64)
+        values.extend(range(40))
+        values.append(40)
+        self.assertEqual(len(values), 41)
+        self.assertEqual(values.pop(), 40)
+        self.assertEqual(values[-1], 39)
+        values[0] = 7
+        values[:] = [values[0], 1, 2]
+        self.assertEqual(list(values), [7, 1, 2])
+        self.assertEqual(np.asarray(values).tolist(), [7, 1, 2])
+        with self.assertRaises(IndexError):
+            values[3]
+
+    def test_queries_and_reattach(self):
+        world = self.world_type(100)
+        entities = [world.create_entity([ColumnarPositionComponent(x=i, y=2 * i)]) for i in range(40)]
+        for entity in entities[5:]:
+            world.attach_component_to_entity(entity, ColumnarVelocityComponent(x=1, y=1))
+        world.destroy_entity(entities[3])
+        world.destroy_entities(entities[20:])
+        self.assertIsInstance(world.get_component_pool(ColumnarPositionComponent).entity_ids, MappedArray)
+
+        query = world.query_arrays([ColumnarPositionComponent, ColumnarVelocityComponent])
+        query.scatter(ColumnarPositionComponent, 'x', query.gather(ColumnarPositionComponent, 'x') + 100)
+        flush_world(world)
+
+        reattached = self.world_type(100)
+        reattach_world(reattached)
+        self.assertEqual(reattached.entity_manager.next_id, world.entity_manager.next_id)
+        self.assertEqual(reattached.entity_manager.destroyed_entity_ids, world.entity_manager.destroyed_entity_ids)
+        self.assertEqual(sorted(reattached.entity_map), sorted(world.entity_map))
+        moved = reattached.get_entities_intersect([ColumnarPositionComponent, ColumnarVelocityComponent])
+        self.assertEqual(sorted(entity.id for entity in moved), list(range(5, 20)))
+        for entity in reattached.get_entities_intersect([ColumnarPositionComponent]):
+            position = entity.get_component(ColumnarPositionComponent)
+            self.assertEqual(position.x, entity.id + 100 if entity.id >= 5 else entity.id)
+            self.assertEqual(position.y, 2 * entity.id)
+
+        entity = reattached.create_entity([ColumnarPositionComponent(x=-1)])
+        self.assertEqual(entity.id, 40)
+        reattached.destroy_entity(reattached.get_entity(0))
+        self.assertEqual(reattached.get_entity(entity.id).get_component(ColumnarPositionComponent).x, -1)
+
+    def test_reattach_restores_change_tick(self):
+        world = self.world_type(100)
+        entity = world.create_entity([ColumnarPositionComponent(x=1)])
+        for _ in range(50):
+            world.increment_change_tick()
+        world.mark_changed(entity, ColumnarPositionComponent)
+        flush_world(world)
+
+        reattached = self.world_type(100)
+        reattach_world(reattached)
+        self.assertGreater(reattached.change_tick, world.change_tick)
+        tick = reattached.change_tick
+        self.assertEqual(reattached.get_entities_filtered([Changed[ColumnarPositionComponent]], tick), [])
+        reattached.increment_change_tick()
+        reattached.mark_changed(reattached.get_entity(entity.id), ColumnarPositionComponent)
+        self.assertEqual(len(reattached.get_entities_filtered([Changed[ColumnarPositionComponent]], tick)), 1)
+
+    def test_reattach_requires_empty_world(self):
+        world = self.world_type(100)
+        with self.assertRaises(ValueError):
+            reattach_world(world)
+        world.create_entity([ColumnarPositionComponent()])
+        flush_world(world)
+        with self.assertRaises(ValueError):
+            reattach_world(world)
+        with self.assertRaises(TypeError):
+            flush_world(EcsAdmin())
+
+class DamageEvent:
+    def __init__(self, target: int, amount: int):
+        self.target = target
+        self.amount = amount
+
+class DamageSystem(System):
+    def __init__(self, ecs_admin, event_bus):
+        self.calls = []
+        super().__init__(ecs_admin, event_bus)
+
+    @subscribe_to_event(DamageEvent)
+    def apply_damage(self, event: DamageEvent):
+        self.calls.append(('apply', event.amount))
+
+    @subscribe_to_event(DamageEvent, priority=10)
+    def apply_armor(self, event: DamageEvent):
+        self.calls.append(('armor', event.amount))
+
+    @subscribe_to_event('collision', priority=-1)
+    def on_collision(self, entity_a: int, entity_b: int):
+        self.calls.append(('collision', entity_a, entity_b))
+
+class EventWorld(EcsAdmin):
+    systems = [DamageSystem]
+    events = [DamageEvent, 'collision']
+
+class TestEventBus(unittest.TestCase):
+    def setUp(self) -> None:
+        self.event_bus = EventBus()
+        self.calls = []
+
+    def test_event_ids(self):
+        first_id = self.event_bus.register_event('first')
+        second_id = self.event_bus.register_event(DamageEvent)
+        self.assertEqual((first_id, second_id), (0, 1))
+        self.assertEqual(self.event_bus.get_event_id(DamageEvent), 1)
+        with self.assertRaises(KeyError):
+            self.event_bus.register_event('first')
+
+    def test_priority_order(self):
+        self.event_bus.register_event('hit')
+        self.event_bus.subscribe('hit', lambda: self.calls.append('low'), priority=-5)
+        self.event_bus.subscribe('hit', lambda: self.calls.append('first'))
+        self.event_bus.subscribe('hit', lambda: self.calls.append('high'), priority=5)
+        self.event_bus.subscribe('hit', lambda: self.calls.append('second'))
+        self.event_bus.publish('hit')
+        self.assertEqual(self.calls, ['high', 'first', 'second', 'low'])
+
+    def test_emit(self):
+        event_id = self.event_bus.register_event('hit')
+        self.event_bus.subscribe('hit', lambda a, b: self.calls.append((a, b)))
+        self.event_bus.emit('hit', 1, 2)
+        self.event_bus.emit(event_id, 3, 4)
+        self.assertEqual(self.calls, [(1, 2), (3, 4)])
+
+    def test_system_subscriptions(self):
+        world = EventWorld()
+        damage_system: DamageSystem = world._systems[0]
+        world.event_bus.dispatch(DamageEvent(0, 5))
+        world.event_bus.emit('collision', 1, 2)
+        self.assertEqual(damage_system.calls, [('armor', 5), ('apply', 5), ('collision', 1, 2)])
+
+class BatchedDamageSystem(System):
+    def __init__(self, ecs_admin, event_bus):
+        self.batches = []
+        self.single = []
+        super().__init__(ecs_admin, event_bus)
+
+    @subscribe_to_event(DamageEvent, batched=True)
+    def handle_damage(self, events: list[DamageEvent]):
+        self.batches.append([event.amount for event in events])
+        for event in events:
+            if event.amount > 1:
+                self.queue_event(DamageEvent(event.target, event.amount - 1))
+
+    @subscribe_to_event(DamageEvent)
+    def handle_single(self, event: DamageEvent):
+        self.single.append(event.amount)
+
+class QueuedEventWorld(EcsAdmin):
+    systems = [BatchedDamageSystem]
+    events = [DamageEvent]
+
+class TestQueuedEvents(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = QueuedEventWorld()
+        self.system: BatchedDamageSystem = self.world._systems[0]
+
+    def test_batched_delivery(self):
+        self.system.queue_event(DamageEvent(0, 1))
+        self.system.queue_event(DamageEvent(1, 1))
+        self.assertEqual(self.system.batches, [])
+
+        self.world.tick(1)
+        self.assertEqual(self.system.batches, [[1, 1]])
+        self.assertEqual(self.system.single, [1, 1])
+
+        self.world.tick(1)
+        self.assertEqual(len(self.system.batches), 1)
+
+    def test_events_queued_by_handlers(self):
+        self.system.queue_event(DamageEvent(0, 3))
+        self.world.flush_events()
+        self.assertEqual(self.system.batches, [[3], [2], [1]])
+
+    def test_max_flush_passes(self):
+        self.world.event_bus.max_flush_passes = 2
+        self.system.queue_event(DamageEvent(0, 3))
+        self.world.flush_events()
+        self.assertEqual(self.system.batches, [[3], [2]])
+
+        self.world.flush_events()
+        self.assertEqual(self.system.batches, [[3], [2], [1]])
+
+    def test_queue_named_event(self):
+        event_bus = EventBus()
+        event_bus.register_event('hit')
+        received = []
+        event_bus.subscribe_batch('hit', received.append)
+        event_bus.queue((1, 2), 'hit')
+        event_bus.queue((3, 4), event_bus.get_event_id('hit'))
+        event_bus.flush()
+        self.assertEqual(received, [[(1, 2), (3, 4)]])
+
+class AsyncDamageSystem(System):
+    def __init__(self, ecs_admin, event_bus):
+        self.received = []
+        self.ticks = 0
+        super().__init__(ecs_admin, event_bus)
+
+    @subscribe_to_event(DamageEvent)
+    async def on_damage(self, event: DamageEvent):
+        await asyncio.sleep(0)
+        self.received.append(event.amount)
+
+    async def run(self, dt: float):
+        await asyncio.sleep(0)
+        self.ticks += 1
+        if self.ticks == 3:
+            self.ecs_admin.stop()
+
+class AsyncWorld(EcsAdmin):
+    systems = [AsyncDamageSystem]
+    events = [DamageEvent]
+
+class TestAsync(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = AsyncWorld()
+        self.system: AsyncDamageSystem = self.world._systems[0]
+
+    def test_publish_async(self):
+        asyncio.run(self.world.event_bus.publish_async(DamageEvent, event=DamageEvent(0, 5)))
+        self.assertEqual(self.system.received, [5])
+
+    def test_publish_schedules_async_handlers(self):
+        async def main():
+            self.world.event_bus.publish(DamageEvent, event=DamageEvent(0, 2))
+            self.assertEqual(self.system.received, [])
+            await asyncio.sleep(0.01)
+        asyncio.run(main())
+        self.assertEqual(self.system.received, [2])
+
+    def test_sync_tick_rejects_async_systems(self):
+        with self.assertRaises(TypeError):
+            self.world.tick(1)
+
+    def test_run_async(self):
+        asyncio.run(self.world.run_async(1000, max_ticks=2))
+        self.assertEqual(self.system.ticks, 2)
+
+        asyncio.run(self.world.run_async(1000))
+        self.assertEqual(self.system.ticks, 3)
+
+class ReplicationSystem(System):
+    required_components = [PositionComponent]
+
+    def __init__(self, ecs_admin, event_bus):
+        self.added = []
+        self.changed = []
+        self.removed = []
+        super().__init__(ecs_admin, event_bus)
+
+    def run(self, dt: float):
+        self.added.append(self.get_entities_intersect([Added[PositionComponent]]))
+        self.changed.append(self.get_entities_intersect([HealthComponent, Changed[PositionComponent]]))
+        self.removed.append(self.get_entities_intersect([Removed[PositionComponent]]))
+
+class ChangeDetectionWorld(EcsAdmin):
+    systems = [ReplicationSystem]
+
+class TestChangeDetection(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = ChangeDetectionWorld()
+        self.system: ReplicationSystem = self.world._systems[0]
+
+    def test_added_and_changed(self):
+        entity_a = self.world.create_entity([PositionComponent(0, 0), HealthComponent(10)])
+        entity_b = self.world.create_entity([PositionComponent(1, 1)])
+        self.world.tick(1)
+        self.assertEqual(self.system.added[-1], [entity_a, entity_b])
+        self.assertEqual(self.system.changed[-1], [entity_a])
+
+        self.world.tick(1)
+        self.assertEqual(self.system.added[-1], [])
+        self.assertEqual(self.system.changed[-1], [])
+
+        entity_a.get_component(PositionComponent).x = 5
+        self.world.mark_changed(entity_a, PositionComponent)
+        self.world.tick(1)
+        self.assertEqual(self.system.added[-1], [])
+        self.assertEqual(self.system.changed[-1], [entity_a])
+
+    def test_removed(self):
+        entity_a = self.world.create_entity([PositionComponent(0, 0)])
+        entity_b = self.world.create_entity([PositionComponent(1, 1)])
+        self.world.tick(1)
+
+        self.world.remove_component(entity_a, entity_a.get_component(PositionComponent))
+        self.world.destroy_entity(entity_b)
+        self.world.tick(1)
+        self.assertEqual(self.system.removed[-1], [entity_a, entity_b])
+
+        self.world.tick(1)
+        self.assertEqual(self.system.removed[-1], [])
+        self.assertEqual(self.world.get_component_pool(PositionComponent).removed, [])
+
+    def test_filters_with_query_terms(self):
+        entity_a = self.world.create_entity([PositionComponent(0, 0), HealthComponent(10)])
+        entity_b = self.world.create_entity([PositionComponent(1, 1)])
+        self.assertEqual(self.world.get_entities_filtered([Added[PositionComponent], NoneOf[HealthComponent]], 0), [entity_b])
+        self.assertEqual(
+            self.world.get_entities_filtered([Added[PositionComponent], OptionalOf[HealthComponent]], 0),
+            [(entity_a, entity_a.get_component(HealthComponent)), (entity_b, None)],
+        )
+
+    def test_logs_are_bounded(self):
+        world = EcsAdmin(100)
+        for _ in range(3):
+            world.destroy_entities(world.create_entities(50, [lambda: PositionComponent(0, 0)]))
+        pool = world.get_component_pool(PositionComponent)
+        self.assertEqual((pool.removed, pool.changes), ([], []))
+        self.assertIsNone(pool.change_log_horizon)
+        self.assertEqual(world.entity_log, [])
+
+        pool = self.world.get_component_pool(PositionComponent)
+        for _ in range(3):
+            entities = self.world.create_entities(50, [lambda: PositionComponent(0, 0)])
+            self.world.tick(1)
+            self.world.destroy_entities(entities)
+            self.world.tick(1)
+        self.assertEqual((pool.removed, pool.changes), ([], []))
+
+    def test_change_log(self):
+        pool = self.world.get_component_pool(PositionComponent)
+        entities = [self.world.create_entity([PositionComponent(i, i)]) for i in range(10)]
+        self.world.tick(1)
+        tick = self.system.last_run_tick
+        for entity in (entities[7], entities[2], entities[7]):
+            self.world.mark_changed(entity, PositionComponent)
+        self.world.destroy_entity(entities[5])
+        self.assertEqual(len(pool.changes), 3)
+        self.assertEqual(pool.get_changed_since(tick), [entities[2], entities[7]])
+        self.assertEqual(pool.get_added_since(tick), [])
+        self.assertTrue(pool.is_removed_since(entities[5], tick))
+        self.assertFalse(pool.is_removed_since(entities[4], tick))
+        # ticks older than the log fall back to scanning every row
+        self.assertEqual(len(pool.get_added_since(0)), 9)
+
+    def test_changes_made_by_earlier_stages(self):
+        pool = self.world.get_component_pool(PositionComponent)
+        entity = self.world.create_entity([PositionComponent(0, 0)])
+        self.world.tick(1)
+        self.world.mark_changed(entity, PositionComponent)
+        self.assertEqual(pool.get_changed_since(self.system.last_run_tick), [entity])
+        self.assertEqual(pool.get_changed_since(self.world.change_tick), [])
+
+    def test_swap_remove_keeps_ticks_aligned(self):
+        pool = ComponentPool(PositionComponent, 10)
+        entities = [Entity(i) for i in range(3)]
+        for tick, entity in enumerate(entities, start=1):
+            entity._add_component(PositionComponent(0, 0))
+            pool.add_entity(entity, tick)
+        pool.remove_entity(entities[0], 4)
+        self.assertEqual(pool.get_added_since(2), [entities[2]])
+        self.assertEqual(pool.get_removed_since(3), [entities[0]])
+
+class SnapshotSettingsComponent(SingletonComponent):
+    def __init__(self, difficulty: int = 1):
+        self.difficulty = difficulty
+
+    def serialize(self) -> Any:
+        return {'difficulty': self.difficulty}
+
+    @classmethod
+    def deserialize(cls, serialized_data: Any):
+        return cls(**serialized_data)
+
+class SnapshotWorld(EcsAdmin):
+    systems = [PositionSystem]
+    events = ['test_publish', 'update_time_step']
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = SnapshotWorld(100)
+        self.world.add_singleton_component(SnapshotSettingsComponent(3))
+        entities = [self.world.create_entity([PositionComponent(i, -i)]) for i in range(6)]
+        self.world.destroy_entity(entities[1])
+        self.world.destroy_entity(entities[4])
+        self.world.create_entity([PositionComponent(7, 7)])
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'world.snapshot')
+
+    def assert_same_world(self, world: EcsAdmin):
+        self.assertEqual(world.entity_manager.next_id, self.world.entity_manager.next_id)
+        self.assertEqual(world.entity_manager.destroyed_entity_ids, self.world.entity_manager.destroyed_entity_ids)
+        self.assertEqual(world.entity_manager.generations, self.world.entity_manager.generations)
+        self.assertEqual(sorted(world.entity_map), sorted(self.world.entity_map))
+
+        pool = world.get_component_pool(PositionComponent)
+        expected_pool = self.world.get_component_pool(PositionComponent)
+        self.assertEqual(pool.entity_ids, expected_pool.entity_ids)
+        self.assertEqual(pool.sparse, expected_pool.sparse)
+        self.assertEqual(
+            [entity.get_component(PositionComponent).serialize() for entity in pool.entities],
+            [entity.get_component(PositionComponent).serialize() for entity in expected_pool.entities],
+        )
+        self.assertEqual(world.get_singleton_component(SnapshotSettingsComponent).difficulty, 3)
+
+    def test_round_trip(self):
+        self.world.save_snapshot(self.path)
+        for use_mmap in (True, False):
+            world = SnapshotWorld(100)
+            world.create_entity([PositionComponent(100, 100)])
+            world.load_snapshot(self.path, use_mmap)
+            self.assert_same_world(world)
+            self.assertEqual(len(world._systems[0].get_required_entities()), len(self.world.entity_map))
+            entity = world.get_entity(self.world.entity_map[5].handle)
+            self.assertEqual(entity.get_component(PositionComponent).x, 5)
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_columnar_round_trip(self):
+        for i in range(3):
+            self.world.create_entity([ColumnarPositionComponent(x=i, y=2 * i)])
+        self.world.save_snapshot(self.path)
+        world = SnapshotWorld(100)
+        world.load_snapshot(self.path)
+        pool = world.get_component_pool(ColumnarPositionComponent)
+        np.testing.assert_array_equal(pool.get_column('y'), [0, 2, 4])
+        entity = world.get_entity(pool.entity_ids[2])
+        self.assertEqual(entity.get_component(ColumnarPositionComponent).x, 2)
+
+    def test_hierarchy_round_trip(self):
+        parent, child_1, child_2 = (self.world.get_entity(entity_id) for entity_id in (0, 2, 3))
+        self.world.set_parent(child_1, parent)
+        self.world.set_parent(child_2, parent)
+        self.world.save_snapshot(self.path)
+        world = SnapshotWorld(100)
+        world.load_snapshot(self.path)
+        self.assertEqual([child.id for child in world.get_children(world.get_entity(0))], [3, 2])
+        self.assertEqual(world.get_parent(world.get_entity(2)).id, 0)
+        world.destroy_entity(world.get_entity(0))
+        self.assertEqual(sorted(world.entity_map), [5, 6])
+
+    def test_failed_load_keeps_world(self):
+        class WriteOnlyComponent(Component):
+            def serialize(self) -> Any:
+                return 1
+
+        self.world.create_entity([WriteOnlyComponent()])
+        self.world.save_snapshot(self.path)
+        world = SnapshotWorld(100)
+        entity = world.create_entity([PositionComponent(100, 100)])
+        world.get_component_pool(WriteOnlyComponent)
+        with self.assertRaises(NotImplementedError):
+            world.load_snapshot(self.path)
+        self.assertEqual(list(world.entity_map.values()), [entity])
+        self.assertEqual(entity.get_component(PositionComponent).x, 100)
+
+    def test_invalid_snapshots(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'not a snapshot at all')
+        with self.assertRaises(ValueError):
+            self.world.load_snapshot(self.path)
+
+        self.world.save_snapshot(self.path)
+        with self.assertRaises(ValueError):
+            SnapshotWorld(10).load_snapshot(self.path)
+
+class ArmorComponent(Component):
+    def __init__(self, armor: int):
+        self.armor = armor
+
+    def serialize(self) -> Any:
+        return self.armor
+
+    @classmethod
+    def deserialize(cls, serialized_data: Any):
+        return cls(serialized_data)
+
+class TestDeltaRecorder(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = ChangeDetectionWorld(100)
+        self.entities = [self.world.create_entity([PositionComponent(i, i)]) for i in range(4)]
+        self.recorder = self.world.create_delta_recorder()
+
+    def get_state(self) -> tuple:
+        pool = self.world.get_component_pool(PositionComponent)
+        return (
+            {entity_id: entity.generation for entity_id, entity in self.world.entity_map.items()},
+            self.world.entity_manager.next_id,
+            list(self.world.entity_manager.destroyed_entity_ids),
+            self.world.entity_manager.generations[:],
+            {entity.id: entity.get_component(PositionComponent).serialize() for entity in pool.entities},
+            {entity.id: entity.get_component(ArmorComponent).armor for entity in self.world.get_entities_intersect([ArmorComponent])},
+        )
+
+    def simulate_tick(self, step: int):
+        entity = self.world.entity_map[step % 2]
+        entity.get_component(PositionComponent).x += 10
+        self.world.mark_changed(entity, PositionComponent)
+        self.world.destroy_entity(self.world.entity_map[max(self.world.entity_map)])
+        new_entity = self.world.create_entity([PositionComponent(step, -step)])
+        self.world.attach_component_to_entity(new_entity, ArmorComponent(step))
+        self.world.tick(1)
+
+    def test_record_without_ticks(self):
+        world = EcsAdmin(100)
+        recorder = world.create_delta_recorder([PositionComponent])
+        for _ in range(3):
+            entities = world.create_entities(20, [lambda: PositionComponent(1, 2)])
+            self.assertEqual(len(recorder.record().created), 20)
+            world.destroy_entities(entities)
+            self.assertEqual(len(recorder.record().destroyed), 20)
+        self.assertEqual(world.entity_log, [])
+        self.assertEqual(world.get_component_pool(PositionComponent).removed, [])
+
+    def test_empty_delta(self):
+        delta = self.recorder.record()
+        self.assertTrue(delta.is_empty())
+
+    def test_record_changes(self):
+        self.entities[0].get_component(PositionComponent).x = 42
+        self.world.mark_changed(self.entities[0], PositionComponent)
+        self.world.remove_component(self.entities[1], self.entities[1].get_component(PositionComponent))
+        self.world.destroy_entity(self.entities[2])
+        created = self.world.create_entity([PositionComponent(7, 7)])
+        delta = self.recorder.record()
+
+        self.assertEqual(delta.destroyed, [(2, 1)])
+        self.assertEqual(delta.created, [(created.id, created.generation)])
+        self.assertEqual(delta.components[PositionComponent], [
+            (0, {'x': 0, 'y': 0}, {'x': 42, 'y': 0}),
+            (1, {'x': 1, 'y': 1}, None),
+            (2, {'x': 2, 'y': 2}, None),
+            (4, None, {'x': 7, 'y': 7}),
+        ])
+        self.assertTrue(self.recorder.record().is_empty())
+
+    def test_rollback_and_replay(self):
+        states = [self.get_state()]
+        deltas = []
+        for step in range(5):
+            self.simulate_tick(step)
+            deltas.append(self.recorder.record())
+            states.append(self.get_state())
+
+        for step in reversed(range(5)):
+            self.recorder.revert(deltas[step])
+            self.assertEqual(self.get_state(), states[step])
+
+        for step in range(5):
+            self.recorder.apply(WorldDelta.decode(deltas[step].encode()))
+            self.assertEqual(self.get_state(), states[step + 1])
+
+    def test_record_hierarchy(self):
+        parent, child, moved = self.entities[:3]
+        self.world.set_parent(child, parent)
+        self.world.set_parent(moved, parent)
+        delta = self.recorder.record()
+        self.assertEqual(delta.parents, [(1, -1, 0), (2, -1, 0)])
+
+        self.world.remove_parent(moved)
+        self.world.destroy_entity(parent)
+        delta = self.recorder.record()
+        self.assertEqual(delta.destroyed, [(0, 1), (1, 1)])
+        self.assertEqual(delta.parents, [(1, 0, -1), (2, 0, -1)])
+
+        self.recorder.revert(WorldDelta.decode(delta.encode()))
+        parent, child = self.world.get_entity(0), self.world.get_entity(1)
+        self.assertEqual(self.world.get_children(parent), [self.world.get_entity(2), child])
+        self.recorder.apply(delta)
+        self.assertEqual(sorted(self.world.entity_map), [2, 3])
+        self.assertIsNone(self.world.get_parent(self.world.get_entity(2)))
+
+    def test_apply_to_other_world(self):
+        replica = ChangeDetectionWorld(100)
+        for i in range(4):
+            replica.create_entity([PositionComponent(i, i)])
+        replica_recorder = replica.create_delta_recorder()
+        for step in range(3):
+            self.simulate_tick(step)
+            replica_recorder.apply(self.recorder.record())
+        self.assertEqual(
+            [entity.get_component(PositionComponent).serialize() for entity in replica.get_component_pool(PositionComponent).entities],
+            [entity.get_component(PositionComponent).serialize() for entity in self.world.get_component_pool(PositionComponent).entities],
+        )
+
+    def test_delta_mismatch(self):
+        self.world.destroy_entity(self.entities[3])
+        delta = self.recorder.record()
+        with self.assertRaises(ValueError):
+            self.recorder.apply(delta)
+
+class DriftSystem(System):
+    writes = [PositionComponent]
+
+    def run(self, dt: float):
+        for entity in self.get_entities_intersect([PositionComponent]):
+            entity.get_component(PositionComponent).x += dt
+            self.mark_changed(entity, PositionComponent)
+
+class SpatialWorld(EcsAdmin):
+    systems = [DriftSystem]
+
+class TestSpatialIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = SpatialWorld(1000)
+        rng = random.Random(7)
+        self.entities = [
+            self.world.create_entity([PositionComponent(rng.uniform(-50, 50), rng.uniform(-50, 50))]) for _ in range(300)
+        ]
+        self.index = self.world.create_spatial_index(PositionComponent, cell_size=5)
+
+    def get_distance(self, entity: Entity, point: tuple[float, float]) -> float:
+        position = entity.get_component(PositionComponent)
+        return math.dist((position.x, position.y), point)
+
+    def test_queries_match_brute_force(self):
+        self.assertIs(self.world.spatial_indexes[PositionComponent], self.index)
+        for center, radius in [((0, 0), 7.5), ((-48, 31), 12), ((10, 10), 200)]:
+            expected = {entity for entity in self.entities if self.get_distance(entity, center) <= radius}
+            self.assertEqual(set(self.index.query_radius(center, radius)), expected)
+
+        expected = {
+            entity for entity in self.entities
+            if -10 <= entity.get_component(PositionComponent).x <= 3 and 4 <= entity.get_component(PositionComponent).y <= 20
+        }
+        self.assertEqual(set(self.index.query_aabb((-10, 4), (3, 20))), expected)
+
+        for k in (1, 5, 40):
+            expected = sorted(self.entities, key=lambda entity: (self.get_distance(entity, (3, -2)), entity.id))[:k]
+            self.assertEqual(self.index.query_nearest((3, -2), k), expected)
+        self.assertEqual(self.index.query_nearest((3, -2), 5, max_distance=0.01), [])
+        self.assertEqual(len(self.index.query_nearest((500, 500), 400)), 300)
+
+        for distance in (None, 4, 12):
+            pairs = self.index.get_candidate_pairs(distance)
+            self.assertEqual(len(pairs), len(set(pairs)))
+            self.assertTrue(all(entity_a.id < entity_b.id for entity_a, entity_b in pairs))
+            max_distance = self.index.cell_size if distance is None else distance
+            expected = {
+                (entity_a, entity_b) for entity_a in self.entities for entity_b in self.entities
+                if entity_a.id < entity_b.id and self.get_distance(entity_a, tuple(vars(entity_b.get_component(PositionComponent)).values())) <= max_distance
+            }
+            self.assertTrue(expected <= set(pairs))
+            if distance is not None:
+                self.assertEqual(set(pairs), expected)
+
+    def test_incremental_updates(self):
+        entity = self.entities[0]
+        position = entity.get_component(PositionComponent)
+        position.x, position.y = 1000, 1000
+        self.world.mark_changed(entity, PositionComponent)
+        self.index.update()
+        self.assertEqual(self.index.query_radius((1000, 1000), 1), [entity])
+
+        self.world.destroy_entity(entity)
+        self.assertEqual(self.index.query_radius((1000, 1000), 1), [])
+        self.assertEqual(len(self.index), 300)
+        self.index.update()
+        self.assertEqual(len(self.index), 299)
+        self.assertIsNone(self.index.get_position(entity))
+
+        new_entity = self.world.create_entity([PositionComponent(1000, 1000)])
+        self.index.update()
+        self.assertEqual(self.index.query_nearest((999, 999), 1), [new_entity])
+
+    def test_scheduler_updates_index(self):
+        entity = self.entities[1]
+        x = entity.get_component(PositionComponent).x
+        self.world.tick(2)
+        self.assertEqual(self.index.get_position(entity)[0], x + 2)
+        self.world.destroy_entity(self.entities[2])
+        self.world.tick(1)
+        self.assertEqual(len(self.index), 299)
+        self.assertFalse(self.world.get_component_pool(PositionComponent).removed)
+
+    def test_three_dimensions(self):
+        world = EcsAdmin()
+        entities = [world.create_entity([PositionComponent(i, 0)]) for i in range(10)]
+        with self.assertRaises(ValueError):
+            SpatialIndex(world, PositionComponent, cell_size=0)
+        index = SpatialIndex(world, PositionComponent, cell_size=2, fields=('x', 'y', 'x'))
+        self.assertEqual(index.query_nearest((4.2, 0, 4.2), 3), [entities[4], entities[5], entities[3]])
+        self.assertEqual(set(index.query_aabb((2, -1, 2), (3, 1, 3))), {entities[2], entities[3]})
+
+    def test_one_index_per_component_type(self):
+        with self.assertRaises(ValueError):
+            self.world.create_spatial_index(PositionComponent, cell_size=1)
+
+class ProfiledWorld(EcsAdmin):
+    systems = [DriftSystem, DamageSystem]
+    events = [DamageEvent, 'collision']
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = ProfiledWorld()
+        for i in range(5):
+            self.world.create_entity([PositionComponent(i, i)])
+        self.drift_system = self.world._systems[0]
+
+    def test_records_systems_events_and_frames(self):
+        profiler = self.world.enable_profiling(window=3)
+        for _ in range(4):
+            self.world.tick(1)
+        self.world.event_bus.dispatch(DamageEvent(0, 5))
+
+        stats = profiler.get_stats()
+        system_stats = stats['system']['DriftSystem']
+        self.assertEqual(system_stats['calls'], 4)
+        self.assertEqual(system_stats['entities'], 20)
+        self.assertLessEqual(system_stats['p50_ms'], system_stats['p99_ms'])
+        self.assertLessEqual(system_stats['p99_ms'], system_stats['max_ms'])
+        self.assertEqual(len(profiler.stats[('system', 'DriftSystem')].durations), 3)
+        self.assertEqual(stats['frame']['tick']['calls'], 4)
+        self.assertEqual(stats['event']['DamageEvent:DamageSystem.apply_damage']['calls'], 1)
+        self.assertEqual(self.world._systems[1].calls, [('armor', 5), ('apply', 5)])
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'trace.json')
+        profiler.export_chrome_trace(path)
+        with open(path) as file:
+            trace_events = json.load(file)['traceEvents']
+        self.assertEqual(len(trace_events), 4 + 4 + 2)
+        self.assertTrue(all(event['ph'] == 'X' and event['dur'] >= 0 for event in trace_events))
+
+        profiler.reset()
+        self.assertEqual(profiler.get_stats(), {})
+
+    def test_disable_removes_instrumentation(self):
+        handlers = self.world.event_bus._handlers[:]
+        profiler = self.world.enable_profiling()
+        self.assertIn('run', vars(self.drift_system))
+        self.assertNotEqual(self.world.event_bus._handlers, handlers)
+
+        self.world.disable_profiling()
+        self.assertIsNone(self.world.profiler)
+        self.assertNotIn('run', vars(self.drift_system))
+        self.assertNotIn('tick', vars(self.world))
+        self.assertEqual(self.world.event_bus._handlers, handlers)
+        self.world.tick(1)
+        self.assertEqual(profiler.get_stats(), {})
+
+    def test_profiles_async_systems(self):
+        world = AsyncWorld()
+        profiler = world.enable_profiling()
+        asyncio.run(world.tick_async(1))
+        self.assertEqual(profiler.get_stats()['system']['AsyncDamageSystem']['calls'], 1)
+        self.assertEqual(profiler.get_stats()['frame']['tick']['calls'], 1)
+
+class TestHierarchy(unittest.TestCase):
+    def setUp(self) -> None:
+        # tank -> turret -> barrel, tank -> hatch, crate
+        self.world = EcsAdmin(100)
+        self.tank, self.turret, self.barrel, self.hatch, self.crate = [
+            self.world.create_entity([PositionComponent(i, 0)]) for i in range(5)
+        ]
+        self.world.attach_component_to_entity(self.barrel, HealthComponent(10))
+        self.world.set_parent(self.turret, self.tank)
+        self.world.set_parent(self.barrel, self.turret)
+        self.world.set_parent(self.hatch, self.tank)
+
+    def test_links(self):
+        hierarchy = self.world.hierarchy
+        self.assertIsInstance(hierarchy, Hierarchy)
+        self.assertIs(self.world.get_parent(self.barrel), self.turret)
+        self.assertIsNone(self.world.get_parent(self.tank))
+        self.assertEqual(self.world.get_children(self.tank), [self.hatch, self.turret])
+        self.assertEqual(self.world.get_children(self.turret, [HealthComponent]), [self.barrel])
+        self.assertEqual(self.world.get_children(self.tank, [HealthComponent]), [])
+        self.assertEqual(hierarchy.get_descendants(self.tank), [self.hatch, self.turret, self.barrel])
+        self.assertEqual([hierarchy.get_depth(entity) for entity in (self.tank, self.turret, self.barrel)], [0, 1, 2])
+
+        with self.assertRaises(ValueError):
+            self.world.set_parent(self.tank, self.barrel)
+        with self.assertRaises(ValueError):
+            self.world.set_parent(self.tank, self.tank)
+
+        self.world.set_parent(self.turret, self.crate)
+        self.assertEqual(self.world.get_children(self.tank), [self.hatch])
+        self.assertEqual(hierarchy.get_depth(self.barrel), 2)
+        self.world.remove_parent(self.turret)
+        self.assertEqual(self.world.get_children(self.crate), [])
+        self.assertEqual(self.world.get_children(self.turret), [self.barrel])
+        self.assertEqual(hierarchy.get_depth(self.barrel), 1)
+
+    def test_depth_sorted(self):
+        self.world.set_parent(self.tank, self.crate)
+        pairs = self.world.get_depth_sorted()
+        self.assertEqual(pairs[0], (self.crate, None))
+        self.assertEqual({entity for entity, _ in pairs}, {self.crate, self.tank, self.turret, self.hatch, self.barrel})
+        seen = set()
+        for entity, parent in pairs:
+            self.assertIs(self.world.get_parent(entity), parent)
+            self.assertTrue(parent is None or parent in seen)
+            seen.add(entity)
+        self.assertEqual(self.world.get_depth_sorted([HealthComponent]), [(self.barrel, self.turret)])
+
+        # propagate the x offsets down the hierarchy in one pass
+        world_x = {}
+        for entity, parent in pairs:
+            world_x[entity] = entity.get_component(PositionComponent).x + (world_x[parent] if parent else 0)
+        self.assertEqual(world_x[self.barrel], 4 + 0 + 1 + 2)
+
+    def test_destroy_cascades(self):
+        self.world.destroy_entity(self.turret)
+        for entity in (self.turret, self.barrel):
+            self.assertFalse(self.world.entity_manager.is_alive(entity))
+        self.assertEqual(self.world.get_children(self.tank), [self.hatch])
+        self.assertFalse(self.world.get_component_pool(HealthComponent).entities)
+
+        self.world.destroy_entity(self.hatch)
+        self.assertEqual(self.world.get_children(self.tank), [])
+        self.assertEqual(self.world.get_depth_sorted(), [])
+
+        self.world.set_parent(self.crate, self.tank)
+        self.world.destroy_entities([self.tank])
+        self.assertEqual(list(self.world.entity_map), [])
+        new_entity = self.world.create_entity()
+        self.assertIsNone(self.world.get_parent(new_entity))
+        self.assertEqual(self.world.get_children(new_entity), [])
+
+    def test_destroyed_entities_cant_be_linked(self):
+        self.world.destroy_entity(self.crate)
+        with self.assertRaises(KeyError):
+            self.world.set_parent(self.crate, self.tank)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file